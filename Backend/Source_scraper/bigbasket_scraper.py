@@ -2,15 +2,13 @@ import asyncio
 import re
 from playwright.async_api import async_playwright, Page
 
-def clean_price(text_line):
-    matches = re.findall(r"₹\s*(\d+(?:\.\d+)?)", text_line)
-    if not matches:
-        return 0.0
-    # Convert to float to keep decimals
-    return min(float(p) for p in matches)
+from Backend.data_cleaner import clean_price
+from Backend.log import get_logger
+
+log = get_logger("scraper.bigbasket")
 
 async def scrape_bigbasket(page: Page, query: str):
-    print(f"🟢 [BigBasket] Searching for '{query}'...")
+    log.debug("🟢 [BigBasket] Searching for '%s'", query)
     
     try:
         await page.goto(
@@ -25,7 +23,7 @@ async def scrape_bigbasket(page: Page, query: str):
             loc_btn = page.get_by_text("Select Location", exact=False).first
             
             if await loc_btn.is_visible():
-                print("   📍 Found 'Select Location' widget...")
+                log.debug("📍 [BigBasket] Found 'Select Location' widget...")
                 await loc_btn.click()
                 
                 # Type Pincode (Standard fallback for BB)
@@ -54,7 +52,7 @@ async def scrape_bigbasket(page: Page, query: str):
             # Wait for at least one product card (li with an h3 title)
             await page.wait_for_selector("li h3", timeout=6000)
         except:
-            print(f"   ⚠️ Timeout or no results for {query}")
+            log.warning("⚠️ [BigBasket] Timeout or no results for %s", query)
             return []
 
         products = []
@@ -114,7 +112,7 @@ async def scrape_bigbasket(page: Page, query: str):
         return list({p["name"]: p for p in products}.values())
 
     except Exception as e:
-        print(f"Error scraping BigBasket: {e}")
+        log.warning("⚠️ Error scraping BigBasket: %s", e)
         return []
 
 # ------------------ RUNNER ------------------
@@ -2,17 +2,14 @@ import asyncio
 import re
 from playwright.async_api import async_playwright, Page
 
+from Backend.data_cleaner import clean_price
+from Backend.log import get_logger
 
-def clean_price(text_line):
-    matches = re.findall(r"₹\s*(\d+(?:\.\d+)?)", text_line)
-    if not matches:
-        return 0.0
-    # Convert to float to keep decimals
-    return min(float(p) for p in matches)
+log = get_logger("scraper.blinkit")
 
 
 async def scrape_blinkit(page: Page, query: str):
-    print(f"🟢 [Blinkit] Searching for '{query}'...")
+    log.debug("🟢 [Blinkit] Searching for '%s'", query)
     try:
         await page.goto(
             f"https://blinkit.com/s/?q={query}",
@@ -2,16 +2,13 @@ import asyncio
 import re
 from playwright.async_api import async_playwright, Page
 
-def clean_price(text_line):
-    # Extracts the first valid integer after a ₹ symbol
-    matches = re.findall(r"₹\s*(\d+(?:\.\d+)?)", text_line)
-    if not matches:
-        return 0.0
-    # Convert to float to keep decimals
-    return min(float(p) for p in matches)
+from Backend.data_cleaner import clean_price
+from Backend.log import get_logger
+
+log = get_logger("scraper.zepto")
 
 async def scrape_zepto(page: Page, query: str):
-    print(f"🟣 [Zepto] Searching for '{query}'...")
+    log.debug("🟣 [Zepto] Searching for '%s'", query)
     try:
         await page.goto(
             f"https://www.zepto.com/search?query={query}",
@@ -27,7 +24,7 @@ async def scrape_zepto(page: Page, query: str):
             pass
 
         # --- 1. SCROLL TO LOAD ---
-        print("   📜 Scrolling to load items...")
+        log.debug("📜 [Zepto] Scrolling to load items...")
         await page.evaluate("window.scrollTo(0, 1000)")
         await asyncio.sleep(2) 
 
@@ -37,13 +34,13 @@ async def scrape_zepto(page: Page, query: str):
         try:
             await page.wait_for_selector('[data-slot-id="ProductName"]', timeout=8000)
         except:
-            print(f"   ⚠️ Timeout: No products found for {query}")
+            log.warning("⚠️ [Zepto] Timeout: no products found for %s", query)
             return []
 
         # Find all name elements first
         name_elements = await page.locator('[data-slot-id="ProductName"]').all()
         
-        print(f"   🔍 DEBUG: Found {len(name_elements)} products.")
+        log.debug("🔍 [Zepto] Found %d products", len(name_elements))
         
         products = []
 
@@ -109,7 +106,7 @@ async def scrape_zepto(page: Page, query: str):
         return products
 
     except Exception as e:
-        print(f"Error scraping Zepto: {e}")
+        log.warning("⚠️ Error scraping Zepto: %s", e)
         return []
 
 # ------------------ RUNNER ------------------
@@ -2,97 +2,356 @@ import asyncio
 import os
 import json
 import re
-from groq import AsyncGroq
+import threading
 from dotenv import load_dotenv
-from difflib import SequenceMatcher
 from sqlalchemy import text
-from .db_ingest import fetch_and_store_items
-from .data_cleaner import autocorrect_query
-from .db_supabase import SessionLocal
+from .db_ingest import fetch_and_store_items, warm_up as warm_up_scrapers
+from .data_cleaner import autocorrect_query, size_label, clean_product_name
+from .db_supabase import SessionLocal, warm_up as warm_up_db
+from .relevance_cache import get_relevance_cache, normalize_name
+from .prefilter import prefilter, FILTER_PROVENANCE
+from .report_renderer import render_report, render_basket_plan, md_escape
+from .alignment import align_items
+from .offers import build_ai_payload, warm_up as warm_up_offers
+from .basket_optimizer import item_offers, optimize_basket, cheapest_per_item
+from .report_cache import get_report_cache
+from .product_identity import lookup_canonical_ids
+from .llm_client import LLMClient
+from .metrics import timed, span, register_collector, request_context
+from .log import get_logger
+from .profiling import profiled
+from .prompt_codec import (
+    LLM_PROMPT_TOKEN_BUDGET,
+    PROMPT_TOKEN_STATS,
+    REPORT_ROWS_LEGEND,
+    encode_filter_names,
+    encode_report_payload,
+    estimate_tokens,
+    filter_names_tokens
+)
 
 load_dotenv()
 
-# Use your specific Groq API Key
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-client = AsyncGroq(api_key=GROQ_API_KEY)
+log = get_logger(__name__)
 
-# ------------------ 1. DATA PREPARATION ------------------
+# Managed Groq client (concurrency cap, deadlines, retries, accounting),
+# created on the first LLM call: cached and template-only runs never need it
+_llm = None
+_llm_lock = threading.Lock()   # warm_up creates it from a worker thread
 
-def normalize_weight(qty_val, unit):
-    if not unit or qty_val == 0: return "Other"
-    unit = unit.lower().strip()
-    
-    if unit == 'g' or unit == 'gm':
-        if qty_val >= 1000: return f"{int(qty_val/1000)}kg"
-        return f"{int(qty_val)}g"
-    
-    if unit == 'ml':
-        if qty_val >= 1000: return f"{int(qty_val/1000)}l"
-        return f"{int(qty_val)}ml"
-        
-    if unit in ['kg', 'l', 'ltr']:
-        return f"{int(qty_val) if qty_val % 1 == 0 else qty_val}{unit.replace('ltr', 'l')}"
-        
-    return f"{int(qty_val)}{unit}"
 
-def get_products_from_db(search_query):
+def get_llm():
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            _llm = LLMClient()
+        return _llm
+
+
+def warm_up(db=True, scrapers=True):
+    """
+    Sets up now what the pipeline otherwise loads on first use: the Groq
+    client, pandas (OFFERS_ENGINE=pandas), the DB engine with an open
+    connection, and Playwright with the scrapers. Failures are only logged.
+    """
+    steps = [("llm", get_llm), ("offers", warm_up_offers)]
+    if db:
+        steps.append(("db", warm_up_db))
+    if scrapers:
+        steps.append(("scrapers", warm_up_scrapers))
+
+    for name, step in steps:
+        try:
+            with span("warm_up", part=name):
+                step()
+        except Exception as e:
+            log.warning("⚠️ Warm-up of %s failed: %s", name, e)
+    log.info("🔥 Pipeline warmed up (%s)", ", ".join(name for name, _ in steps))
+
+# "template" renders reports locally, "llm" lets Groq write them
+AI_REPORT_MODE = os.getenv("AI_REPORT_MODE", "template").lower()
+
+# Add a "cheapest way to buy the whole basket" message after multi-item comparisons
+BASKET_PLAN = os.getenv("BASKET_PLAN", "1") == "1"
+
+
+
+@register_collector
+def _pipeline_counters():
+    """LLM, report cache and filter counters for the /metrics endpoint."""
+    samples = []
+    if _llm is not None:
+        s = _llm.stats
+        samples += [
+            ("llm_calls_total", {}, s["calls"], "counter"),
+            ("llm_failures_total", {}, s["failures"], "counter"),
+            ("llm_retries_total", {}, s["retries"], "counter"),
+            ("llm_latency_seconds_total", {}, round(s["latency_total"], 6), "counter"),
+            ("llm_latency_seconds_max", {}, round(s["latency_max"], 6), "gauge"),
+            ("llm_tokens_total", {"kind": "prompt"}, s["prompt_tokens"], "counter"),
+            ("llm_tokens_total", {"kind": "completion"}, s["completion_tokens"], "counter"),
+        ]
+    cache = get_report_cache()
+    samples.append(("report_cache_requests_total", {"result": "hit"}, cache.hits, "counter"))
+    samples.append(("report_cache_requests_total", {"result": "miss"}, cache.misses, "counter"))
+    for source, n in sorted(FILTER_PROVENANCE.items()):
+        samples.append(("filter_verdicts_total", {"source": source}, n, "counter"))
+    for kind, n in sorted(PROMPT_TOKEN_STATS.items()):
+        samples.append(("prompt_tokens_estimated_total", {"kind": kind}, n, "counter"))
+    return samples
+
+
+# ------------------ 1. DATA PREPARATION ------------------
+
+@timed("get_products_from_db")
+def get_products_for_queries(search_queries):
+    """
+    Reads the stored products of several queries in one round trip.
+    Returns {query: [items]} (empty list for queries with no rows).
+    """
+    search_queries = list(dict.fromkeys(search_queries))
     db = SessionLocal()
     try:
         result = db.execute(
             text("""
-                SELECT source, product_name, price, quantity_value, quantity_unit 
-                FROM test_products WHERE search_query = :q
+                SELECT search_query, source, product_name, price, quantity_value, quantity_unit 
+                FROM test_products WHERE search_query = ANY(:qs)
             """),
-            {"q": search_query}
+            {"qs": search_queries}
         )
         rows = result.fetchall()
         
-        items = []
+        # Canonical product ids maintained at ingest (product_identity.py)
+        identities = lookup_canonical_ids(db, [r.product_name for r in rows])
+
+        items = {q: [] for q in search_queries}
         for r in rows:
             q_val = float(r.quantity_value) if r.quantity_value else 0
-            q_unit = str(r.quantity_unit).lower() if r.quantity_unit else "unit"
+            weight_label = size_label(r.quantity_value, r.quantity_unit)
+            clean_name = clean_product_name(r.product_name)
 
-            clean_name = r.product_name.replace("\n", " ").strip()
-            clean_name = " ".join(clean_name.split()) 
-            
-            weight_label = normalize_weight(q_val, q_unit)
-
-            items.append({
+            items[r.search_query].append({
                 "source": r.source,
                 "name": clean_name,
                 "price": float(r.price),
                 "weight": weight_label,
-                "raw_val": q_val 
+                "raw_val": q_val,
+                "canonical_id": identities.get((r.source, clean_name, weight_label))
             })
         return items
     finally:
         db.close()
 
-# ------------------ 2. NEW: SEMANTIC INTENT FILTER ------------------
 
-async def semantic_filter(query, items):
+def get_products_from_db(search_query):
+    return get_products_for_queries([search_query])[search_query]
+
+
+@timed("get_data_versions")
+def get_data_versions(search_queries):
     """
-    Uses AI to filter out irrelevant products (e.g. 'Onion Pakoda' when searching 'Onion').
+    {query: data version} for the report cache, from the stored rows: row
+    count and newest scraped_at. Any ingest (bot, CLI, cron) changes it.
     """
-    if not items: return []
+    search_queries = list(dict.fromkeys(search_queries))
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            text("""
+                SELECT search_query, COUNT(*) AS n, MAX(scraped_at) AS newest
+                FROM test_products WHERE search_query = ANY(:qs)
+                GROUP BY search_query
+            """),
+            {"qs": search_queries}
+        ).fetchall()
+    finally:
+        db.close()
 
-    # Prepare a simple numbered list for the AI
-    item_list_str = "\n".join([f"{i}: {item['name']}" for i, item in enumerate(items)])
+    versions = {q: "0" for q in search_queries}
+    for r in rows:
+        versions[r.search_query] = f"{r.n}@{r.newest}"
+    return versions
 
-    print(f"\n🧠 [DEBUG] Running Semantic Filter on {len(items)} items...")
+# ------------------ 2. NEW: SEMANTIC INTENT FILTER ------------------
 
-    prompt = f"""
-    User Query: "{query}"
-    
-    Task: Identify which products in the list below are IRRELEVANT to the user's intent.
-    
+FILTER_RULES_PROMPT = """
     STRICT FILTERING RULES:
     1. **Processed/Cooked:** If user asks for a raw ingredient (e.g. "Onion", "Chicken"), REMOVE cooked dishes (e.g. "Onion Pakoda", "Butter Chicken", "Chips").
     2. **Distinct Varieties:** If user asks for a generic item (e.g. "Onion"), REMOVE distinct biological varieties that usually require specific queries (e.g. remove "Spring Onion" or "Leeks"). 
        *Exception:* Keep subtypes like "Red Onion", "White Onion", "Baby Onion" as they are still core "Onions".
     3. **Derivatives:** Remove pastes, powders, oils, and ketchups unless explicitly asked for.
     4. **Accessories:** Remove peelers, choppers, or seeds.
+"""
+
+
+
+async def _resolve_locally(query, items):
+    """
+    Rules + relevance cache. Returns (names, decisions, unknown_names), where
+    decisions maps name -> (keep, source, reason) and unknown_names still need the LLM.
+    """
+    # Unique names (the same name can come from several stores)
+    names = list(dict.fromkeys(normalize_name(item['name']) for item in items))
+
+    # 1. Local rules
+    rule_verdicts, reasons, ambiguous = prefilter(query, names)
+    decisions = {name: (keep, "rule", reasons[name]) for name, keep in rule_verdicts.items()}
+
+    # 2. Cached LLM verdicts
+    cache = get_relevance_cache()
+    try:
+        cached = await asyncio.to_thread(cache.get_many, query, ambiguous) if ambiguous else {}
+    except Exception as e:
+        log.warning("⚠️ Relevance cache unavailable: %s", e)
+        cached = {}
+    for name, keep in cached.items():
+        decisions[name] = (keep, "cache", None)
+
+    unknown_names = [name for name in ambiguous if name not in cached]
+
+    log.debug("🧠 Semantic filter '%s' on %d names: %d by rules, %d cached, %d to LLM",
+              query, len(names), len(rule_verdicts), len(cached), len(unknown_names))
+
+    return names, decisions, unknown_names
+
+
+async def _apply_llm_verdicts(query, items, names, decisions, unknown_names, llm_verdicts, provenance=None):
+    """Merges LLM verdicts (None = call failed), caches them and filters the items."""
+    if unknown_names:
+        if llm_verdicts is None:
+            # AI failed: keep every unseen item, don't cache anything
+            for name in unknown_names:
+                decisions[name] = (True, "fallback", None)
+        else:
+            try:
+                await asyncio.to_thread(get_relevance_cache().put_many, query, llm_verdicts)
+            except Exception as e:
+                log.warning("⚠️ Relevance cache write failed: %s", e)
+            for name in unknown_names:
+                if name in llm_verdicts:
+                    decisions[name] = (llm_verdicts[name], "llm", None)
+                else:
+                    decisions[name] = (True, "fallback", None)
 
+    for name in names:
+        keep, source, reason = decisions[name]
+        FILTER_PROVENANCE[source] += 1
+        if provenance is not None:
+            provenance.append({"name": name, "keep": keep, "source": source, "reason": reason})
+
+    filtered_items = [item for item in items if decisions[normalize_name(item['name'])][0]]
+
+    log.debug("✂️ Filtered %d -> %d items", len(items), len(filtered_items))
+    return filtered_items
+
+
+@timed("semantic_filter")
+async def semantic_filter(query, items, provenance=None):
+    """
+    Uses AI to filter out irrelevant products (e.g. 'Onion Pakoda' when searching 'Onion').
+    Obvious keeps/drops are decided by local rules (prefilter.py), earlier LLM verdicts
+    come from the relevance cache, and only the remaining names go to the LLM.
+    Pass a list as `provenance` to get one {name, keep, source, reason} entry per name.
+    """
+    if not items: return []
+
+    names, decisions, unknown_names = await _resolve_locally(query, items)
+
+    llm_verdicts = await _llm_relevance_chunked(query, unknown_names) if unknown_names else {}
+
+    return await _apply_llm_verdicts(query, items, names, decisions, unknown_names, llm_verdicts, provenance)
+
+
+@timed("semantic_filter", batch=True)
+async def semantic_filter_batch(query_items, provenance=None):
+    """
+    Batched semantic_filter for a basket: {query: items} -> {query: filtered items}.
+    Unseen names of several queries are sent in one JSON request per chunk;
+    a failed chunk falls back to one semantic call per query.
+    """
+    local = {}
+    for query, items in query_items.items():
+        if items:
+            local[query] = await _resolve_locally(query, items)
+
+    pending = {q: res[2] for q, res in local.items() if res[2]}
+    llm_results = {}
+
+    chunks = _chunk_by_size(
+        list(pending.items()),
+        lambda entry: filter_names_tokens(entry[1]) + estimate_tokens(entry[0]) + 4
+    )
+    chunk_results = await asyncio.gather(*[_llm_relevance_batch(dict(chunk)) for chunk in chunks])
+
+    for chunk, result in zip(chunks, chunk_results):
+        if result is None:
+            log.warning("⚠️ Batched filter chunk failed, retrying %d queries one by one", len(chunk))
+            singles = await asyncio.gather(*[_llm_relevance_chunked(q, names) for q, names in chunk])
+            result = {q: verdicts for (q, _), verdicts in zip(chunk, singles)}
+        llm_results.update(result)
+
+    filtered = {}
+    for query, items in query_items.items():
+        if not items:
+            filtered[query] = []
+            continue
+        names, decisions, unknown_names = local[query]
+        filtered[query] = await _apply_llm_verdicts(
+            query, items, names, decisions, unknown_names,
+            llm_results.get(query, {}), provenance
+        )
+    return filtered
+
+
+def _chunk_by_size(entries, size_fn, max_size=None):
+    """Greedily packs entries into chunks whose estimated tokens stay under max_size."""
+    max_size = max_size or LLM_PROMPT_TOKEN_BUDGET
+    chunks, current, current_size = [], [], 0
+    for entry in entries:
+        size = size_fn(entry)
+        if current and current_size + size > max_size:
+            chunks.append(current)
+            current, current_size = [], 0
+        current.append(entry)
+        current_size += size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def _llm_relevance_chunked(query, names):
+    """
+    _llm_relevance, split into several requests when the names exceed the token budget.
+    Names of a failed chunk are left out of the result (they fall back to "keep").
+    """
+    chunks = _chunk_by_size(names, lambda name: filter_names_tokens([name]))
+    if len(chunks) == 1:
+        return await _llm_relevance(query, names)
+
+    results = await asyncio.gather(*[_llm_relevance(query, chunk) for chunk in chunks])
+    if all(r is None for r in results):
+        return None
+
+    merged = {}
+    for r in results:
+        merged.update(r or {})
+    return merged
+
+
+async def _llm_relevance(query, names):
+    """
+    Asks the LLM which names match the user intent.
+    Returns {name: keep} or None if the call failed.
+    """
+    # Prepare a simple numbered list for the AI
+    item_list_str = encode_filter_names(names)
+    PROMPT_TOKEN_STATS["filter_tokens"] += filter_names_tokens(names)
+
+    prompt = f"""
+    User Query: "{query}"
+    
+    Task: Identify which products in the list below are IRRELEVANT to the user's intent.
+    {FILTER_RULES_PROMPT}
     Items:
     {item_list_str}
 
@@ -104,7 +363,7 @@ async def semantic_filter(query, items):
     """
 
     try:
-        response = await client.chat.completions.create(
+        response = await get_llm().chat(
             model=os.getenv("GROQ_MODEL"),
             messages=[
                 {"role": "system", "content": "You are a strict data cleaning assistant. JSON output only."},
@@ -118,134 +377,100 @@ async def semantic_filter(query, items):
         result = json.loads(response.choices[0].message.content)
         keep_indices = set(result.get("keep_indices", []))
         
-        # Filter the original list
-        filtered_items = [item for i, item in enumerate(items) if i in keep_indices]
-        
-        print(f"   ✂️  Filtered {len(items)} -> {len(filtered_items)} items.")
-        return filtered_items
+        return {name: i in keep_indices for i, name in enumerate(names)}
 
     except Exception as e:
-        print(f"   ⚠️ Semantic Filter Failed: {e}. Proceeding with full list.")
-        return items # Fallback to full list if AI fails
+        log.warning("⚠️ Semantic filter failed: %s. Proceeding with full list.", e)
+        return None
 
-# ------------------ 3. ALIGNMENT & ANALYSIS ------------------
 
-def similar(a, b):
-    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+async def _llm_relevance_batch(query_names):
+    """
+    One LLM call for several queries: {query: [names]} -> {query: {name: keep}}.
+    Returns None if the call failed or the response doesn't cover every query.
+    """
+    queries = list(query_names)
+    blocks = []
+    for qid, query in enumerate(queries):
+        lines = encode_filter_names(query_names[query], indent="    ")
+        PROMPT_TOKEN_STATS["filter_tokens"] += filter_names_tokens(query_names[query])
+        blocks.append(f'  Query {qid}: "{query}"\n{lines}')
 
-def align_products(all_items):
-    grouped_by_weight = {}
+    prompt = f"""
+    Task: For EACH user query below, identify which of its products are RELEVANT to the user's intent.
+    {FILTER_RULES_PROMPT}
+    Queries and Items:
+{chr(10).join(blocks)}
 
-    for item in all_items:
-        w = item['weight']
-        if w not in grouped_by_weight:
-            grouped_by_weight[w] = []
-        
-        found_match = False
-        for row in grouped_by_weight[w]:
-            if similar(row['name'], item['name']) > 0.5: 
-                row[item['source']] = item['price']
-                if len(item['name']) > len(row['name']):
-                    row['name'] = item['name']
-                found_match = True
-                break
-        
-        if not found_match:
-            new_row = {
-                "name": item['name'],
-                "blinkit": None,
-                "zepto": None,
-                "bigbasket": None
-            }
-            new_row[item['source']] = item['price']
-            grouped_by_weight[w].append(new_row)
-
-    return grouped_by_weight
-
-async def get_ai_recommendation(query, inventory_data):
-    ai_payload = []
-
-    for weight, products in inventory_data.items():
-        all_options = []
-        for p in products:
-            for store in ['blinkit', 'zepto', 'bigbasket']:
-                if p[store] is not None:
-                    all_options.append({
-                        "store": store,
-                        "price": p[store],
-                        "product_name": p['name'], 
-                        "is_brand": any(x in p['name'].lower() for x in ["amul", "nandini", "heritage", "tata", "nestle", "fortune", "organic","premium"])
-                    })
-        
-        if not all_options: continue
+    OUTPUT JSON FORMAT ONLY:
+    {{
+        "results": [ {{ "query_id": 0, "keep_indices": [0, 2, 5, ...] }}, ... ]
+    }}
+    (One entry per query. Return ONLY the indices of items that match that query's intent).
+    """
 
-        # 1. Sort & Pick Winner
-        all_options.sort(key=lambda x: x['price'])
-        winner = all_options[0]
-        other_options = all_options[1:] # Exclude winner
-        
-        competitor_best_prices = {} 
-        
-        for opt in other_options:
-            store = opt['store']
-            price = opt['price']
-            
-            # CRITICAL FIX: Only calculate savings against DIFFERENT stores
-            if store == winner['store']:
-                continue
-            
-            # Keep only the lowest price per competitor to avoid spamming
-            if store not in competitor_best_prices or price < competitor_best_prices[store]:
-                competitor_best_prices[store] = price
-        
-        savings_parts = []
-        if competitor_best_prices:
-            for store, price in competitor_best_prices.items():
-                diff = int(price - winner['price'])
-                if diff > 0:
-                    savings_parts.append(f"Save ₹{diff} vs {store.title()}")
-                else:
-                    savings_parts.append(f"Price Match with {store.title()}")
-        else:
-            # If no competitors (only same store options), say this:
-            savings_parts.append("Lowest price across platforms")
-
-        # 4. JSON Payload
-        group_data = {
-            "size": weight,
-            "best_deal": {
-                "winner_store": winner['store'].title(),
-                "price": int(winner['price']),
-                "item": winner['product_name'], 
-                "savings_analysis": ", ".join(savings_parts) 
-            },
-            "other_options": other_options # <-- This list still contains same-store items for the AI to check brands
+    try:
+        response = await get_llm().chat(
+            model=os.getenv("GROQ_MODEL"),
+            messages=[
+                {"role": "system", "content": "You are a strict data cleaning assistant. JSON output only."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.0,
+            max_tokens=min(4000, 300 + 40 * sum(len(n) for n in query_names.values())),
+            response_format={"type": "json_object"}
+        )
+
+        result = json.loads(response.choices[0].message.content)
+        by_id = {int(r["query_id"]): set(r.get("keep_indices", [])) for r in result.get("results", [])}
+
+        if set(by_id) != set(range(len(queries))):
+            raise ValueError(f"response covers queries {sorted(by_id)}")
+
+        return {
+            query: {name: i in by_id[qid] for i, name in enumerate(query_names[query])}
+            for qid, query in enumerate(queries)
         }
-        ai_payload.append(group_data)
 
-    json_context = json.dumps(ai_payload, indent=2, ensure_ascii=False)
+    except Exception as e:
+        log.warning("⚠️ Batched semantic filter failed: %s", e)
+        return None
 
-    print(json_context)
-    
-    # --- FEW SHOT PROMPT ---
-    prompt = f"""
-    You are a Smart Shopping Assistant.
-    
-    INPUT DATA (JSON):
-    {json_context}
-    
-    YOUR TASK:
-    Convert this JSON into a clean Telegram buying guide.
-    
+# ------------------ 3. ALIGNMENT & ANALYSIS ------------------
+
+@timed("align_products")
+def align_products(all_items):
+    """
+    Aligns the same product across stores within each weight group.
+    Blocking + token-set similarity, see alignment.py.
+    """
+    return align_items(all_items)
+
+@timed("get_ai_recommendation")
+async def get_ai_recommendation(query, inventory_data, mode=None):
+    """
+    Builds the Telegram buying guide.
+    mode="template" (default, see AI_REPORT_MODE) renders it locally;
+    mode="llm" asks Groq to write it and falls back to the template on failure.
+    """
+    ai_payload = build_ai_payload(inventory_data)
+    mode = mode or AI_REPORT_MODE
+
+    if mode != "llm":
+        return render_report(query, ai_payload)
+
+    return await _llm_report(query, ai_payload)
+
+
+REPORT_EXAMPLES_PROMPT = """
     --------------------------------------------------------
     FEW-SHOT EXAMPLES (Follow these patterns strictly):
 
     Example 1: (Generic Winner, Premium Alternative exists)
-    Input: {{
-        "size": "1kg",
-        "best_deal": {{ "winner_store": "BigBasket", "price": 30, "item": "fresho! Onion", "savings_analysis": "Save ₹10 vs Blinkit" }},
-        "other_options": [ {{ "store": "blinkit", "price": 40, "product_name": "Organic Onion", "is_brand": true }} ]
-    }}
+    Input:
+    #1kg
+    W|bb|30|fresho! Onion|Save ₹10 vs Blinkit
+    O|bl|40|Organic Onion|B
     Output:
     🔹 1kg
        🏆 BigBasket • fresho! Onion • ₹30
@@ -253,14 +478,11 @@ async def get_ai_recommendation(query, inventory_data):
        Tip: Upgrade to Organic Onion for ₹40 (Blinkit)
 
     Example 2: (Brand Winner, Multiple Comparisons)
-    Input: {{
-        "size": "500ml",
-        "best_deal": {{ "winner_store": "Zepto", "price": 24, "item": "Nandini GoodLife", "savings_analysis": "Save ₹2 vs Blinkit, Save ₹4 vs BigBasket" }},
-        "other_options": [ 
-             {{ "store": "blinkit", "price": 26, "product_name": "Amul Taaza", "is_brand": true }},
-             {{ "store": "bigbasket", "price": 28, "product_name": "Nandini GoodLife", "is_brand": true }}
-        ]
-    }}
+    Input:
+    #500ml
+    W|ze|24|Nandini GoodLife|Save ₹2 vs Blinkit, Save ₹4 vs BigBasket
+    O|bl|26|Amul Taaza|B
+    O|bb|28|=|B
     Output:
     🔹 500ml
        🏆 Zepto • Nandini GoodLife • ₹24
@@ -268,11 +490,9 @@ async def get_ai_recommendation(query, inventory_data):
        Tip: Upgrade to Amul Taaza for ₹26 (Blinkit)
 
     Example 3: (Single Option)
-    Input: {{
-        "size": "200g",
-        "best_deal": {{ "winner_store": "Blinkit", "price": 100, "item": "Milky Mist Paneer", "savings_analysis": "Lowest price" }},
-        "other_options": []
-    }}
+    Input:
+    #200g
+    W|bl|100|Milky Mist Paneer|Lowest price
     Output:
     🔹 200g
        🏆 **Blinkit** • Milky Mist Paneer • ₹100
@@ -281,15 +501,33 @@ async def get_ai_recommendation(query, inventory_data):
 
     FORMATTING RULES:
     1. **Winner Line:** 🏆 [Store] • [Brand + Product Name] • ₹[Price]
-    2. **Savings:** Use the 'savings_analysis' string directly from JSON.
-    3. **Tips:** CHECK 'other_options'. If there is a PREMIUM BRAND (Amul, Tata, etc.) available, mention it in the 💡 tip.
+    2. **Savings:** Use the savings string from the W row directly.
+    3. **Tips:** CHECK the O rows. If there is a PREMIUM BRAND (B) (Amul, Tata, etc.) available, mention it in the 💡 tip.
+"""
+
+
+async def _llm_report(query, ai_payload):
+    rows, info = encode_report_payload(ai_payload)
+
+    log.debug("🧾 Report prompt: %d tokens (saved %d vs JSON)", info["tokens"], info["saved"])
+    
+    # --- FEW SHOT PROMPT ---
+    prompt = f"""
+    You are a Smart Shopping Assistant.
+    
+    INPUT DATA ({REPORT_ROWS_LEGEND}):
+    {rows}
+    
+    YOUR TASK:
+    Convert these rows into a clean Telegram buying guide.
     
+    {REPORT_EXAMPLES_PROMPT}
     OUTPUT:
     📊 Best Prices for  {query.upper()}
     """
 
     try:
-        response = await client.chat.completions.create(
+        response = await get_llm().chat(
             model=os.getenv("GROQ_MODEL"),
             messages=[{"role": "user", "content": prompt}],
             temperature=0.1,
@@ -297,21 +535,109 @@ async def get_ai_recommendation(query, inventory_data):
         )
         return response.choices[0].message.content
     except Exception as e:
-        return f"⚠️ AI Analysis failed: {e}"
+        log.warning("⚠️ AI analysis failed: %s. Using template report.", e)
+        return render_report(query, ai_payload)
+
+
+@timed("get_ai_recommendation", batch=True)
+async def get_ai_recommendations_batch(query_inventories, mode=None):
+    """
+    Batched get_ai_recommendation: {query: aligned data} -> {query: report}.
+    In llm mode several guides are written per request (chunked by payload size);
+    a failed chunk falls back to one call per query.
+    """
+    payloads = {q: build_ai_payload(inv) for q, inv in query_inventories.items()}
+    mode = mode or AI_REPORT_MODE
+
+    if mode != "llm":
+        return {q: render_report(q, p) for q, p in payloads.items()}
+
+    encoded = {q: encode_report_payload(p) for q, p in payloads.items()}
+    chunks = _chunk_by_size(list(encoded.items()), lambda entry: entry[1][1]["tokens"] + 10)
+    chunk_results = await asyncio.gather(*[
+        _llm_report_batch({q: rows for q, (rows, _) in chunk}) for chunk in chunks
+    ])
+
+    reports = {}
+    for chunk, result in zip(chunks, chunk_results):
+        if result is None:
+            log.warning("⚠️ Batched report chunk failed, retrying %d queries one by one", len(chunk))
+            singles = await asyncio.gather(*[_llm_report(q, payloads[q]) for q, _ in chunk])
+            result = {q: report for (q, _), report in zip(chunk, singles)}
+        reports.update(result)
+    return reports
+
+
+async def _llm_report_batch(query_rows):
+    """
+    One LLM call writing the guides for several queries ({query: encoded rows}).
+    Returns {query: report} or None if the call failed / missed a query.
+    """
+    queries = list(query_rows)
+    blocks = "\n".join(f'@{qid} "{q}"\n{query_rows[q]}' for qid, q in enumerate(queries))
+
+    prompt = f"""
+    You are a Smart Shopping Assistant.
+    
+    INPUT DATA ({REPORT_ROWS_LEGEND} '@id "query"' starts a query):
+{blocks}
+    
+    YOUR TASK:
+    For EACH query, convert its rows into a clean Telegram buying guide.
+    Each guide starts with the line: 📊 Best Prices for [QUERY IN CAPITALS]
+    
+    {REPORT_EXAMPLES_PROMPT}
+    OUTPUT JSON FORMAT ONLY:
+    {{
+        "reports": [ {{ "query_id": 0, "text": "📊 Best Prices for ..." }}, ... ]
+    }}
+    """
+
+    try:
+        response = await get_llm().chat(
+            model=os.getenv("GROQ_MODEL"),
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.1,
+            max_tokens=min(8000, 1500 * len(queries)),
+            response_format={"type": "json_object"}
+        )
+
+        result = json.loads(response.choices[0].message.content)
+        by_id = {int(r["query_id"]): r["text"] for r in result.get("reports", [])}
+
+        if set(by_id) != set(range(len(queries))):
+            raise ValueError(f"response covers queries {sorted(by_id)}")
+
+        return {q: by_id[qid] for qid, q in enumerate(queries)}
+
+    except Exception as e:
+        log.warning("⚠️ Batched AI analysis failed: %s", e)
+        return None
 
 # ------------------ 4. PIPELINE ------------------
 
+@profiled("process_item_logic")
 async def process_item_logic(search_query):
     corrected_query = autocorrect_query(search_query)
     search_query = corrected_query
+
+    # 0. Same query, same data since last time? Serve the cached report
+    cache = get_report_cache()
+    versions = await asyncio.to_thread(get_data_versions, [search_query])
+    cache_key, cached = await cache.get(search_query, AI_REPORT_MODE, versions[search_query])
+    if cached is not None:
+        return cached
     
     # 1. Fetch
     all_items = await asyncio.to_thread(get_products_from_db, search_query)
     
     # 2. Scrape if needed
     if not all_items:
-        print(f"⚠️ No data. Scraping '{search_query}'...")
+        log.info("🌍 No data, scraping '%s'", search_query, extra={"query": search_query})
         await fetch_and_store_items([search_query])
+        # The report will be built from the new rows: key it by their version
+        versions = await asyncio.to_thread(get_data_versions, [search_query])
+        cache_key = cache.key(search_query, AI_REPORT_MODE, versions[search_query])
         all_items = await asyncio.to_thread(get_products_from_db, search_query)
     
     if not all_items:
@@ -330,11 +656,198 @@ async def process_item_logic(search_query):
     # 5. Analyze (AI with JSON)
     ai_report = await get_ai_recommendation(search_query, aligned_data)
 
-    return {
+    result = {
         "status": "success",
         "query": search_query,
-        "report": ai_report
+        "report": ai_report,
+        "offers": item_offers(aligned_data)
     }
+    await cache.put(cache_key, search_query, result)
+    return result
+
+async def _finish_queries(query_items, cache, cache_keys):
+    """
+    Batched filter + align + analysis for queries that have DB rows. Returns {query: result}.
+    Reports are cached under cache_keys[query], taken before the rows were read.
+    """
+    filtered = await semantic_filter_batch(query_items)
+
+    aligned = {q: align_products(items) for q, items in filtered.items() if items}
+    reports = await get_ai_recommendations_batch(aligned)
+
+    results = {}
+    for q in query_items:
+        if q not in reports:
+            results[q] = {"status": "error", "query": q, "msg": "No relevant items found after filtering."}
+        else:
+            results[q] = {"status": "success", "query": q, "report": reports[q], "offers": item_offers(aligned[q])}
+            await cache.put(cache_keys[q], q, results[q])
+    return results
+
+@profiled("process_basket_logic")
+async def process_basket_logic(search_queries, on_result=None):
+    """
+    process_item_logic for a whole basket: the LLM filter and summary
+    run as batched calls instead of 2 calls per item.
+    Items already in the DB are analyzed while the missing ones are still
+    being scraped (concurrently), and each scraped item is analyzed as soon
+    as it lands, so the basket takes about as long as its slowest item.
+    `on_result(query, result)` is awaited as each query finishes.
+    Returns one result dict per input query, in input order.
+    """
+    queries = [autocorrect_query(q) for q in search_queries]
+    results = {}
+
+    async def emit(batch):
+        batch = {q: r for q, r in batch.items() if q not in results}   # first answer wins
+        results.update(batch)
+        if on_result is not None:
+            for q, result in batch.items():
+                await on_result(q, result)
+
+    # 0. Cached reports
+    cache = get_report_cache()
+    versions = await asyncio.to_thread(get_data_versions, queries)
+    cache_keys = {}
+    cached = {}
+    for q in dict.fromkeys(queries):
+        cache_keys[q], hit = await cache.get(q, AI_REPORT_MODE, versions[q])
+        if hit is not None:
+            cached[q] = hit
+    await emit(cached)
+    unique = [q for q in dict.fromkeys(queries) if q not in results]
+
+    # 1. Fetch (one DB read for the basket)
+    all_items = await asyncio.to_thread(get_products_for_queries, unique) if unique else {}
+    ready = {q: items for q, items in all_items.items() if items}
+    missing = [q for q in unique if not all_items[q]]
+
+    async def finish(query_items):
+        await emit(await _finish_queries(query_items, cache, cache_keys))
+
+    async def on_scraped(q):
+        # Re-key by the version of the rows just written, read before them
+        version = (await asyncio.to_thread(get_data_versions, [q]))[q]
+        cache_keys[q] = cache.key(q, AI_REPORT_MODE, version)
+        items = (await asyncio.to_thread(get_products_for_queries, [q]))[q]
+        if not items:
+            await emit({q: {"status": "error", "query": q, "msg": "No items found."}})
+            return
+        await finish({q: items})
+
+    # 2. Analyze what we have while scraping the rest. A failing stage (e.g.
+    # the browser can't launch) only costs its own queries an error result;
+    # the other stage still finishes and delivers.
+    stages = []   # (awaitable, queries it answers)
+    if ready:
+        stages.append((finish(ready), list(ready)))
+    if missing:
+        log.info("🌍 No data, scraping %s", missing)
+        stages.append((fetch_and_store_items(missing, on_item_done=on_scraped), missing))
+
+    outcomes = await asyncio.gather(*(stage for stage, _ in stages), return_exceptions=True)
+    for (_, stage_queries), outcome in zip(stages, outcomes):
+        if isinstance(outcome, BaseException):
+            log.warning("⚠️ Basket stage for %s failed: %s", stage_queries, outcome)
+            await emit({
+                q: {"status": "error", "query": q, "msg": "Could not fetch prices right now."}
+                for q in stage_queries
+            })
+
+    return [results[q] for q in queries]
+
+# ------------------ 5. TELEGRAM API ------------------
+
+def format_telegram_message(result):
+    """Turns a pipeline result dict into the Markdown text the bot sends."""
+    if result["status"] == "success":
+        return result["report"]
+    return f"⚠️ *{md_escape(result['query'])}*: {result['msg']}"
+
+
+def basket_plan_message(results):
+    """Cheapest multi-store split (basket_optimizer.py) over the items that have offers."""
+    rows = {
+        q: r["offers"] for q, r in results.items()
+        if r["status"] == "success" and r.get("offers")
+    }
+    if len(rows) < 2:
+        return None
+
+    offers = {q: row["prices"] for q, row in rows.items()}
+    with span("basket_optimize"):
+        plan = optimize_basket(offers)
+    if plan is None:
+        return None
+    return render_basket_plan(plan, rows, cheapest_per_item(offers))
+
+
+async def get_telegram_messages(items, on_message=None, with_plan=BASKET_PLAN):
+    """
+    Formatted comparison messages for a basket, in input order.
+    DB reads, scraping and LLM calls are shared across all items.
+    `on_message(text)` is awaited for each item as soon as it is ready,
+    so callers can reply per item instead of waiting for the whole basket.
+    With `with_plan`, a basket of 2+ items gets one more message at the end:
+    the cheapest way to buy all of it.
+    """
+    items = [i.strip() for i in items if i and i.strip()]
+    if not items:
+        return []
+
+    # Autocorrect can fold two inputs into one query: deliver it once per input
+    positions = {}
+    for pos, item in enumerate(items):
+        positions.setdefault(autocorrect_query(item), []).append(pos)
+    messages = [None] * len(items)
+    results = {}
+
+    async def send(text):
+        if on_message is not None:
+            try:
+                await on_message(text)
+            except Exception as e:
+                # A failed send must not stop the rest of the basket
+                log.warning("⚠️ Delivering message failed: %s", e)
+
+    async def deliver(pos, text):
+        messages[pos] = text
+        await send(text)
+
+    async def on_result(query, result):
+        results[query] = result
+        text = format_telegram_message(result)
+        for pos in positions.get(query, ()):
+            if messages[pos] is None:
+                await deliver(pos, text)
+
+    try:
+        await process_basket_logic(items, on_result=on_result)
+    except Exception as e:
+        log.exception("⚠️ Basket pipeline failed: %s", e)
+
+    # Anything the pipeline never answered (failure mid-way) gets an apology
+    for pos, item in enumerate(items):
+        if messages[pos] is None:
+            await deliver(pos, f"⚠️ Could not analyze *{md_escape(item)}* right now. Please try again.")
+
+    if with_plan and len(positions) > 1:
+        try:
+            plan_text = basket_plan_message(results)
+        except Exception as e:
+            log.exception("⚠️ Basket plan failed: %s", e)
+            plan_text = None
+        if plan_text:
+            messages.append(plan_text)
+            await send(plan_text)
+
+    return messages
+
+
+async def get_telegram_message(item):
+    """Formatted comparison message for a single item."""
+    messages = await get_telegram_messages([item])
+    return messages[0] if messages else "⚠️ Please enter an item name."
 
 # ------------------ MAIN ------------------
 
@@ -342,9 +855,11 @@ async def main():
     user_input = input("Enter items: ")
     items = [x.strip() for x in user_input.split(",") if x.strip()]
     
-    for item in items:
-        print(f"\n🚀 Processing '{item.upper()}'...")
-        res = await process_item_logic(item)
+    with request_context(kind="cli"):
+        results = await process_basket_logic(items)
+
+    for item, res in zip(items, results):
+        print(f"\n🚀 Results for '{item.upper()}'...")
         
         if res['status'] == 'success':
             print(res['report'])
@@ -0,0 +1,160 @@
+import os
+import re
+from collections import defaultdict
+
+# Cross-store product alignment.
+# Items of one weight group are only compared when they share a
+# reasonably rare token or the same brand (blocking), scored with a
+# token-set similarity, and merged greedily from the best pair down,
+# so the result does not depend on the order rows come out of the DB.
+# Items that already carry a canonical_id skip all of that.
+
+STORES = ("blinkit", "zepto", "bigbasket")
+
+ALIGN_THRESHOLD = float(os.getenv("ALIGN_THRESHOLD", "0.5"))
+# Subtracted when each name starts with a word the other lacks ("Amul ..." vs "Tata ...")
+BRAND_MISMATCH_PENALTY = float(os.getenv("ALIGN_BRAND_MISMATCH_PENALTY", "0.2"))
+# Tokens shared by more items than this are too common to block on
+BLOCK_MAX_DF = int(os.getenv("ALIGN_BLOCK_MAX_DF", "64"))
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_NOISE_TOKENS = frozenset({"pack", "of", "the", "and", "with", "x", "g", "gm", "kg", "ml", "l", "pc", "pcs"})
+
+
+def name_tokens(name):
+    tokens = _TOKEN_RE.findall(name.lower())
+    meaningful = frozenset(t for t in tokens if t not in _NOISE_TOKENS)
+    return meaningful or frozenset(tokens)
+
+
+def brand_key(name):
+    tokens = _TOKEN_RE.findall(name.lower())
+    return tokens[0] if tokens else ""
+
+
+def token_set_similarity(a, b):
+    """Dice coefficient of two token sets (0..1)."""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def pair_score(tokens_a, tokens_b, brand_a, brand_b):
+    score = token_set_similarity(tokens_a, tokens_b)
+    if brand_a != brand_b and brand_a not in tokens_b and brand_b not in tokens_a:
+        score -= BRAND_MISMATCH_PENALTY
+    return score
+
+
+def candidate_pairs(token_sets, brands):
+    """
+    Blocks items by rare tokens and brand; returns the set of (i, j) pairs, i < j,
+    that share at least one block.
+    """
+    postings = defaultdict(list)
+    for i, tokens in enumerate(token_sets):
+        for t in tokens:
+            postings[("t", t)].append(i)
+        if brands[i]:
+            postings[("b", brands[i])].append(i)
+
+    pairs = set()
+    for i, tokens in enumerate(token_sets):
+        keys = [("t", t) for t in tokens]
+        if brands[i]:
+            keys.append(("b", brands[i]))
+
+        usable = [k for k in keys if len(postings[k]) <= BLOCK_MAX_DF]
+        if not usable and keys:
+            # Only common tokens: still block on the rarest one
+            usable = [min(keys, key=lambda k: (len(postings[k]), k))]
+
+        for key in usable:
+            for j in postings[key]:
+                if j > i:
+                    pairs.add((i, j))
+    return pairs
+
+
+def _cluster_group(items):
+    # Canonical order first, so merges never depend on input order
+    items = sorted(items, key=lambda it: (it["name"].lower(), it["source"], it["price"]))
+    token_sets = [name_tokens(it["name"]) for it in items]
+    brands = [brand_key(it["name"]) for it in items]
+
+    scored = []
+    for i, j in candidate_pairs(token_sets, brands):
+        score = pair_score(token_sets[i], token_sets[j], brands[i], brands[j])
+        if score > ALIGN_THRESHOLD:
+            scored.append((-score, i, j))
+    scored.sort()
+
+    # Union-find, refusing merges that would put two listings of one store in a row
+    parent = list(range(len(items)))
+    stores = [{it["source"]} for it in items]
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for _, i, j in scored:
+        ri, rj = find(i), find(j)
+        if ri == rj or stores[ri] & stores[rj]:
+            continue
+        if rj < ri:
+            ri, rj = rj, ri
+        parent[rj] = ri
+        stores[ri] |= stores[rj]
+
+    clusters = defaultdict(list)
+    for i in range(len(items)):
+        clusters[find(i)].append(items[i])
+
+    return [clusters[root] for root in sorted(clusters)]
+
+
+def cluster_to_row(cluster, canonical_id=None):
+    # "name" is the merged (longest) name; "names" keeps the listing each store sells
+    row = {"name": max((it["name"] for it in cluster), key=lambda n: (len(n), n))}
+    for store in STORES:
+        row[store] = None
+    names = {}
+    for it in cluster:
+        if row[it["source"]] is None or it["price"] < row[it["source"]]:
+            row[it["source"]] = it["price"]
+            names[it["source"]] = it["name"]
+    row["names"] = names
+    row["canonical_id"] = canonical_id
+    return row
+
+
+def _align_group(items):
+    # Listings with a persisted canonical id (product_identity.py) are a plain group-by;
+    # only the rest go through fuzzy clustering.
+    by_id = {}
+    unmatched = []
+    for it in items:
+        cid = it.get("canonical_id")
+        if cid is None:
+            unmatched.append(it)
+        else:
+            by_id.setdefault(cid, []).append(it)
+
+    rows = [cluster_to_row(by_id[cid], cid) for cid in sorted(by_id)]
+    rows.extend(cluster_to_row(c) for c in _cluster_group(unmatched))
+    return rows
+
+
+def align_items(all_items):
+    """
+    Groups items by weight, then aligns the same product across stores.
+    Returns {weight: [{"name", "blinkit", "zepto", "bigbasket", "names", "canonical_id"}, ...]}
+    where "names" maps each store to the name of its cheapest listing in the row.
+    """
+    by_weight = {}
+    for item in all_items:
+        by_weight.setdefault(item["weight"], []).append(item)
+
+    return {weight: _align_group(items) for weight, items in by_weight.items()}
@@ -0,0 +1,315 @@
+import itertools
+import json
+import os
+
+# Cheapest way to buy a whole basket across stores.
+# Input: {item: {store: price}} (see item_offers for how one query's aligned
+# inventory becomes a row). Each store used charges its delivery fee unless
+# its subtotal reaches free_delivery_above, and an order below min_order is
+# not allowed. At most max_stores stores may be used.
+#   - optimize_exact: branch-and-bound over item -> store assignments
+#   - optimize_heuristic: per store subset, cheapest assignment + local moves
+# optimize_basket runs exact (seeded by the heuristic) up to BASKET_EXACT_MAX_ITEMS.
+# benchmarks/bench_basket.py compares both on synthetic baskets.
+
+DEFAULT_STORE_POLICIES = {
+    "blinkit": {"delivery_fee": 30, "free_delivery_above": 199, "min_order": 0},
+    "zepto": {"delivery_fee": 30, "free_delivery_above": 199, "min_order": 0},
+    "bigbasket": {"delivery_fee": 40, "free_delivery_above": 299, "min_order": 100},
+}
+# JSON object overriding the defaults, e.g. {"zepto": {"delivery_fee": 25}}
+STORE_POLICIES_JSON = os.getenv("STORE_POLICIES_JSON", "")
+BASKET_MAX_STORES = int(os.getenv("BASKET_MAX_STORES", "2"))
+BASKET_EXACT_MAX_ITEMS = int(os.getenv("BASKET_EXACT_MAX_ITEMS", "40"))
+# Search nodes per store subset before branch-and-bound settles for the best found so far
+BASKET_EXACT_MAX_NODES = int(os.getenv("BASKET_EXACT_MAX_NODES", "200000"))
+
+INF = float("inf")
+
+
+def load_store_policies(raw=STORE_POLICIES_JSON):
+    policies = {store: dict(p) for store, p in DEFAULT_STORE_POLICIES.items()}
+    for store, override in (json.loads(raw) if raw else {}).items():
+        policies.setdefault(store, {"delivery_fee": 0, "free_delivery_above": None, "min_order": 0})
+        policies[store].update(override)
+    return policies
+
+
+def delivery_fee(policy, subtotal):
+    free_above = policy.get("free_delivery_above")
+    if free_above is not None and subtotal >= free_above:
+        return 0
+    return policy.get("delivery_fee", 0)
+
+
+def store_cost(policy, subtotal):
+    """Fee for one store's order, or INF when it is below the minimum order."""
+    if subtotal < policy.get("min_order", 0):
+        return INF
+    return delivery_fee(policy, subtotal)
+
+
+# ------------------ INPUT ------------------
+
+def item_offers(inventory_data):
+    """
+    One basket row from a query's aligned inventory ({size: [row, ...]}):
+    the size group sold by the most stores (ties: cheapest), and each store's
+    lowest price in it. Returns {"size", "prices": {store: price}, "names": {store: name}}.
+    """
+    best = None
+    for size, products in inventory_data.items():
+        prices, names = {}, {}
+        for p in products:
+            for store, price in p.items():
+                if store in ("name", "names", "canonical_id") or price is None:
+                    continue
+                if store not in prices or price < prices[store]:
+                    prices[store] = price
+                    # The listing this store sells, not the row's merged name
+                    names[store] = p.get("names", {}).get(store, p["name"])
+        if not prices:
+            continue
+        key = (-len(prices), min(prices.values()))
+        if best is None or key < best[0]:
+            best = (key, {"size": size, "prices": prices, "names": names})
+    return best[1] if best else None
+
+
+# ------------------ EVALUATION ------------------
+
+def evaluate(assignment, offers, policies):
+    """
+    Total cost of an {item: store} assignment.
+    Returns (total, items_total, {store: subtotal}, {store: fee}).
+    """
+    subtotals = {}
+    for item, store in assignment.items():
+        subtotals[store] = subtotals.get(store, 0) + offers[item][store]
+    fees = {store: store_cost(policies.get(store, {}), sub) for store, sub in subtotals.items()}
+    items_total = sum(subtotals.values())
+    return items_total + sum(fees.values()), items_total, subtotals, fees
+
+
+def _split(offers):
+    available = {item: prices for item, prices in offers.items() if prices}
+    unavailable = [item for item, prices in offers.items() if not prices]
+    return available, unavailable
+
+
+def _store_subsets(available, max_stores):
+    """
+    Store sets of size <= max_stores that cover the most items (a basket may
+    hold items no allowed combination sells; those end up "unavailable").
+    Returns [(stores, {item: {store: price}} restricted to them)].
+    """
+    stores = sorted({s for prices in available.values() for s in prices})
+    subsets = []
+    for k in range(1, min(max_stores, len(stores)) + 1):
+        for subset in itertools.combinations(stores, k):
+            restricted = {}
+            for item, prices in available.items():
+                sold = {s: prices[s] for s in subset if s in prices}
+                if sold:
+                    restricted[item] = sold
+            subsets.append((subset, restricted))
+
+    most = max((len(r) for _, r in subsets), default=0)
+    return [(subset, r) for subset, r in subsets if len(r) == most]
+
+
+def _plan(assignment, offers, policies, method, unavailable):
+    total, items_total, subtotals, fees = evaluate(assignment, offers, policies)
+    stores = {
+        store: {
+            "items": sorted((item, offers[item][store]) for item, s in assignment.items() if s == store),
+            "subtotal": subtotals[store],
+            "delivery_fee": fees[store],
+        }
+        for store in sorted(subtotals)
+    }
+    return {
+        "total": total,
+        "items_total": items_total,
+        "fees": sum(fees.values()),
+        "stores": stores,
+        "assignment": assignment,
+        "unavailable": unavailable,
+        "method": method,
+    }
+
+
+def _best_plan(candidates, available, policies, method, unavailable):
+    """Cheapest feasible (cost, assignment) of the candidates as a plan, or None."""
+    feasible = [(cost, a) for cost, a in candidates if a is not None and cost < INF]
+    if not feasible:
+        return None
+    cost, assignment = min(feasible, key=lambda c: c[0])
+    missing = [item for item in available if item not in assignment]
+    return _plan(assignment, available, policies, method, unavailable + missing)
+
+
+# ------------------ HEURISTIC ------------------
+
+def _improve(assignment, offers, policies):
+    """First-improvement local search: move one item to another store that sells it."""
+    best = evaluate(assignment, offers, policies)[0]
+    improved = True
+    while improved:
+        improved = False
+        for item in list(assignment):
+            current = assignment[item]
+            for store in offers[item]:
+                if store == current:
+                    continue
+                assignment[item] = store
+                cost = evaluate(assignment, offers, policies)[0]
+                if cost < best:
+                    best, current, improved = cost, store, True
+                else:
+                    assignment[item] = current
+    return assignment, best
+
+
+def _heuristic_candidates(available, policies, max_stores):
+    for _, restricted in _store_subsets(available, max_stores):
+        assignment = {
+            item: min(prices, key=lambda s: (prices[s], s))
+            for item, prices in restricted.items()
+        }
+        assignment, cost = _improve(assignment, restricted, policies)
+        yield cost, assignment
+
+
+def optimize_heuristic(offers, policies=None, max_stores=BASKET_MAX_STORES):
+    """
+    For every store subset of size <= max_stores with the best coverage:
+    cheapest store per item, then single-item moves while the total drops
+    (this is what fixes minimum orders and reaches free-delivery thresholds).
+    """
+    policies = policies if policies is not None else load_store_policies()
+    available, unavailable = _split(offers)
+    candidates = list(_heuristic_candidates(available, policies, max_stores))
+    if not available:
+        return _plan({}, offers, policies, "heuristic", unavailable)
+    return _best_plan(candidates, available, policies, "heuristic", unavailable)
+
+
+# ------------------ EXACT ------------------
+
+def _branch_and_bound(offers, policies, best_cost, max_nodes=BASKET_EXACT_MAX_NODES):
+    """
+    Cheapest assignment of every item in `offers` (already restricted to one
+    store subset) cheaper than best_cost.
+    Returns (cost, assignment or None, proven): proven is False when the node
+    budget ran out and the result is only the best found.
+    """
+    # Items with the widest price spread first: their choice matters most
+    items = sorted(offers, key=lambda i: (-(max(offers[i].values()) - min(offers[i].values())), i))
+    choices = [sorted(offers[i].items(), key=lambda sp: (sp[1], sp[0])) for i in items]
+    # Cheapest / dearest the remaining items can still add (for the bounds)
+    min_rest = [0.0] * (len(items) + 1)
+    max_rest = [0.0] * (len(items) + 1)
+    for k in range(len(items) - 1, -1, -1):
+        min_rest[k] = min_rest[k + 1] + choices[k][0][1]
+        max_rest[k] = max_rest[k + 1] + choices[k][-1][1]
+
+    best = {"cost": best_cost, "assignment": None, "nodes": 0}
+    subtotals = {}
+    counts = {}    # items currently assigned per store
+    picked = [None] * len(items)
+
+    def fee_floor(k):
+        # Fees no remaining item can waive any more
+        floor = 0.0
+        for store, sub in subtotals.items():
+            policy = policies.get(store, {})
+            free_above = policy.get("free_delivery_above")
+            if free_above is None or sub + max_rest[k] < free_above:
+                floor += policy.get("delivery_fee", 0)
+        return floor
+
+    def search(k, cost):
+        best["nodes"] += 1
+        if best["nodes"] > max_nodes or cost + min_rest[k] + fee_floor(k) >= best["cost"]:
+            return
+        if k == len(items):
+            total = cost + sum(store_cost(policies.get(s, {}), sub) for s, sub in subtotals.items())
+            if total < best["cost"]:
+                best["cost"] = total
+                best["assignment"] = dict(zip(items, picked))
+            return
+
+        for store, price in choices[k]:
+            subtotals[store] = subtotals.get(store, 0) + price
+            counts[store] = counts.get(store, 0) + 1
+            picked[k] = store
+            search(k + 1, cost + price)
+            counts[store] -= 1
+            if counts[store]:
+                subtotals[store] -= price
+            else:
+                del subtotals[store], counts[store]
+
+    search(0, 0.0)
+    return best["cost"], best["assignment"], best["nodes"] <= max_nodes
+
+
+def optimize_exact(offers, policies=None, max_stores=BASKET_MAX_STORES, incumbent=None,
+                   max_nodes=BASKET_EXACT_MAX_NODES):
+    """
+    Branch-and-bound over item -> store assignments, per store subset of the
+    largest allowed size with the best coverage (smaller subsets are searched
+    implicitly). The bound is the cost so far plus each remaining item's
+    cheapest price plus fees that can no longer be waived. Exponential in
+    the worst case, so each subset gets max_nodes search nodes; past that the
+    plan's method is "bounded" (best found, never worse than `incumbent`,
+    e.g. the heuristic plan, which also seeds the bound).
+    """
+    policies = policies if policies is not None else load_store_policies()
+    available, unavailable = _split(offers)
+    if not available:
+        return _plan({}, offers, policies, "exact", unavailable)
+
+    subsets = _store_subsets(available, max_stores)
+    size = max(len(subset) for subset, _ in subsets)
+    covered = len(subsets[0][1])
+
+    best_cost, best_assignment = INF, None
+    if incumbent is not None and len(incumbent["assignment"]) == covered:
+        best_cost, best_assignment = incumbent["total"], dict(incumbent["assignment"])
+
+    proven = True
+    for subset, restricted in subsets:
+        if len(subset) != size:
+            continue
+        cost, assignment, complete = _branch_and_bound(restricted, policies, best_cost, max_nodes)
+        proven = proven and complete
+        if assignment is not None:
+            best_cost, best_assignment = cost, assignment
+
+    method = "exact" if proven else "bounded"
+    return _best_plan([(best_cost, best_assignment)], available, policies, method, unavailable)
+
+
+# ------------------ ENTRY POINT ------------------
+
+def cheapest_per_item(offers, policies=None):
+    """What the per-item report suggests today: every item at its cheapest store."""
+    policies = policies if policies is not None else load_store_policies()
+    available, unavailable = _split(offers)
+    assignment = {item: min(prices, key=lambda s: (prices[s], s)) for item, prices in available.items()}
+    return _plan(assignment, available, policies, "per-item", unavailable)
+
+
+def optimize_basket(offers, policies=None, max_stores=BASKET_MAX_STORES, exact_max_items=BASKET_EXACT_MAX_ITEMS):
+    """
+    Cheapest feasible split of the basket ({item: {store: price}}).
+    Returns a plan dict ({"total", "items_total", "fees", "stores", "assignment",
+    "unavailable", "method"}) or None when no split satisfies the store rules.
+    """
+    policies = policies if policies is not None else load_store_policies()
+    heuristic = optimize_heuristic(offers, policies, max_stores)
+    if len(offers) > exact_max_items:
+        return heuristic
+    return optimize_exact(offers, policies, max_stores, incumbent=heuristic)
@@ -0,0 +1,84 @@
+import argparse
+import random
+import time
+from difflib import SequenceMatcher
+
+from Backend.alignment import align_items
+from Backend.benchmarks.synthetic import make_listings
+
+# Compares the blocked alignment against the original pairwise
+# SequenceMatcher loop on synthetic catalogs.
+#   python -m Backend.benchmarks.bench_align --sizes 100,1000,5000
+
+
+def legacy_align_products(all_items):
+    """The pre-blocking implementation (O(n^2) per weight group, order dependent)."""
+    def similar(a, b):
+        return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+
+    grouped_by_weight = {}
+    for item in all_items:
+        w = item['weight']
+        if w not in grouped_by_weight:
+            grouped_by_weight[w] = []
+
+        found_match = False
+        for row in grouped_by_weight[w]:
+            if similar(row['name'], item['name']) > 0.5:
+                row[item['source']] = item['price']
+                if len(item['name']) > len(row['name']):
+                    row['name'] = item['name']
+                found_match = True
+                break
+
+        if not found_match:
+            new_row = {"name": item['name'], "blinkit": None, "zepto": None, "bigbasket": None}
+            new_row[item['source']] = item['price']
+            grouped_by_weight[w].append(new_row)
+
+    return grouped_by_weight
+
+
+def _timed(fn, items, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(items)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _canonical(result):
+    return sorted(
+        (w, tuple(sorted((r["name"], r["blinkit"] or 0, r["zepto"] or 0, r["bigbasket"] or 0) for r in rows)))
+        for w, rows in result.items()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="align_products benchmark")
+    parser.add_argument("--sizes", default="100,1000,3000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--legacy-max", type=int, default=3000, help="skip the legacy run above this size")
+    args = parser.parse_args()
+
+    print(f"{'items':>8} {'rows':>6} {'blocked':>10} {'legacy':>10} {'speedup':>8} {'order-stable':>12}")
+    for n in (int(x) for x in args.sizes.split(",")):
+        items = make_listings(n)
+        new_time, new_result = _timed(align_items, items, args.repeat)
+
+        shuffled = list(items)
+        random.Random(1).shuffle(shuffled)
+        stable = _canonical(align_items(shuffled)) == _canonical(new_result)
+
+        rows = sum(len(r) for r in new_result.values())
+        if n <= args.legacy_max:
+            old_time, _ = _timed(legacy_align_products, items, 1)
+            print(f"{n:>8} {rows:>6} {new_time * 1000:>8.1f}ms {old_time * 1000:>8.1f}ms "
+                  f"{old_time / new_time:>7.1f}x {str(stable):>12}")
+        else:
+            print(f"{n:>8} {rows:>6} {new_time * 1000:>8.1f}ms {'-':>10} {'-':>8} {str(stable):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import random
+import time
+
+from Backend.basket_optimizer import (
+    cheapest_per_item,
+    load_store_policies,
+    optimize_exact,
+    optimize_heuristic,
+)
+from Backend.benchmarks.synthetic import SOURCES
+
+# Basket optimizer benchmark on synthetic baskets: time and total cost of the
+# exact branch-and-bound vs the heuristic, against "cheapest store per item".
+#   python -m Backend.benchmarks.bench_basket --sizes 5,10,15,25,50,100 --max-stores 2
+
+
+def make_basket(n, seed=7, availability=0.85):
+    """{item: {store: price}}: a base price per item, each store within ±20% of it."""
+    rng = random.Random(seed * 1000 + n)
+    offers = {}
+    for i in range(n):
+        base = rng.choice((20, 35, 50, 60, 80, 120, 180, 250))
+        prices = {
+            store: round(base * rng.uniform(0.8, 1.2))
+            for store in SOURCES if rng.random() < availability
+        }
+        offers[f"item{i:03d}"] = prices or {rng.choice(SOURCES): base}
+    return offers
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="basket optimizer benchmark")
+    parser.add_argument("--sizes", default="5,10,15,25,50,100", help="items per basket")
+    parser.add_argument("--seeds", type=int, default=5, help="baskets per size")
+    parser.add_argument("--max-stores", type=int, default=2)
+    parser.add_argument("--exact-max", type=int, default=100, help="skip exact above this many items")
+    args = parser.parse_args()
+
+    policies = load_store_policies()
+    print(f"{'items':>6} {'per-item ₹':>11} {'heur ₹':>9} {'exact ₹':>9} {'heur gap':>9} "
+          f"{'heur ms':>9} {'exact ms':>9} {'proven':>7}")
+
+    for n in (int(x) for x in args.sizes.split(",")):
+        per_item, per_item_ok = 0.0, 0
+        heur = exact = 0.0
+        t_heur = t_exact = 0.0
+        proven = 0
+        run_exact = n <= args.exact_max
+
+        for seed in range(args.seeds):
+            offers = make_basket(n, seed)
+            baseline = cheapest_per_item(offers, policies)
+            if baseline["total"] < float("inf"):
+                per_item += baseline["total"]
+                per_item_ok += 1
+
+            dt, plan_h = _timed(optimize_heuristic, offers, policies, args.max_stores)
+            t_heur += dt
+            heur += plan_h["total"]
+
+            if run_exact:
+                dt, plan_e = _timed(optimize_exact, offers, policies, args.max_stores, plan_h)
+                t_exact += dt
+                exact += plan_e["total"]
+                proven += plan_e["method"] == "exact"
+
+        k = args.seeds
+        per_item_col = f"{per_item / per_item_ok:>9.1f}" if per_item_ok else f"{'-':>9}"
+        per_item_col += "*" if per_item_ok < k else " "
+        if run_exact:
+            cols = (f"{exact / k:>9.1f} {(heur - exact) / exact * 100:>8.2f}% "
+                    f"{t_heur / k * 1000:>9.2f} {t_exact / k * 1000:>9.2f} {proven:>4}/{k}")
+        else:
+            cols = f"{'-':>9} {'-':>9} {t_heur / k * 1000:>9.2f} {'-':>9} {'-':>7}"
+        print(f"{n:>6} {per_item_col:>11} {heur / k:>9.1f} {cols}")
+
+    print("\nper-item = every item at its cheapest store with no store limit (fees included);"
+          "\n* = some baskets infeasible that way (below a minimum order), averaged over the rest")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+from Backend.alignment import align_items
+from Backend.benchmarks.synthetic import make_catalog
+from Backend.data_cleaner import autocorrect_query, clean_price, keyword_filter, normalize_weight
+from Backend.db_ingest import extract_brand, parse_quantity
+from Backend.log import setup_logging
+from Backend.vocabulary import get_vocabulary
+
+# Micro-benchmarks for the CPU-bound cleaning helpers on synthetic catalogs,
+# with stored baselines to catch slowdowns:
+#   python -m Backend.benchmarks.bench_cleaning                       # compare with the baseline
+#   python -m Backend.benchmarks.bench_cleaning --save                # record a new baseline
+#   python -m Backend.benchmarks.bench_cleaning --sizes 1000 --cases parse_quantity,clean_price
+# Per-row helpers run over every row; autocorrect_query runs once per
+# search-result page (one user query), keyword_filter and align_products
+# once per page on that page's rows, as in the pipeline.
+# Every run is timed right after a fixed calibration loop and the gate compares
+# the median of (run / calibration) over --repeat runs, so a slower or busier
+# machine does not read as a regression; raw ns/op are printed alongside.
+# Exits with status 1 when a case is slower than its baseline by more than
+# --tolerance plus its measured run-to-run spread, on a second measurement too.
+
+DEFAULT_SIZES = "1000,100000,1000000"
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "cleaning.json")
+
+
+def _pages(rows):
+    return [list(g) for _, g in itertools.groupby(rows, key=lambda r: r["page"])]
+
+
+def _user_queries(pages, seed=7):
+    """One query per page: mostly known words, some typos, some words outside the vocabulary."""
+    rng = random.Random(seed)
+    known = sorted(get_vocabulary().synonyms)
+    queries = []
+    for page in pages:
+        roll = rng.random()
+        word = page[0]["query"] if roll < 0.3 else rng.choice(known)
+        if 0.6 <= roll < 0.85 and len(word) > 3:
+            i = rng.randrange(1, len(word) - 1)
+            word = word[:i] + word[i + 1:] if rng.random() < 0.5 else word[:i] + word[i] + word[i:]
+        elif roll >= 0.85:
+            word = rng.choice(("quinoa flakes", "kombucha", "matcha", "sriracha", "tahini"))
+        queries.append(word)
+    return queries
+
+
+def _size_pairs(rows):
+    pairs = []
+    for r in rows:
+        val, unit = parse_quantity(r["raw_qty"])
+        pairs.append((float(val) if val else 0, str(unit).lower() if unit else "unit"))
+    return pairs
+
+
+# name -> (prepare(rows) -> (data, ops), run(data))
+CASES = {
+    "parse_quantity": (
+        lambda rows: ([r["raw_qty"] for r in rows], len(rows)),
+        lambda data: [parse_quantity(q) for q in data],
+    ),
+    "extract_brand": (
+        lambda rows: ([r["name"] for r in rows], len(rows)),
+        lambda data: [extract_brand(n) for n in data],
+    ),
+    "normalize_weight": (
+        lambda rows: (_size_pairs(rows), len(rows)),
+        lambda data: [normalize_weight(v, u) for v, u in data],
+    ),
+    "clean_price": (
+        lambda rows: ([r["price_text"] for r in rows], len(rows)),
+        lambda data: [clean_price(t) for t in data],
+    ),
+    "autocorrect_query": (
+        lambda rows: (lambda qs: (qs, len(qs)))(_user_queries(_pages(rows))),
+        lambda data: [autocorrect_query(q) for q in data],
+    ),
+    "keyword_filter": (
+        lambda rows: ([(p, p[0]["query"]) for p in _pages(rows)], len(rows)),
+        lambda data: [keyword_filter(p, q) for p, q in data],
+    ),
+    "align_products": (
+        lambda rows: (_pages(rows), len(rows)),
+        lambda data: [align_items(p) for p in data],
+    ),
+}
+
+
+# Fixed pure-Python loop timed right before every measured run: machine speed
+# drift (CPU steal, frequency scaling, other load) slows both alike
+CALIBRATION_ITERATIONS = 50_000
+
+
+def _calibration_loop(n):
+    total = 0
+    for i in range(n):
+        total += len(str(i)) * (i & 7)
+    return total
+
+
+def _calibration_seconds():
+    """Seconds per iteration of the calibration loop, right now."""
+    start = time.perf_counter()
+    _calibration_loop(CALIBRATION_ITERATIONS)
+    return (time.perf_counter() - start) / CALIBRATION_ITERATIONS
+
+
+def measure(run, data, repeat, min_time=0.2):
+    """
+    Times `run(data)` --repeat times, each right after a calibration loop.
+    Returns (median seconds per run, median of those runs in calibration-loop
+    iterations, relative spread of the latter); fast runs are looped until
+    they take min_time.
+    """
+    start = time.perf_counter()
+    run(data)
+    once = time.perf_counter() - start
+    loops = max(1, int(min_time / once) + 1) if once < min_time else 1
+
+    timings, relative = [], []
+    for _ in range(max(1, repeat)):
+        calibration = _calibration_seconds()
+        start = time.perf_counter()
+        for _ in range(loops):
+            run(data)
+        seconds = (time.perf_counter() - start) / loops
+        timings.append(seconds)
+        relative.append(seconds / calibration)
+    rel = statistics.median(relative)
+    return statistics.median(timings), rel, (max(relative) - min(relative)) / rel
+
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path, results, relative, merge_into=None):
+    """
+    Writes {case: {size: ns per op}} and the same in calibration-loop iterations
+    per op (what the gate compares); sizes/cases not run this time are kept from merge_into.
+    """
+    stored = {}
+    for section, new in (("results", results), ("relative", relative)):
+        merged = {case: dict(sizes) for case, sizes in ((merge_into or {}).get(section) or {}).items()}
+        for case, sizes in new.items():
+            merged.setdefault(case, {}).update(sizes)
+        stored[section] = merged
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"machine": machine_info(), **stored}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="cleaning helpers micro-benchmarks")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="catalog rows")
+    parser.add_argument("--cases", default=",".join(CASES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="store these timings as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown vs the baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)} (known: {', '.join(CASES)})")
+
+    baseline = load_baseline(args.baseline)
+    # Baselines from before the calibration only have absolute timings
+    reference = (baseline or {}).get("relative", {})
+    if baseline and baseline.get("machine") != machine_info():
+        print(f"⚠️ Baseline was recorded on {baseline.get('machine')}; comparisons are indicative only.")
+
+    # Timed with INFO logs off, as under load
+    setup_logging(level="WARNING")
+
+    results, relative = {}, {}
+    regressions = []
+    # rel = calibration-loop iterations per op
+    print(f"{'case':<18} {'rows':>9} {'ops':>9} {'per run':>11} {'ns/op':>10} {'rel':>9} {'baseline':>9} {'change':>8}")
+
+    for n in (int(x) for x in args.sizes.split(",")):
+        rows = make_catalog(n)
+        for case in cases:
+            prepare, run = CASES[case]
+            data, ops = prepare(rows)
+            seconds, rel, spread = measure(run, data, args.repeat)
+            base = reference.get(case, {}).get(str(n))
+            if base and rel / max(ops, 1) / base - 1 > args.tolerance + spread:
+                # Looks slower: measure again before calling it a regression
+                again = measure(run, data, args.repeat)
+                if again[1] < rel:
+                    seconds, rel, spread = again
+
+            ns_per_op = seconds / max(ops, 1) * 1e9
+            rel_per_op = rel / max(ops, 1)
+            results.setdefault(case, {})[str(n)] = round(ns_per_op, 1)
+            relative.setdefault(case, {})[str(n)] = round(rel_per_op, 4)
+
+            if base:
+                change = rel_per_op / base - 1
+                change_col = f"{change * 100:>+7.1f}%"
+                if change > args.tolerance + spread:
+                    regressions.append((case, n, change))
+                    change_col += " ❌"
+                base_col = f"{base:>9.3f}"
+            else:
+                base_col, change_col = f"{'-':>9}", f"{'-':>8}"
+
+            print(f"{case:<18} {n:>9} {ops:>9} {seconds * 1000:>9.2f}ms {ns_per_op:>10.1f} "
+                  f"{rel_per_op:>9.3f} {base_col} {change_col}")
+        del rows
+
+    if args.save:
+        save_baseline(args.baseline, results, relative, merge_into=baseline)
+        print(f"\n💾 Baseline written to {args.baseline}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%} + run-to-run spread:")
+        for case, n, change in regressions:
+            print(f"   {case} @ {n} rows: {change:+.1%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+
+# Import-time benchmark: each target module is imported in fresh
+# interpreters under `python -X importtime`, so the numbers are what a bot
+# restart or a one-shot CLI run pays before doing any work:
+#   python -m Backend.benchmarks.bench_import                  # compare with the baseline
+#   python -m Backend.benchmarks.bench_import --save           # record a new baseline
+#   python -m Backend.benchmarks.bench_import --targets bot --top 10
+# Heavy dependencies should stay out of these imports (they are loaded on
+# first use or by the warm-up hooks, see ai_reco.warm_up).
+# Exits with status 1 when a target is slower than its baseline by more than --tolerance.
+
+TARGETS = {
+    "bot": "Backend.telegram_bot.bot",
+    "handlers": "Backend.telegram_bot.handlers",
+    "pipeline": "Backend.ai_reco",
+    "ingest": "Backend.db_ingest",
+}
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "imports.json")
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def import_times(module):
+    """[(module, self us, cumulative us, depth)] for one fresh `import module`, in -X importtime order."""
+    env = dict(os.environ, LOG_LEVEL="WARNING")
+    env.setdefault("TELEGRAM_BOT_TOKEN", "0:bench")   # bot.py refuses to import without one
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+
+def subtree(rows, module):
+    """The target's own line and everything it imported (interpreter startup left out)."""
+    end = max(i for i, row in enumerate(rows) if row[0] == module and row[3] == 0)
+    start = end
+    while start > 0 and rows[start - 1][3] > 0:
+        start -= 1
+    return rows[start:end + 1]
+
+
+def heaviest(rows, top):
+    """Top-level packages and Backend modules imported by the target, by cumulative ms."""
+    picked = [
+        (name, cumulative / 1000) for name, _, cumulative, _ in rows[:-1]
+        if "." not in name and name != "Backend" or name.startswith("Backend.")
+    ]
+    return sorted(picked, key=lambda r: -r[1])[:top]
+
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path, results, merge_into=None):
+    """Writes {target: ms}; targets not run this time are kept from merge_into."""
+    merged = dict((merge_into or {}).get("results") or {})
+    merged.update(results)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"machine": machine_info(), "results": merged}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="import-time benchmark")
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per target")
+    parser.add_argument("--top", type=int, default=5, help="heaviest imports listed per target")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="store these timings as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed slowdown vs the baseline (0.5 = 50%%)")
+    args = parser.parse_args()
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = [t for t in targets if t not in TARGETS]
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(unknown)} (known: {', '.join(TARGETS)})")
+
+    baseline = load_baseline(args.baseline)
+    reference = (baseline or {}).get("results", {})
+    if baseline and baseline.get("machine") != machine_info():
+        print(f"⚠️ Baseline was recorded on {baseline.get('machine')}; comparisons are indicative only.")
+
+    results = {}
+    regressions = []
+    print(f"{'target':<10} {'module':<30} {'median':>9} {'min':>9} {'baseline':>10} {'change':>8}")
+
+    for target in targets:
+        module = TARGETS[target]
+        runs = [subtree(import_times(module), module) for _ in range(max(1, args.repeat))]
+        totals = [run[-1][2] / 1000 for run in runs]
+        median = statistics.median(totals)
+        results[target] = round(median, 1)
+
+        base = reference.get(target)
+        if base:
+            change = median / base - 1
+            change_col = f"{change * 100:>+7.1f}%"
+            if change > args.tolerance:
+                regressions.append((target, change))
+                change_col += " ❌"
+            base_col = f"{base:>8.1f}ms"
+        else:
+            base_col, change_col = f"{'-':>10}", f"{'-':>8}"
+
+        print(f"{target:<10} {module:<30} {median:>7.1f}ms {min(totals):>7.1f}ms {base_col} {change_col}")
+        # Breakdown from the fastest run (least noise)
+        fastest = runs[totals.index(min(totals))]
+        for name, ms in heaviest(fastest, args.top):
+            print(f"{'':<10}   {name:<28} {ms:>7.1f}ms")
+
+    if args.save:
+        save_baseline(args.baseline, results, merge_into=baseline)
+        print(f"\n💾 Baseline written to {args.baseline}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for target, change in regressions:
+            print(f"   {target}: {change:+.1%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import time
+
+from Backend.alignment import align_items
+from Backend.benchmarks.synthetic import make_listings
+from Backend.offers import build_ai_payload_columnar, build_ai_payload_rows
+from Backend.report_renderer import store_name
+
+# Offer aggregation micro-benchmark: the original nested-dict loop vs the
+# row-wise and pandas implementations in offers.py (outputs must match).
+#   python -m Backend.benchmarks.bench_offers --sizes 30,300,3000,30000
+
+
+def legacy_build_ai_payload(inventory_data):
+    """The original loop from get_ai_recommendation."""
+    ai_payload = []
+    for weight, products in inventory_data.items():
+        all_options = []
+        for p in products:
+            for store in ['blinkit', 'zepto', 'bigbasket']:
+                if p[store] is not None:
+                    all_options.append({
+                        "store": store,
+                        "price": p[store],
+                        "product_name": p['name'],
+                        "is_brand": any(x in p['name'].lower() for x in ["amul", "nandini", "heritage", "tata", "nestle", "fortune", "organic", "premium"])
+                    })
+        if not all_options: continue
+
+        all_options.sort(key=lambda x: x['price'])
+        winner = all_options[0]
+        other_options = all_options[1:]
+
+        competitor_best_prices = {}
+        for opt in other_options:
+            store = opt['store']
+            price = opt['price']
+            if store == winner['store']:
+                continue
+            if store not in competitor_best_prices or price < competitor_best_prices[store]:
+                competitor_best_prices[store] = price
+
+        savings_parts = []
+        if competitor_best_prices:
+            for store, price in competitor_best_prices.items():
+                diff = int(price - winner['price'])
+                if diff > 0:
+                    savings_parts.append(f"Save ₹{diff} vs {store_name(store)}")
+                else:
+                    savings_parts.append(f"Price Match with {store_name(store)}")
+        else:
+            savings_parts.append("Lowest price across platforms")
+
+        ai_payload.append({
+            "size": weight,
+            "best_deal": {
+                "winner_store": store_name(winner['store']),
+                "price": int(winner['price']),
+                "item": winner['product_name'],
+                "savings_analysis": ", ".join(savings_parts)
+            },
+            "other_options": other_options
+        })
+    return ai_payload
+
+
+def _best_of(fn, data, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(data)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="offer aggregation benchmark")
+    parser.add_argument("--sizes", default="30,300,3000,30000", help="listings per query")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'listings':>9} {'offers':>7} {'legacy':>10} {'rows':>10} {'pandas':>10} {'identical':>10}")
+    for n in (int(x) for x in args.sizes.split(",")):
+        inventory = align_items(make_listings(n))
+        offers = sum(1 for rows in inventory.values() for r in rows
+                     for s in ("blinkit", "zepto", "bigbasket") if r[s] is not None)
+
+        t_legacy, expected = _best_of(legacy_build_ai_payload, inventory, args.repeat)
+        t_rows, rows_out = _best_of(build_ai_payload_rows, inventory, args.repeat)
+        t_cols, cols_out = _best_of(build_ai_payload_columnar, inventory, args.repeat)
+        identical = rows_out == expected and cols_out == expected
+
+        print(f"{n:>9} {offers:>7} {t_legacy * 1000:>8.2f}ms {t_rows * 1000:>8.2f}ms "
+              f"{t_cols * 1000:>8.2f}ms {str(identical):>10}")
+
+
+if __name__ == "__main__":
+    main()
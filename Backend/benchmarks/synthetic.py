@@ -0,0 +1,115 @@
+import random
+
+# Synthetic Indian grocery listings for benchmarks.
+# Deterministic for a given seed, shaped like scraped rows:
+# {"source", "name", "price", "weight", "raw_qty"}.
+
+SOURCES = ("blinkit", "zepto", "bigbasket")
+
+BRANDS = (
+    "Amul", "Nandini", "Heritage", "Tata", "Nestle", "Fortune", "Aashirvaad", "Patanjali",
+    "fresho!", "Organic Tattva", "24 Mantra", "Mother Dairy", "Britannia", "Haldiram's",
+    "MTR", "Everest", "MDH", "Saffola", "Daawat", "India Gate", "Milky Mist", "Akshayakalpa",
+)
+
+PRODUCTS = (
+    ("Onion", ("Red", "White", "Baby", "Nashik", "Big")),
+    ("Potato", ("Baby", "New", "Jyoti", "Chandramukhi")),
+    ("Tomato", ("Hybrid", "Local", "Cherry", "Desi")),
+    ("Toned Milk", ("Taaza", "GoodLife", "Gold", "Homogenised")),
+    ("Curd", ("Fresh", "Masti", "Probiotic", "Set")),
+    ("Paneer", ("Malai", "Fresh", "Low Fat")),
+    ("Basmati Rice", ("Classic", "Dubar", "Rozana", "Super")),
+    ("Atta", ("Whole Wheat", "Chakki Fresh", "Multigrain")),
+    ("Toor Dal", ("Unpolished", "Premium", "Desi")),
+    ("Sunflower Oil", ("Refined", "Cold Pressed", "Lite")),
+    ("Chilli Powder", ("Kashmiri", "Guntur", "Hot")),
+    ("Bread", ("Sandwich", "Brown", "Milk", "Whole Wheat")),
+)
+
+SIZES = (
+    ("250 g", "250g"), ("500 g", "500g"), ("1 kg", "1kg"), ("2 kg", "2kg"),
+    ("500 ml", "500ml"), ("1 l", "1l"), ("200 g", "200g"), ("1 pack (400 g)", "400g"),
+    ("6 pcs", "6pcs"), ("1 dozen", "12pcs"),
+)
+
+
+def product_name(rng):
+    base, variants = rng.choice(PRODUCTS)
+    brand = rng.choice(BRANDS)
+    variant = rng.choice(variants)
+    return f"{brand} {variant} {base}"
+
+
+def make_listings(n, seed=7):
+    """n scraped rows; the same product shows up in several stores with price noise."""
+    rng = random.Random(seed)
+    rows = []
+    while len(rows) < n:
+        name = product_name(rng)
+        raw_qty, weight = rng.choice(SIZES)
+        base_price = rng.randint(15, 600)
+        for source in SOURCES:
+            if len(rows) >= n or rng.random() < 0.25:
+                continue
+            # Stores spell the same product slightly differently
+            listed = name if rng.random() < 0.6 else f"{name} ({raw_qty})"
+            rows.append({
+                "source": source,
+                "name": listed,
+                "price": float(base_price + rng.randint(-10, 15)),
+                "weight": weight,
+                "raw_qty": raw_qty,
+            })
+    return rows
+
+
+# Quantity strings as the stores print them, with the weight label they clean to
+RAW_SIZES = SIZES + (
+    ("1 pack (500 ml)", "500ml"), ("12 x 70 g", "70g"), ("2 x 1 l", "1l"), ("1 bunch", "1bunch"),
+    ("Pack of 3", "3pcs"), ("5 kg", "5kg"), ("1.5 l", "1.5l"), ("400 gm", "400g"),
+    ("3 pcs (approx. 600 g)", "3pc"), ("2 pack", "2pack"),
+)
+
+
+def price_text(rng, price):
+    """A price cell as scraped: selling price, sometimes MRP and a discount tag."""
+    shown = f"{price:.0f}" if rng.random() < 0.8 else f"{price:.2f}"
+    if rng.random() < 0.5:
+        return f"₹{shown}"
+    mrp = int(price) + rng.randint(5, 60)
+    return f"₹{shown}\n₹{mrp}\n{int((mrp - price) / mrp * 100)}% OFF"
+
+
+def make_catalog(n, seed=7, page_size=40):
+    """
+    n scraped rows in search-result pages: every page is one query's results
+    from all three stores (about page_size products each), so per-query
+    functions can be run on page-sized batches. Rows also carry "query",
+    "page" and "price_text" (the raw price cell).
+    """
+    rng = random.Random(seed)
+    rows = []
+    page = 0
+    while len(rows) < n:
+        base, variants = rng.choice(PRODUCTS)
+        for _ in range(page_size):
+            name = f"{rng.choice(BRANDS)} {rng.choice(variants)} {base}"
+            raw_qty, weight = rng.choice(RAW_SIZES)
+            base_price = rng.randint(15, 600)
+            for source in SOURCES:
+                if len(rows) >= n or rng.random() < 0.25:
+                    continue
+                price = float(base_price + rng.randint(-10, 15))
+                rows.append({
+                    "source": source,
+                    "name": name if rng.random() < 0.6 else f"{name} ({raw_qty})",
+                    "price": price,
+                    "price_text": price_text(rng, price),
+                    "weight": weight,
+                    "raw_qty": raw_qty,
+                    "query": base.lower(),
+                    "page": page,
+                })
+        page += 1
+    return rows
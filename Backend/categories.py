@@ -1,15 +1,12 @@
-CATEGORIES = {
-    "Fruits & Vegetables": {
-        "Vegetables": ["Onion", "Potato", "Tomato"],
-        "Fruits": ["Banana", "Apple", "Orange", "Mango"]
-    },
-    "Dairy & Bakery": {
-        "Dairy": ["Milk", "Curd", "Butter"],
-        "Bakery": ["Bread", "Buns"]
-    },
-    "Staples & Grains": ["Rice", "Wheat Flour", "Dal"],
-    "Spices & Masala": ["Turmeric", "Chilli Powder"],
-    "Snacks & Packaged Foods": ["Biscuits", "Chips"],
-    "Beverages": ["Tea", "Coffee", "Soft Drinks"],
-    "Personal Care": ["Soap", "Shampoo"]
-}
+from .vocabulary import get_vocabulary
+
+# The category tree lives in vocabulary.json (hot-reloadable).
+# Use get_categories() in request paths so reloads are picked up;
+# CATEGORIES is only a snapshot taken at import time.
+
+
+def get_categories():
+    return get_vocabulary().categories
+
+
+CATEGORIES = get_categories()
@@ -1,96 +1,52 @@
 import difflib
+import re
 
-# 1. MOVED TO MODULE LEVEL (So Auto-Correct can use it)
-# Master list of all valid grocery terms we know about
-SYNONYMS = {
-    # VEGETABLES
-    "onion": ["onion", "pyaz", "pyaaz"],
-    "potato": ["potato", "aloo", "batata"],
-    "tomato": ["tomato", "tamatar"],
-    "coriander": ["coriander", "dhaniya", "cilantro"],
-    "chilli": ["chilli", "mirch", "pepper", "paprika"],
-    "ginger": ["ginger", "adrak"],
-    "garlic": ["garlic", "lehsun"],
-    "lemon": ["lemon", "nimbu", "lime"],
-    "cucumber": ["cucumber", "kheera", "kakdi"],
-    "carrot": ["carrot", "gajar"],
-    "cauliflower": ["cauliflower", "gobi", "gobhi"],
-    "cabbage": ["cabbage", "patta gobhi"],
-    "peas": ["peas", "matar"],
-    "spinach": ["spinach", "palak"],
-    "lady finger": ["lady finger", "bhindi", "okra"],
-    "brinjal": ["brinjal", "baingan", "eggplant"],
-    "capsicum": ["capsicum", "shimla mirch", "bell pepper"],
-
-    # DAIRY & BREAKFAST
-    "milk": ["milk", "doodh", "dairy"],
-    "curd": ["curd", "dahi", "yogurt"],
-    "paneer": ["paneer", "cottage cheese"],
-    "butter": ["butter", "maska"],
-    "cheese": ["cheese", "cheddar", "mozzarella"],
-    "bread": ["bread", "bun", "pav", "loaf"],
-    "egg": ["egg", "anda", "eggs"],
-    "coffee": ["coffee", "nescafe", "bru"],
-    "tea": ["tea", "chai", "tata tea"],
-    
-    # STAPLES
-    "rice": ["rice", "chawal", "basmati"],
-    "flour": ["flour", "atta", "maida", "besan"],
-    "sugar": ["sugar", "cheeni", "shakkar"],
-    "salt": ["salt", "namak"],
-    "oil": ["oil", "tel", "sunflower", "mustard", "ghee"],
-    "dal": ["dal", "lentil", "pulse", "toor", "moong", "urad"],
-
-    # FRUITS
-    "apple": ["apple", "seb"],
-    "banana": ["banana", "kela"],
-    "mango": ["mango", "aam"],
-    "papaya": ["papaya", "papita"]
-}
-
-# Flatten all known words into a single list for checking
-# This creates a list like ['onion', 'pyaz', 'potato', 'aloo', 'milk'...]
-ALL_VALID_WORDS = set()
-for key, values in SYNONYMS.items():
-    ALL_VALID_WORDS.add(key)
-    for v in values:
-        ALL_VALID_WORDS.add(v)
+from .vocabulary import get_vocabulary
+from .metrics import timed
+from .log import get_logger
+
+log = get_logger(__name__)
+
+# The grocery dictionary (SYNONYMS) now lives in vocabulary.json and is
+# hot-reloadable, see vocabulary.py. Always read it through get_vocabulary()
+# so a reload is picked up on the next call.
 
 
+@timed("autocorrect_query")
 def autocorrect_query(user_query):
     """
     Corrects 'milks' -> 'milk', 'tomat' -> 'tomato'
     using the known grocery dictionary.
     """
     user_query = user_query.lower().strip()
+    vocab = get_vocabulary()
     
     # 1. Exact match? Return immediately
-    if user_query in ALL_VALID_WORDS:
+    if user_query in vocab.all_valid_words:
         return user_query
     
     # 2. Fuzzy match (Find closest word in our list)
     # cutoff=0.8 means it must be 80% similar (prevents wild guesses)
-    matches = difflib.get_close_matches(user_query, ALL_VALID_WORDS, n=1, cutoff=0.8)
+    matches = difflib.get_close_matches(user_query, vocab.word_list, n=1, cutoff=0.8)
     
     if matches:
         suggestion = matches[0]
-        print(f"   🪄 Auto-corrected '{user_query}' -> '{suggestion}'")
+        log.info("🪄 Auto-corrected '%s' -> '%s'", user_query, suggestion)
         return suggestion
     
     # 3. No close match? Return original (maybe it's a new item not in our list)
     return user_query
 
 
+@timed("keyword_filter")
 def keyword_filter(items, query):
     """
     Filters out items that do not contain the search terms.
     """
-    print(f"   🧹 Running Keyword Filter for '{query}'...")
-    
     query_lower = query.lower()
     
-    # Use the global SYNONYMS dict now
-    valid_keywords = SYNONYMS.get(query_lower, [query_lower])
+    # Use the active vocabulary's synonyms
+    valid_keywords = get_vocabulary().synonyms.get(query_lower, (query_lower,))
     
     clean_list = []
     discarded_count = 0
@@ -103,6 +59,47 @@ def keyword_filter(items, query):
             discarded_count += 1
             
     if discarded_count > 0:
-        print(f"      ❌ Removed {discarded_count} irrelevant items.")
+        log.debug("🧹 Keyword filter '%s' removed %d irrelevant items", query, discarded_count)
+        
+    return clean_list
+
+
+def normalize_weight(qty_val, unit):
+    if not unit or qty_val == 0: return "Other"
+    unit = unit.lower().strip()
+    
+    if unit == 'g' or unit == 'gm':
+        if qty_val >= 1000: return f"{int(qty_val/1000)}kg"
+        return f"{int(qty_val)}g"
+    
+    if unit == 'ml':
+        if qty_val >= 1000: return f"{int(qty_val/1000)}l"
+        return f"{int(qty_val)}ml"
         
-    return clean_list
\ No newline at end of file
+    if unit in ['kg', 'l', 'ltr']:
+        return f"{int(qty_val) if qty_val % 1 == 0 else qty_val}{unit.replace('ltr', 'l')}"
+        
+    return f"{int(qty_val)}{unit}"
+
+
+def size_label(qty_val, qty_unit):
+    """Size label for a stored row (quantity_value / quantity_unit columns)."""
+    q_val = float(qty_val) if qty_val else 0
+    q_unit = str(qty_unit).lower() if qty_unit else "unit"
+    return normalize_weight(q_val, q_unit)
+
+
+_PRICE_RE = re.compile(r"₹\s*(\d+(?:\.\d+)?)")
+
+
+def clean_price(text_line):
+    """Lowest ₹ amount in a scraped price line (the sale price next to an MRP), 0.0 if none."""
+    matches = _PRICE_RE.findall(text_line)
+    if not matches:
+        return 0.0
+    # Convert to float to keep decimals
+    return min(float(p) for p in matches)
+
+
+def clean_product_name(name):
+    return " ".join(name.replace("\n", " ").split())
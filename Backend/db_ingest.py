@@ -1,15 +1,24 @@
 import asyncio
+import importlib
+import json
+import os
 import re
 from datetime import datetime
 
-from playwright.async_api import async_playwright
 from sqlalchemy import text
 
-from .data_cleaner import keyword_filter, autocorrect_query
-from Backend.Source_scraper.blinkit_scraper import scrape_blinkit
-from Backend.Source_scraper.zepto_scraper import scrape_zepto
-from Backend.Source_scraper.bigbasket_scraper import scrape_bigbasket
+from .data_cleaner import keyword_filter, autocorrect_query, size_label
 from .db_supabase import SessionLocal
+from .product_identity import ensure_identity_schema, assign_canonical_ids
+from .report_cache import get_report_cache
+from .metrics import timed, timed_await
+from .log import get_logger, debug_payload
+from .profiling import profiled
+
+log = get_logger(__name__)
+
+# Playwright and the scrapers are imported on the first live scrape (or by
+# warm_up()), not here: DB-only and fixture runs never load them.
 
 
 # ------------------ HELPERS ------------------
@@ -92,7 +101,7 @@ def remove_old_entries(db, search_query: str):
         {"q": search_query}
     )
     db.commit()
-    print(f"   🧹 Cleared old records for '{search_query}'")
+    log.debug("🧹 Cleared old records for '%s'", search_query)
 
 
 def insert_product(db, data: dict):
@@ -130,92 +139,225 @@ def insert_product(db, data: dict):
 
 # ------------------ MAIN PIPELINE ------------------
 
-async def fetch_and_store_items(items):
+# Items scraped at the same time (3 browser tabs each). Shared by every
+# fetch_and_store_items call, so it is a process-wide limit.
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "3"))
+
+_scrape_slots = None
+
+
+def _get_scrape_slots():
+    global _scrape_slots
+    if _scrape_slots is None:
+        _scrape_slots = asyncio.Semaphore(max(1, SCRAPE_CONCURRENCY))
+    return _scrape_slots
+
+
+SOURCES = ("blinkit", "zepto", "bigbasket")
+
+# Scraper fixtures (load tests, offline runs): with SCRAPER_FIXTURES set to a
+# directory, items are replayed from <dir>/<item>.json ({source: [rows]})
+# instead of opening a browser, each source taking SCRAPER_FIXTURE_LATENCY_MS.
+# SCRAPER_RECORD_FIXTURES=<dir> saves live scrapes in the same format.
+SCRAPER_FIXTURES = os.getenv("SCRAPER_FIXTURES", "")
+SCRAPER_FIXTURE_LATENCY_MS = float(os.getenv("SCRAPER_FIXTURE_LATENCY_MS", "0"))
+SCRAPER_RECORD_FIXTURES = os.getenv("SCRAPER_RECORD_FIXTURES", "")
+
+
+def fixture_path(fixtures_dir, item):
+    slug = re.sub(r"[^a-z0-9]+", "_", item.lower()).strip("_") or "_"
+    return os.path.join(fixtures_dir, f"{slug}.json")
+
+
+def _tag_sources(results_by_source):
+    """{source: [rows]} -> one list of rows carrying their 'source'."""
+    raw_items = []
+    for source in SOURCES:
+        for p in results_by_source.get(source) or []:
+            p['source'] = source
+            raw_items.append(p)
+    return raw_items
+
+
+def warm_up():
+    """Imports Playwright and the scrapers ahead of the first live scrape."""
+    for module in ("playwright.async_api", *(f"Backend.Source_scraper.{s}_scraper" for s in SOURCES)):
+        importlib.import_module(module)
+
+
+async def scrape_item(context, item):
+    """Scrapes one item from all sources in parallel, each in its own tab."""
+    from Backend.Source_scraper.blinkit_scraper import scrape_blinkit
+    from Backend.Source_scraper.zepto_scraper import scrape_zepto
+    from Backend.Source_scraper.bigbasket_scraper import scrape_bigbasket
+
+    pages = [await context.new_page() for _ in range(3)]
+    try:
+        blinkit_results, zepto_results, bigbasket_results = await asyncio.gather(
+            timed_await("scrape", scrape_blinkit(pages[0], item), source="blinkit"),
+            timed_await("scrape", scrape_zepto(pages[1], item), source="zepto"),
+            timed_await("scrape", scrape_bigbasket(pages[2], item), source="bigbasket")
+        )
+    finally:
+        for page in pages:
+            await page.close()
+
+    for source, rows in (("blinkit", blinkit_results), ("zepto", zepto_results), ("bigbasket", bigbasket_results)):
+        debug_payload(log, f"{source} results", rows, query=item, source=source)
+
+    results = {"blinkit": blinkit_results, "zepto": zepto_results, "bigbasket": bigbasket_results}
+    if SCRAPER_RECORD_FIXTURES:
+        os.makedirs(SCRAPER_RECORD_FIXTURES, exist_ok=True)
+        with open(fixture_path(SCRAPER_RECORD_FIXTURES, item), "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=1)
+
+    # Tag Source
+    return _tag_sources(results)
+
+
+async def _replay_source(rows):
+    if SCRAPER_FIXTURE_LATENCY_MS:
+        await asyncio.sleep(SCRAPER_FIXTURE_LATENCY_MS / 1000.0)
+    return [dict(r) for r in rows]
+
+
+async def replay_item(item, fixtures_dir=None):
+    """scrape_item from a fixture file; an item without one finds nothing."""
+    path = fixture_path(fixtures_dir or SCRAPER_FIXTURES, item)
+    try:
+        with open(path, encoding="utf-8") as f:
+            recorded = json.load(f)
+    except FileNotFoundError:
+        recorded = {}
+
+    replayed = await asyncio.gather(*(
+        timed_await("scrape", _replay_source(recorded.get(source) or []), source=source)
+        for source in SOURCES
+    ))
+    return _tag_sources(dict(zip(SOURCES, replayed)))
+
+
+@timed("db_write")
+def store_items(db, item, raw_items):
+    """Cleans scraped rows for `item` and replaces its rows in the DB. Returns rows written."""
+    if not raw_items:
+        log.info("❌ No items found on any platform for '%s'", item, extra={"query": item})
+        return 0
+
+    # 1. Clean & Filter
+    clean_items = keyword_filter(raw_items, item)
+
+    debug_payload(log, "cleaned items", clean_items, query=item)
+
+    if not clean_items:
+        log.info("⚠️ Items for '%s' found but filtered out by keyword cleaner", item, extra={"query": item})
+        return 0
+
+    # 2. Refresh DB Data
+    remove_old_entries(db, item)
+
+    listings = []
+    for r in clean_items:
+        qty_val, qty_unit = parse_quantity(r.get("weight"))
+        listings.append({
+            "source": r["source"],
+            "product_name": r["name"],
+            "size": size_label(qty_val, qty_unit)
+        })
+        insert_product(db, {
+            "source": r["source"],
+            "search_query": item,
+            "product_name": r["name"],
+            "brand": extract_brand(r["name"]),
+            "price": r["price"],
+            "raw_quantity": r.get("weight"),
+            "quantity_value": qty_val,
+            "quantity_unit": qty_unit,
+            "scraped_at": datetime.utcnow()
+        })
+
+    # 3. Map listings to canonical product ids (savepoint: never blocks the insert)
+    try:
+        with db.begin_nested():
+            assign_canonical_ids(db, listings)
+    except Exception as e:
+        log.warning("⚠️ Product identity update failed: %s", e)
+
+    db.commit()
+    log.info("✅ Saved %d new items for '%s' to Supabase", len(clean_items), item,
+             extra={"query": item, "rows": len(clean_items)})
+
+    # New rows for this query: its cached reports can't be served any more, drop them
+    get_report_cache().invalidate(item)
+    return len(clean_items)
+
+
+@profiled("fetch_and_store_items")
+async def fetch_and_store_items(items, on_item_done=None):
     """
     Scrapes the provided items from all sources
     and stores them in Supabase (PostgreSQL).
+
+    Items are scraped concurrently (SCRAPE_CONCURRENCY at a time); DB writes
+    go through one session, one item at a time, off the event loop.
+    `on_item_done(raw_item)` is awaited as soon as an item's rows are committed.
     """
 
     db = SessionLocal()
+    db_lock = asyncio.Lock()
+
+    try:
+        # DDL round-trips on first use: off the event loop like the other DB work
+        await asyncio.to_thread(ensure_identity_schema, db)
+    except Exception as e:
+        await asyncio.to_thread(db.rollback)
+        log.warning("⚠️ Product identity tables unavailable: %s", e)
+
+    async def process(context, raw_item):
+        item = autocorrect_query(raw_item)
+        if item != raw_item:
+            log.info("✨ Corrected '%s' -> '%s' for scraping", raw_item, item)
+
+        try:
+            async with _get_scrape_slots():
+                if context is None:
+                    raw_items = await replay_item(item)
+                else:
+                    log.info("🌍 Live scraping '%s'", item, extra={"query": item})
+                    raw_items = await scrape_item(context, item)
+        except Exception as e:
+            log.warning("⚠️ Scraping '%s' failed: %s", item, e, extra={"query": item})
+            raw_items = []
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-        context = await browser.new_context(
-            geolocation={"latitude": 12.9716, "longitude": 77.5946},
-            permissions=["geolocation"]
-        )
+        async with db_lock:
+            try:
+                await asyncio.to_thread(store_items, db, item, raw_items)
+            except Exception as e:
+                await asyncio.to_thread(db.rollback)
+                log.warning("⚠️ Storing '%s' failed: %s", item, e, extra={"query": item})
 
-        page_blinkit = await context.new_page()
-        page_zepto = await context.new_page()
-        page_bigbasket = await context.new_page()
+        if on_item_done is not None:
+            await on_item_done(raw_item)
 
-        for raw_item in items:
-            item = autocorrect_query(raw_item)
-            if item != raw_item:
-                print(f"   ✨ Corrected '{raw_item}' -> '{item}' for scraping.")
-            # ------------------------------
+    try:
+        if SCRAPER_FIXTURES:
+            await asyncio.gather(*(process(None, raw_item) for raw_item in items))
+            return
 
-            print(f"\n🌍 Live Scraping for '{item.upper()}'...")
+        from playwright.async_api import async_playwright
 
-            # 1. Scrape Parallel
-            blinkit_results, zepto_results, bigbasket_results = await asyncio.gather(
-                scrape_blinkit(page_blinkit, item),
-                scrape_zepto(page_zepto, item),
-                scrape_bigbasket(page_bigbasket, item)
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=False)
+            context = await browser.new_context(
+                geolocation={"latitude": 12.9716, "longitude": 77.5946},
+                permissions=["geolocation"]
             )
 
-            print("blinkit_results -->", blinkit_results)
-            print("zepto_results -->", zepto_results)
-
-            # 2. Tag Source
-            raw_items = []
-            for p in blinkit_results:
-                p['source'] = 'blinkit'
-                raw_items.append(p)
-            for p in zepto_results:
-                p['source'] = 'zepto'
-                raw_items.append(p)
-            for p in bigbasket_results:
-                p['source'] = 'bigbasket'
-                raw_items.append(p)
-
-            total_found = len(raw_items)
-            
-            if total_found > 0:
-                # 3. Clean & Filter
-                clean_items = keyword_filter(raw_items, item)
-
-                print("Cleaned items",clean_items)
-
-                if clean_items:
-                    # 4. Refresh DB Data
-                    remove_old_entries(db, item)
-                    
-                    for r in clean_items:
-                        qty_val, qty_unit = parse_quantity(r.get("weight"))
-                        insert_product(db, {
-                            "source": r["source"],
-                            "search_query": item,
-                            "product_name": r["name"],
-                            "brand": extract_brand(r["name"]),
-                            "price": r["price"],
-                            "raw_quantity": r.get("weight"),
-                            "quantity_value": qty_val,
-                            "quantity_unit": qty_unit,
-                            "scraped_at": datetime.utcnow()
-                        })
-                    print(f"   ✅ Saved {len(clean_items)} new items to DB.")
-                else:
-                    print(f"   ⚠️ Items found but filtered out by keyword cleaner.")
-            else:
-                print(f"   ❌ No items found on any platform for '{item}'.")
-
-            db.commit()
-            print(f"   ✅ Saved {len(clean_items)} new items to Supabase.")
-
-        await browser.close()
+            await asyncio.gather(*(process(context, raw_item) for raw_item in items))
 
-    db.close()
+            await browser.close()
+    finally:
+        db.close()
 
 
 # ------------------ CLI RUNNER ------------------
@@ -1,21 +1,47 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("SUPABASE_DB_URL")
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10
-)
-
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine
-)
+# The engine (and SQLAlchemy's ORM) is created on first use, not at import,
+# so importing the pipeline is cheap and works without a database.
+_engine = None
+_sessionmaker = None
+_lock = threading.Lock()
+
+
+def get_engine():
+    global _engine, _sessionmaker
+    with _lock:
+        if _engine is None:
+            from sqlalchemy import create_engine
+            from sqlalchemy.orm import sessionmaker
+
+            _engine = create_engine(
+                DATABASE_URL,
+                pool_pre_ping=True,
+                pool_size=5,
+                max_overflow=10
+            )
+            _sessionmaker = sessionmaker(
+                autocommit=False,
+                autoflush=False,
+                bind=_engine
+            )
+        return _engine
+
+
+def SessionLocal():
+    """A new Session on the shared engine."""
+    if _sessionmaker is None:
+        get_engine()
+    return _sessionmaker()
+
+
+def warm_up():
+    """Creates the engine and opens its first pooled connection."""
+    with get_engine().connect():
+        pass
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import random
+import time
+
+from .log import get_logger
+
+# Managed wrapper around AsyncGroq:
+# - semaphore caps concurrent requests to the provider
+# - every call has a deadline, time queued for the semaphore included
+# - 429 / 5xx / timeouts are retried with jittered exponential backoff
+# - token + latency accounting in LLMClient.stats
+# GROQ_BASE_URL can point the client at the local stub (loadtest/groq_stub.py).
+# The groq SDK is imported when the first client is created.
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "4"))
+GROQ_TIMEOUT_SECONDS = float(os.getenv("GROQ_TIMEOUT_SECONDS", "20"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "3"))
+
+log = get_logger(__name__)
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMDeadlineExceeded(Exception):
+    pass
+
+
+def is_retryable(exc):
+    if isinstance(exc, (asyncio.TimeoutError, LLMDeadlineExceeded, ConnectionError)):
+        return True
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    # groq's APIConnectionError / APITimeoutError carry no status code
+    return type(exc).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def _retry_after(exc):
+    """Honours a Retry-After header on rate-limit responses, if present."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMClient:
+    def __init__(self, api_key=None, base_url=None, max_concurrency=GROQ_MAX_CONCURRENCY,
+                 timeout=GROQ_TIMEOUT_SECONDS, max_retries=GROQ_MAX_RETRIES, client=None):
+        if client is None:
+            from groq import AsyncGroq
+
+            client = AsyncGroq(
+                api_key=api_key or os.getenv("GROQ_API_KEY"),
+                base_url=base_url or os.getenv("GROQ_BASE_URL") or None,
+                max_retries=0  # retries are handled here
+            )
+        self._client = client
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.stats = {
+            "calls": 0,
+            "failures": 0,
+            "retries": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "latency_total": 0.0,
+            "latency_max": 0.0,
+        }
+
+    async def chat(self, deadline=None, **kwargs):
+        """
+        Same arguments as client.chat.completions.create.
+        `deadline` (seconds) bounds the whole call including retries.
+        """
+        deadline = deadline or self.timeout * (self.max_retries + 1)
+        start = time.monotonic()
+        attempt = 0
+
+        while True:
+            remaining = deadline - (time.monotonic() - start)
+            if remaining <= 0:
+                self.stats["failures"] += 1
+                raise LLMDeadlineExceeded(f"LLM call exceeded {deadline:.1f}s deadline")
+
+            try:
+                response = await self._call_once(start + deadline, kwargs)
+            except LLMDeadlineExceeded:
+                self.stats["failures"] += 1
+                raise
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    self.stats["failures"] += 1
+                    raise
+
+                attempt += 1
+                self.stats["retries"] += 1
+                # Full jitter: random sleep up to the exponential cap
+                backoff = _retry_after(e) or random.uniform(0, min(8.0, 0.5 * 2 ** attempt))
+                log.warning("🔁 LLM retry %d/%d in %.2fs (%s)", attempt, self.max_retries, backoff, e)
+                await asyncio.sleep(min(backoff, max(0.0, deadline - (time.monotonic() - start))))
+                continue
+
+            return response
+
+    async def _call_once(self, deadline_at, kwargs):
+        """One request; the wait for a semaphore slot counts against deadline_at (monotonic)."""
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), deadline_at - time.monotonic())
+        except asyncio.TimeoutError:
+            raise LLMDeadlineExceeded("LLM call timed out waiting for a free slot") from None
+        try:
+            t0 = time.monotonic()
+            if deadline_at - t0 <= 0:
+                raise LLMDeadlineExceeded("LLM call reached its deadline while queued")
+            timeout = min(self.timeout, deadline_at - t0)
+            try:
+                response = await asyncio.wait_for(
+                    self._client.chat.completions.create(**kwargs), timeout
+                )
+            finally:
+                elapsed = time.monotonic() - t0
+                self.stats["calls"] += 1
+                self.stats["latency_total"] += elapsed
+                self.stats["latency_max"] = max(self.stats["latency_max"], elapsed)
+        finally:
+            self._semaphore.release()
+
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.stats["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+            self.stats["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+        return response
+
+    def stats_summary(self):
+        s = self.stats
+        avg = s["latency_total"] / s["calls"] if s["calls"] else 0.0
+        return (
+            f"calls={s['calls']} failures={s['failures']} retries={s['retries']} "
+            f"tokens={s['prompt_tokens']}+{s['completion_tokens']} "
+            f"latency_avg={avg:.2f}s latency_max={s['latency_max']:.2f}s"
+        )
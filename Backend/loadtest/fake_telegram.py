@@ -0,0 +1,119 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+# Local stand-in for the Telegram Bot API (the methods the bot calls).
+# Point the bot at it with:
+#   TELEGRAM_API_BASE_URL=http://127.0.0.1:8766 TELEGRAM_BOT_TOKEN=1:stub
+# Every call is recorded, so load tests can count replies per chat.
+#
+#   python -m Backend.loadtest.fake_telegram --port 8766 --latency-ms 50
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "SmartSaverAI", "username": "smartsaver_stub_bot"}
+
+
+class FakeTelegramHandler(BaseHTTPRequestHandler):
+    # Keep-alive like the real API; HTTP/1.0 closes make httpx's pooled connections fail
+    protocol_version = "HTTP/1.1"
+    latency_ms = 0.0
+    calls = None          # list of (time, method, params), shared per server
+    on_call = None        # optional on_call(method, params), run in the server thread
+    _lock = threading.Lock()
+    _message_ids = [0]
+
+    def do_POST(self):
+        # /bot<token>/<method>
+        method = self.path.rstrip("/").rsplit("/", 1)[-1]
+        length = int(self.headers.get("Content-Length") or 0)
+        params = self._parse(self.rfile.read(length))
+
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+        with self._lock:
+            self.calls.append((time.perf_counter(), method, params))
+        if self.on_call is not None:
+            self.on_call(method, params)
+
+        self._send(200, {"ok": True, "result": self._result(method, params)})
+
+    do_GET = do_POST
+
+    def _parse(self, raw):
+        if not raw:
+            return {}
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            return json.loads(raw)
+        # PTB sends form fields, JSON-encoding the non-string ones
+        return dict(parse_qsl(raw.decode("utf-8")))
+
+    def _next_message_id(self):
+        with self._lock:
+            self._message_ids[0] += 1
+            return self._message_ids[0]
+
+    def _result(self, method, params):
+        if method == "getMe":
+            return BOT_USER
+        if method in ("sendMessage", "editMessageText"):
+            chat_id = int(params.get("chat_id") or 0)
+            message_id = params.get("message_id") or self._next_message_id()
+            return {
+                "message_id": int(message_id),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": BOT_USER,
+                "text": params.get("text", ""),
+            }
+        # answerCallbackQuery, setWebhook, deleteWebhook, ...
+        return True
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fake_telegram(host="127.0.0.1", port=0, latency_ms=0.0, on_call=None):
+    """
+    Starts the fake API in a daemon thread. Returns (server, base_url, calls);
+    `calls` is the live list of recorded (time, method, params).
+    `on_call(method, params)` is called from the server thread for every call.
+    """
+    calls = []
+    handler = type("ConfiguredFakeTelegramHandler", (FakeTelegramHandler,), {
+        "latency_ms": latency_ms,
+        "calls": calls,
+        "on_call": staticmethod(on_call) if on_call else None,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}", calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake Telegram Bot API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, url, _ = start_fake_telegram(args.host, args.port, args.latency_ms)
+    print(f"📨 Fake Telegram API listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Deterministic local stand-in for the Groq chat completions API.
+# Point the backend at it with:
+#   GROQ_BASE_URL=http://127.0.0.1:8765 GROQ_API_KEY=stub GROQ_MODEL=stub
+# and process_item_logic runs without any network access.
+#
+#   python -m Backend.loadtest.groq_stub --port 8765 --latency-ms 300 --error-every 20
+
+_INDEX_LINE = re.compile(r"^\s*(\d+): ", re.MULTILINE)
+_QUERY_BLOCK = re.compile(r'^\s*Query (\d+): ".*"$', re.MULTILINE)
+_REPORT_BLOCK = re.compile(r'^@(\d+) ".*"$', re.MULTILINE)
+
+
+def _estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def fake_completion(body):
+    """Builds a deterministic answer for the prompts ai_reco sends."""
+    prompt = body["messages"][-1]["content"]
+    json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+
+    if json_mode and '"results"' in prompt:
+        # Batched relevance filter: keep every item of every query
+        blocks = _QUERY_BLOCK.split(prompt)
+        results = []
+        for i in range(1, len(blocks) - 1, 2):
+            count = len(_INDEX_LINE.findall(blocks[i + 1]))
+            results.append({"query_id": int(blocks[i]), "keep_indices": list(range(count))})
+        content = json.dumps({"results": results})
+    elif json_mode and '"reports"' in prompt:
+        ids = sorted({int(i) for i in _REPORT_BLOCK.findall(prompt)})
+        content = json.dumps({"reports": [{"query_id": i, "text": f"📊 Stub report {i}"} for i in ids]})
+    elif json_mode:
+        # Single relevance filter: keep everything
+        count = len(_INDEX_LINE.findall(prompt))
+        content = json.dumps({"keep_indices": list(range(count))})
+    else:
+        content = "📊 Stub report"
+
+    return {
+        "id": "stub-completion",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model") or "stub",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": _estimate_tokens(prompt),
+            "completion_tokens": _estimate_tokens(content),
+            "total_tokens": _estimate_tokens(prompt) + _estimate_tokens(content),
+        },
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like the real API behind httpx's pool
+    latency_ms = 0.0
+    jitter_ms = 0.0
+    error_every = 0
+    calls = None        # list of (time, prompt chars), shared per server
+    _counter = 0
+    _lock = threading.Lock()
+    _rng = random.Random(42)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if not self.path.endswith("/chat/completions"):
+            self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+
+        with self._lock:
+            StubHandler._counter += 1
+            n = StubHandler._counter
+            delay = self.latency_ms + self._rng.uniform(0, self.jitter_ms)
+
+        time.sleep(delay / 1000.0)
+
+        if self.error_every and n % self.error_every == 0:
+            self._send(429, {"error": {"message": "stub rate limit", "type": "rate_limit"}},
+                       headers={"retry-after": "0.1"})
+            return
+
+        with self._lock:
+            self.calls.append((time.perf_counter(), len(body["messages"][-1]["content"])))
+        self._send(200, fake_completion(body))
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server(host="127.0.0.1", port=0, latency_ms=0.0, jitter_ms=0.0, error_every=0):
+    """
+    Starts the stub in a daemon thread. Returns (server, base_url, calls);
+    `calls` is the live list of answered (time, prompt chars).
+    port=0 picks a free port.
+    """
+    calls = []
+    handler = type("ConfiguredStubHandler", (StubHandler,), {
+        "latency_ms": latency_ms,
+        "jitter_ms": jitter_ms,
+        "error_every": error_every,
+        "calls": calls,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}", calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Groq stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-every", type=int, default=0, help="answer every Nth request with 429")
+    args = parser.parse_args()
+
+    server, url, _ = start_stub_server(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_every)
+    print(f"🤖 Groq stub listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
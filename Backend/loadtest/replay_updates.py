@@ -0,0 +1,184 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+# Replays Telegram updates against the bot in webhook mode, with the Bot API
+# replaced by fake_telegram.py, and reports throughput, webhook ack latency
+# and per-chat ordering.
+#
+#   python -m Backend.loadtest.replay_updates --chats 200 --per-chat 20 --rate 2000
+#   python -m Backend.loadtest.replay_updates --updates recorded.jsonl
+#
+# Synthetic updates only walk the menus (no comparisons), so this measures
+# the bot layer, not scraping or the LLM.
+
+
+def message_update(update_id, chat_id, text):
+    """A private-chat text message Update payload (commands get their entity)."""
+    user = {"id": chat_id, "is_bot": False, "first_name": f"user{chat_id}"}
+    chat = {"id": chat_id, "type": "private"}
+    message = {"message_id": update_id, "date": int(time.time()), "chat": chat, "from": user, "text": text}
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text)}]
+    return {"update_id": update_id, "message": message}
+
+
+def callback_update(update_id, chat_id, data):
+    user = {"id": chat_id, "is_bot": False, "first_name": f"user{chat_id}"}
+    chat = {"id": chat_id, "type": "private"}
+    return {"update_id": update_id, "callback_query": {
+        "id": str(update_id), "from": user, "chat_instance": str(chat_id), "data": data,
+        "message": {"message_id": update_id, "date": int(time.time()), "chat": chat, "text": "menu"},
+    }}
+
+
+def synthetic_updates(chats, per_chat, category_callback):
+    """Menu navigation for `chats` users, interleaved like real traffic."""
+    steps = [
+        ("text", "/start"),
+        ("text", "📂 Browse Categories"),
+        ("callback", category_callback),
+        ("text", "⬅️ Back"),
+    ]
+    updates = []
+    update_id = 1
+    for n in range(per_chat):
+        kind, value = steps[n % len(steps)]
+        for chat_id in range(1000, 1000 + chats):
+            if kind == "text":
+                updates.append(message_update(update_id, chat_id, value))
+            else:
+                updates.append(callback_update(update_id, chat_id, value))
+            update_id += 1
+    return updates
+
+
+def load_updates(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def chat_of(update):
+    for key in ("message", "edited_message"):
+        if key in update:
+            return update[key]["chat"]["id"]
+    if "callback_query" in update:
+        return update["callback_query"]["message"]["chat"]["id"]
+    return None
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def replay(updates, rate, senders, telegram_latency_ms):
+    from aiohttp import ClientSession
+    from telegram import Update
+    from telegram.ext import TypeHandler
+
+    from .fake_telegram import start_fake_telegram
+
+    fake, fake_url, api_calls = start_fake_telegram(latency_ms=telegram_latency_ms)
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:stub")
+    os.environ["TELEGRAM_API_BASE_URL"] = fake_url
+    os.environ.setdefault("VOCABULARY_WATCH_SECONDS", "0")
+
+    from Backend.telegram_bot.bot import build_application
+    from Backend.telegram_bot.webhook import start_webhook, stop_webhook
+
+    app = build_application("webhook")
+
+    # Processing order per chat, recorded before any other handler runs
+    seen = {}
+
+    async def record(update, context):
+        if update.effective_chat:
+            seen.setdefault(update.effective_chat.id, []).append(update.update_id)
+
+    app.add_handler(TypeHandler(Update, record), group=-100)
+
+    runner, dispatcher = await start_webhook(app, host="127.0.0.1", port=0, path="/telegram", public_url="")
+    port = runner.addresses[0][1]
+    url = f"http://127.0.0.1:{port}/telegram"
+
+    # One chat always goes through the same sender, so its updates are posted
+    # in order (like Telegram, which waits for the ack before the next one)
+    acks = []
+    shards = [[] for _ in range(senders)]
+    for k, update in enumerate(updates):
+        shards[hash(chat_of(update)) % senders].append((k, update))
+
+    interval = 1.0 / rate if rate else 0.0
+    started = time.perf_counter()
+
+    async def sender(session, shard):
+        for k, update in shard:
+            if interval:
+                # Open-loop schedule: update k goes out at started + k * interval
+                delay = started + k * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            t0 = time.perf_counter()
+            async with session.post(url, json=update) as resp:
+                await resp.read()
+                if resp.status != 200:
+                    print(f"⚠️ Update {update['update_id']} got HTTP {resp.status}")
+            acks.append(time.perf_counter() - t0)
+
+    async with ClientSession() as session:
+        await asyncio.gather(*(sender(session, shard) for shard in shards))
+    sent_at = time.perf_counter()
+
+    await dispatcher.join()
+    finished = time.perf_counter()
+    await stop_webhook(app, runner, dispatcher)
+    fake.shutdown()
+
+    # Ordering: each chat must see its updates in ascending update_id order
+    expected = {}
+    for update in updates:
+        expected.setdefault(chat_of(update), []).append(update["update_id"])
+    out_of_order = sum(1 for chat_id, ids in seen.items() if ids != sorted(ids))
+    missing = sum(len(ids) for ids in expected.values()) - sum(len(ids) for ids in seen.values())
+
+    elapsed = finished - started
+    print(f"\n📈 Replayed {len(updates)} updates from {len(expected)} chats")
+    print(f"   sent in      {sent_at - started:8.2f} s  ({len(updates) / (sent_at - started):,.0f} updates/s offered)")
+    print(f"   processed in {elapsed:8.2f} s  ({dispatcher.processed / elapsed:,.0f} updates/s)")
+    print(f"   webhook ack  p50 {percentile(acks, 50) * 1000:.1f} ms | p95 {percentile(acks, 95) * 1000:.1f} ms"
+          f" | p99 {percentile(acks, 99) * 1000:.1f} ms | mean {statistics.mean(acks) * 1000:.1f} ms")
+    print(f"   bot API calls {len(api_calls)}")
+    print(f"   chats out of order: {out_of_order} | updates not processed: {missing}")
+    return out_of_order == 0 and missing == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay Telegram updates against the webhook server")
+    parser.add_argument("--updates", help="JSONL file of recorded Update payloads")
+    parser.add_argument("--chats", type=int, default=100)
+    parser.add_argument("--per-chat", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=0, help="updates per second offered (0 = as fast as possible)")
+    parser.add_argument("--senders", type=int, default=32, help="concurrent HTTP senders")
+    parser.add_argument("--telegram-latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    if args.updates:
+        updates = load_updates(args.updates)
+    else:
+        from Backend.telegram_bot.keyboards import get_catalog
+
+        # First category button of the current catalog
+        updates = synthetic_updates(args.chats, args.per_chat, f"c|{get_catalog().tag}|0")
+
+    ok = asyncio.run(replay(updates, args.rate, args.senders, args.telegram_latency_ms))
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
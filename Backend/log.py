@@ -0,0 +1,146 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+
+from .metrics import current_correlation_id
+
+# Leveled logging for the pipeline and the bot. Callers only enqueue a
+# record (QueueHandler); a background thread (QueueListener) formats and
+# writes it, so slow stdout/stderr never blocks the event loop.
+#   log = get_logger(__name__)
+#   log.info("✅ Saved %d items", n, extra={"query": q})     # extras become JSON fields
+#   debug_payload(log, "raw scrape", rows, query=q)           # sampled + truncated, DEBUG only
+# Records carry the metrics.py correlation id of the request they belong to.
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "text" (human readable) or "json" (one object per line)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+# Share of debug_payload calls that are logged at all, and how much of each
+LOG_PAYLOAD_SAMPLE = float(os.getenv("LOG_PAYLOAD_SAMPLE", "0.1"))
+LOG_PAYLOAD_MAX_ITEMS = int(os.getenv("LOG_PAYLOAD_MAX_ITEMS", "5"))
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "1000"))
+
+ROOT = "smartsaver"
+
+# LogRecord attributes that are not user extras
+_STANDARD = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "cid"}
+
+
+class _CorrelationFilter(logging.Filter):
+    # Runs in the caller's context, where the request's contextvar is visible
+    def filter(self, record):
+        record.cid = current_correlation_id()
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s %(message)s", "%H:%M:%S")
+
+    def format(self, record):
+        line = super().format(record)
+        if record.cid:
+            line = line.replace(record.name, f"{record.name} [{record.cid}]", 1)
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.cid:
+            entry["cid"] = record.cid
+        for key, value in vars(record).items():
+            if key not in _STANDARD and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging(level=LOG_LEVEL, fmt=LOG_FORMAT, stream=None):
+    """Installs the queue handler on the "smartsaver" logger (once). Safe to call again."""
+    global _listener
+    with _setup_lock:
+        root = logging.getLogger(ROOT)
+        root.setLevel(level)
+        if _listener is not None:
+            return root
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+        records = queue.SimpleQueue()
+        handler = logging.handlers.QueueHandler(records)
+        handler.addFilter(_CorrelationFilter())
+        root.addHandler(handler)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        return root
+
+
+def stop_logging():
+    """Flushes queued records and stops the writer thread."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+            for handler in list(logging.getLogger(ROOT).handlers):
+                logging.getLogger(ROOT).removeHandler(handler)
+
+
+def get_logger(name):
+    """Logger under "smartsaver" ("Backend.db_ingest" -> "smartsaver.db_ingest")."""
+    setup_logging()
+    short = name.rsplit(".", 1)[-1] if name.startswith("Backend.") else name
+    return logging.getLogger(f"{ROOT}.{short}")
+
+
+# ------------------ PAYLOADS ------------------
+
+def truncate(payload, max_items=LOG_PAYLOAD_MAX_ITEMS, max_chars=LOG_PAYLOAD_MAX_CHARS):
+    """Short text for a list/dict/anything: the first max_items entries, at most max_chars."""
+    if isinstance(payload, dict):
+        items = list(payload.items())
+        shown = ", ".join(f"{k!r}: {v!r}" for k, v in items[:max_items])
+        text = "{" + shown + (f", ... +{len(items) - max_items} more" if len(items) > max_items else "") + "}"
+    elif isinstance(payload, (list, tuple)):
+        shown = ", ".join(repr(v) for v in payload[:max_items])
+        text = "[" + shown + (f", ... +{len(payload) - max_items} more" if len(payload) > max_items else "") + "]"
+    else:
+        text = repr(payload)
+    if len(text) > max_chars:
+        text = text[:max_chars] + f"... ({len(text)} chars)"
+    return text
+
+
+def debug_payload(logger, label, payload, sample=None, **fields):
+    """
+    Logs a truncated view of `payload` at DEBUG for a sample of calls.
+    Disabled DEBUG costs one isEnabledFor check: nothing is formatted.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    rate = LOG_PAYLOAD_SAMPLE if sample is None else sample
+    if rate < 1 and random.random() >= rate:
+        return
+    size = len(payload) if hasattr(payload, "__len__") else None
+    logger.debug("%s (%s items): %s", label, size, truncate(payload), extra=fields)
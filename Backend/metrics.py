@@ -0,0 +1,275 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Stage timings for the pipeline, stdlib only.
+#   - span("stage", **labels): times a block into a histogram
+#   - @timed("stage"): same for a whole (sync or async) function
+#   - request_context(cid): groups the spans of one request under a
+#     correlation id; finished traces are kept in a ring buffer
+# start_metrics_server() serves Prometheus text on /metrics and recent
+# traces as JSON on /traces (127.0.0.1:METRICS_PORT, 0 disables).
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+METRICS_TRACE_BUFFER = int(os.getenv("METRICS_TRACE_BUFFER", "200"))
+# Requests slower than this get their span breakdown logged
+METRICS_SLOW_REQUEST_SECONDS = float(os.getenv("METRICS_SLOW_REQUEST_SECONDS", "10"))
+
+# Seconds; covers a 1 ms dict lookup up to a minute-long scrape
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+PREFIX = "smartsaver"
+
+# Handlers come from log.py (which imports this module, hence no get_logger here)
+log = logging.getLogger("smartsaver.metrics")
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last = +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+_lock = threading.Lock()
+_histograms = {}   # (stage, labels) -> Histogram
+_errors = {}       # (stage, labels) -> count
+_collectors = []   # callables returning [(name, labels dict, value, type)]
+
+
+def observe(stage, seconds, error=False, **labels):
+    key = (stage, tuple(sorted(labels.items())))
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = Histogram()
+        hist.observe(seconds)
+        if error:
+            _errors[key] = _errors.get(key, 0) + 1
+
+    trace = _current.get()
+    if trace is not None:
+        trace.add(stage, seconds, labels, error)
+
+
+def stage_totals():
+    """{(stage, labels tuple): (calls, total seconds, errors)} so far."""
+    with _lock:
+        return {key: (h.count, h.total, _errors.get(key, 0)) for key, h in _histograms.items()}
+
+
+def register_collector(fn):
+    """fn() -> [(metric name, labels dict, value, "counter" | "gauge")], read at scrape time."""
+    _collectors.append(fn)
+    return fn
+
+
+# ------------------ REQUEST TRACES ------------------
+
+class RequestTrace:
+    def __init__(self, correlation_id):
+        self.id = correlation_id
+        self.started = time.time()
+        self.spans = []   # (stage, offset s, duration s, labels, error)
+
+    def add(self, stage, seconds, labels, error):
+        self.spans.append((stage, round(time.time() - self.started - seconds, 4), round(seconds, 4), labels, error))
+
+    def to_dict(self, duration):
+        return {
+            "id": self.id,
+            "started": self.started,
+            "duration": round(duration, 4),
+            "spans": [
+                {"stage": s, "offset": o, "duration": d, "labels": l, "error": e}
+                for s, o, d, l, e in self.spans
+            ],
+        }
+
+
+_current = contextvars.ContextVar("smartsaver_request", default=None)
+_traces = deque(maxlen=METRICS_TRACE_BUFFER)
+
+
+def current_correlation_id():
+    trace = _current.get()
+    return trace.id if trace else None
+
+
+@contextmanager
+def request_context(correlation_id=None, kind="request"):
+    """
+    Everything timed inside (including tasks and threads started from here)
+    is recorded under this correlation id.
+    """
+    trace = RequestTrace(correlation_id or uuid.uuid4().hex[:12])
+    token = _current.set(trace)
+    start = time.perf_counter()
+    error = False
+    try:
+        yield trace
+    except BaseException:
+        error = True
+        raise
+    finally:
+        _current.reset(token)
+        duration = time.perf_counter() - start
+        observe(f"{kind}_total", duration, error=error)
+        _traces.append(trace.to_dict(duration))
+        if duration >= METRICS_SLOW_REQUEST_SECONDS:
+            slowest = sorted(trace.spans, key=lambda s: -s[2])[:5]
+            breakdown = " | ".join(f"{s} {d:.2f}s" for s, _, d, _, _ in slowest)
+            log.warning("🐢 [%s] %s took %.2fs: %s", trace.id, kind, duration, breakdown)
+
+
+def recent_traces(limit=50):
+    return list(_traces)[-limit:]
+
+
+# ------------------ TIMERS ------------------
+
+@contextmanager
+def span(stage, **labels):
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        observe(stage, time.perf_counter() - start, error=error, **labels)
+
+
+async def timed_await(stage, awaitable, **labels):
+    """Times one awaitable, e.g. each coroutine handed to asyncio.gather."""
+    with span(stage, **labels):
+        return await awaitable
+
+
+def timed(stage, **labels):
+    """Decorator timing every call of a sync or async function."""
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage, **labels):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ------------------ EXPORT ------------------
+
+def _labels_text(labels):
+    if not labels:
+        return ""
+    parts = []
+    for k, v in labels:
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def render_prometheus():
+    """Prometheus text exposition format (0.0.4)."""
+    name = f"{PREFIX}_stage_duration_seconds"
+    lines = [f"# HELP {name} Time spent per pipeline stage.", f"# TYPE {name} histogram"]
+
+    with _lock:
+        snapshot = [(key, list(h.counts), h.total, h.count) for key, h in _histograms.items()]
+        errors = dict(_errors)
+
+    for (stage, labels), counts, total, count in sorted(snapshot):
+        base = (("stage", stage),) + labels
+        cumulative = 0
+        for bound, n in zip(BUCKETS + ("+Inf",), counts):
+            cumulative += n
+            lines.append(f"{name}_bucket{_labels_text(base + (('le', bound),))} {cumulative}")
+        lines.append(f"{name}_sum{_labels_text(base)} {total:.6f}")
+        lines.append(f"{name}_count{_labels_text(base)} {count}")
+
+    err_name = f"{PREFIX}_stage_errors_total"
+    lines += [f"# HELP {err_name} Stage calls that raised.", f"# TYPE {err_name} counter"]
+    for (stage, labels), n in sorted(errors.items()):
+        lines.append(f"{err_name}{_labels_text((('stage', stage),) + labels)} {n}")
+
+    typed = set()
+    for collector in _collectors:
+        try:
+            samples = collector()
+        except Exception as e:
+            log.warning("⚠️ Metrics collector failed: %s", e)
+            continue
+        for metric, labels, value, kind in samples:
+            metric = f"{PREFIX}_{metric}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} {kind}")
+                typed.add(metric)
+            lines.append(f"{metric}{_labels_text(tuple(sorted(labels.items())))} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/metrics"):
+            body = render_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path.startswith("/traces"):
+            body = json.dumps(recent_traces(), ensure_ascii=False).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+
+
+def start_metrics_server(host=METRICS_HOST, port=METRICS_PORT):
+    """Starts the metrics endpoint in a daemon thread (once). Returns the server or None."""
+    global _server
+    if _server is not None or not port:
+        return _server
+    try:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        log.warning("⚠️ Metrics server not started on %s:%s: %s", host, port, e)
+        return None
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+    log.info("📏 Metrics on http://%s:%s/metrics", host, _server.server_address[1])
+    return _server
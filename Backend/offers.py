@@ -0,0 +1,182 @@
+import importlib
+import os
+import re
+
+from .report_renderer import store_name
+
+# Offer aggregation behind get_ai_recommendation: per size, pick the cheapest
+# offer, compute savings vs the best price of every other store and flag
+# premium brands. Two implementations with identical output:
+#   - build_ai_payload_rows: single pass in plain Python (default)
+#   - build_ai_payload_columnar: pandas sort / dedupe / groupby pipeline
+# The payload itself is one dict per offer, so converting back out of the
+# DataFrame eats the vectorisation gain; benchmarks/bench_offers.py shows
+# the row-wise pass ahead at every size. OFFERS_ENGINE=pandas switches.
+# pandas is only imported by the columnar path (or warm_up()).
+
+STORES = ("blinkit", "zepto", "bigbasket")
+
+PREMIUM_BRANDS = ("amul", "nandini", "heritage", "tata", "nestle", "fortune", "organic", "premium")
+# Same semantics as `any(b in name.lower() for b in PREMIUM_BRANDS)`, one regex scan
+PREMIUM_BRAND_RE = re.compile("|".join(re.escape(b) for b in PREMIUM_BRANDS))
+
+OFFERS_ENGINE = os.getenv("OFFERS_ENGINE", "rows").lower()
+
+
+def is_premium_brand(name):
+    return PREMIUM_BRAND_RE.search(name.lower()) is not None
+
+
+def _savings_text(competitor_best_prices, winner_price):
+    savings_parts = []
+    if competitor_best_prices:
+        for store, price in competitor_best_prices:
+            diff = int(price - winner_price)
+            if diff > 0:
+                savings_parts.append(f"Save ₹{diff} vs {store_name(store)}")
+            else:
+                savings_parts.append(f"Price Match with {store_name(store)}")
+    else:
+        # If no competitors (only same store options), say this:
+        savings_parts.append("Lowest price across platforms")
+    return ", ".join(savings_parts)
+
+
+def _group_data(weight, winner, other_options, competitor_best_prices):
+    return {
+        "size": weight,
+        "best_deal": {
+            "winner_store": store_name(winner['store']),
+            "price": int(winner['price']),
+            "item": winner['product_name'],
+            "savings_analysis": _savings_text(competitor_best_prices, winner['price'])
+        },
+        "other_options": other_options # <-- still contains same-store items so brands can be checked
+    }
+
+
+# ------------------ ROW-WISE ------------------
+
+def build_ai_payload_rows(inventory_data):
+    ai_payload = []
+
+    for weight, products in inventory_data.items():
+        all_options = []
+        for p in products:
+            is_brand = is_premium_brand(p['name'])
+            for store in STORES:
+                if p[store] is not None:
+                    all_options.append({
+                        "store": store,
+                        "price": p[store],
+                        "product_name": p['name'],
+                        "is_brand": is_brand
+                    })
+
+        if not all_options: continue
+
+        # Sort & pick winner
+        all_options.sort(key=lambda x: x['price'])
+        winner = all_options[0]
+        other_options = all_options[1:]
+
+        # Lowest price per competitor (savings only against DIFFERENT stores)
+        competitor_best_prices = {}
+        for opt in other_options:
+            store = opt['store']
+            if store == winner['store']:
+                continue
+            if store not in competitor_best_prices or opt['price'] < competitor_best_prices[store]:
+                competitor_best_prices[store] = opt['price']
+
+        ai_payload.append(_group_data(weight, winner, other_options, list(competitor_best_prices.items())))
+
+    return ai_payload
+
+
+# ------------------ COLUMNAR ------------------
+
+def offers_frame(inventory_data):
+    """One row per (size group, product, store) offer, in the row-wise iteration order."""
+    import pandas as pd
+
+    cols = {"size_order": [], "size": [], "store": [], "price": [], "product_name": []}
+    for size_order, (weight, products) in enumerate(inventory_data.items()):
+        for p in products:
+            for store in STORES:
+                if p[store] is not None:
+                    cols["size_order"].append(size_order)
+                    cols["size"].append(weight)
+                    cols["store"].append(store)
+                    cols["price"].append(p[store])
+                    cols["product_name"].append(p['name'])
+
+    df = pd.DataFrame(cols)
+    df["seq"] = range(len(df))
+    # Brand flag computed once per distinct name
+    names = pd.Series(df["product_name"].unique())
+    brand_map = dict(zip(names, names.map(is_premium_brand)))
+    df["is_brand"] = df["product_name"].map(brand_map).astype(bool)
+    return df
+
+
+def build_ai_payload_columnar(inventory_data):
+    df = offers_frame(inventory_data)
+    if df.empty:
+        return []
+
+    # Stable price order inside each size group (seq breaks ties like list.sort)
+    df = df.sort_values(["size_order", "price", "seq"], ignore_index=True)
+    first = ~df["size_order"].duplicated()
+
+    winners = df[first].set_index("size_order")
+    others = df[~first]
+
+    # Best price per competitor store: first (= cheapest) row of each (size, store),
+    # excluding the winner's store, kept in price order
+    winner_store = others["size_order"].map(winners["store"])
+    competitors = others[others["store"] != winner_store].drop_duplicates(["size_order", "store"])
+    competitor_lists = {
+        size_order: list(zip(g["store"], g["price"]))
+        for size_order, g in competitors.groupby("size_order", sort=False)
+    }
+
+    # Back to plain dicts for the payload (column-wise .tolist() is far cheaper than to_dict)
+    options_by_group = {}
+    for size_order, store, price, name, is_brand in zip(
+        others["size_order"].tolist(), others["store"].tolist(), others["price"].tolist(),
+        others["product_name"].tolist(), others["is_brand"].tolist()
+    ):
+        options_by_group.setdefault(size_order, []).append(
+            {"store": store, "price": price, "product_name": name, "is_brand": is_brand}
+        )
+
+    ai_payload = []
+    for size_order, size, store, price, name in zip(
+        winners.index.tolist(), winners["size"].tolist(), winners["store"].tolist(),
+        winners["price"].tolist(), winners["product_name"].tolist()
+    ):
+        winner = {"store": store, "price": price, "product_name": name}
+        ai_payload.append(_group_data(
+            size,
+            winner,
+            options_by_group.get(size_order, []),
+            competitor_lists.get(size_order, [])
+        ))
+    return ai_payload
+
+
+def warm_up():
+    """Imports pandas now when the columnar engine is selected."""
+    if OFFERS_ENGINE == "pandas":
+        importlib.import_module("pandas")
+
+
+def build_ai_payload(inventory_data):
+    """
+    Picks the winner per size, computes savings vs other stores and
+    flags premium brands. Output feeds both the template renderer and the LLM.
+    """
+    if OFFERS_ENGINE == "pandas":
+        return build_ai_payload_columnar(inventory_data)
+    return build_ai_payload_rows(inventory_data)
@@ -0,0 +1,105 @@
+import re
+from collections import Counter
+
+from .vocabulary import get_vocabulary
+
+# Local, rule-based version of the semantic_filter prompt rules.
+# Marks obvious keeps / drops in microseconds so only ambiguous
+# names have to go to the LLM. Term lists live in vocabulary.json
+# ("filter_rules") and are recompiled whenever the vocabulary reloads.
+
+KEEP = True
+DROP = False
+
+# How each semantic_filter decision was made: rule / cache / llm / fallback
+FILTER_PROVENANCE = Counter()
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+_compiled_for = None
+_compiled = None
+
+
+def _term_pattern(terms):
+    if not terms:
+        return None
+    # Longest first so "ready to cook" wins over shorter overlaps
+    alternation = "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternation})\b")
+
+
+def _compiled_rules():
+    """Compiles the active vocabulary's term lists (once per vocabulary instance)."""
+    global _compiled_for, _compiled
+    vocab = get_vocabulary()
+    if _compiled_for is not vocab:
+        rules = vocab.filter_rules
+        _compiled = {
+            "drop": [
+                (group, _term_pattern(rules.get(group, ())))
+                for group in ("cooked", "derivatives", "accessories")
+            ],
+            "varieties": {q: _term_pattern(terms) for q, terms in rules.get("varieties", {}).items()},
+            "neutral": rules.get("neutral", frozenset()),
+        }
+        _compiled_for = vocab
+    return vocab, _compiled
+
+
+def classify(query, name):
+    """
+    Returns (verdict, reason) for one product name.
+    verdict is KEEP, DROP or None (ambiguous -> ask the LLM).
+    """
+    vocab, rules = _compiled_rules()
+    query = " ".join(query.lower().split())
+    name = " ".join(name.lower().split())
+    keywords = vocab.synonyms.get(query, (query,))
+
+    if not any(kw in name for kw in keywords):
+        return None, "no-keyword"
+
+    # Drop rules only apply when the user didn't ask for that term
+    for group, pattern in rules["drop"]:
+        if pattern is None:
+            continue
+        for match in pattern.finditer(name):
+            if match.group(0) not in query:
+                return DROP, f"{group}:{match.group(0)}"
+
+    variety = rules["varieties"].get(query)
+    if variety is not None:
+        match = variety.search(name)
+        if match and match.group(0) not in query:
+            return DROP, f"variety:{match.group(0)}"
+
+    # Keep when nothing but the query term + neutral modifiers remains
+    rest = name
+    for kw in sorted(keywords, key=len, reverse=True):
+        rest = rest.replace(kw, " ")
+    leftover = [
+        w for w in _WORD_RE.findall(rest)
+        if w not in rules["neutral"] and w not in query
+    ]
+    if not leftover:
+        return KEEP, "plain"
+
+    return None, "ambiguous"
+
+
+def prefilter(query, names):
+    """
+    Classifies many names at once.
+    Returns ({name: verdict}, {name: reason}, [ambiguous names]).
+    """
+    verdicts = {}
+    reasons = {}
+    ambiguous = []
+    for name in names:
+        verdict, reason = classify(query, name)
+        reasons[name] = reason
+        if verdict is None:
+            ambiguous.append(name)
+        else:
+            verdicts[name] = verdict
+    return verdicts, reasons, ambiguous
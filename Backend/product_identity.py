@@ -0,0 +1,182 @@
+from collections import defaultdict
+
+from sqlalchemy import text
+
+from .alignment import ALIGN_THRESHOLD, brand_key, name_tokens, pair_score
+from .data_cleaner import clean_product_name
+from .log import get_logger
+
+log = get_logger(__name__)
+
+# Persistent product identity: (source, product_name, size) -> canonical product id.
+# Ids are assigned incrementally at ingest, so request-time alignment is a
+# lookup instead of fuzzy matching, and the id is a stable key for caches/history.
+
+SCHEMA_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS canonical_products (
+        id BIGSERIAL PRIMARY KEY,
+        canonical_name TEXT NOT NULL,
+        size TEXT NOT NULL,
+        created_at TIMESTAMP NOT NULL DEFAULT NOW()
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_canonical_products_size ON canonical_products (size)",
+    """
+    CREATE TABLE IF NOT EXISTS product_identity (
+        source TEXT NOT NULL,
+        product_name TEXT NOT NULL,
+        size TEXT NOT NULL,
+        canonical_id BIGINT NOT NULL REFERENCES canonical_products (id),
+        updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (source, product_name, size)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_product_identity_canonical ON product_identity (canonical_id)",
+]
+
+_schema_ready = False
+
+
+def ensure_identity_schema(db):
+    global _schema_ready
+    if _schema_ready:
+        return
+    for stmt in SCHEMA_SQL:
+        db.execute(text(stmt))
+    db.commit()
+    _schema_ready = True
+
+
+# ------------------ MATCHING ------------------
+
+class _SizeIndex:
+    """Canonical products of one size, blocked by token for incremental matching."""
+
+    def __init__(self):
+        self.products = []              # (id, tokens, brand, sources)
+        self.postings = defaultdict(list)
+
+    def add(self, canonical_id, name, sources):
+        tokens = name_tokens(name)
+        pos = len(self.products)
+        self.products.append((canonical_id, tokens, brand_key(name), set(sources)))
+        for t in tokens:
+            self.postings[t].append(pos)
+        return pos
+
+    def best_match(self, name, source):
+        tokens = name_tokens(name)
+        brand = brand_key(name)
+        seen = set()
+        best = None
+        for t in sorted(tokens):
+            for pos in self.postings.get(t, ()):
+                if pos in seen:
+                    continue
+                seen.add(pos)
+                cid, c_tokens, c_brand, sources = self.products[pos]
+                if source in sources:
+                    continue
+                score = pair_score(tokens, c_tokens, brand, c_brand)
+                if score > ALIGN_THRESHOLD and (best is None or (score, -cid) > (best[0], -best[1])):
+                    best = (score, cid, pos)
+        return best
+
+
+def _load_index(db, sizes):
+    rows = db.execute(
+        text("""
+            SELECT c.id, c.canonical_name, c.size, pi.source
+            FROM canonical_products c
+            LEFT JOIN product_identity pi ON pi.canonical_id = c.id
+            WHERE c.size = ANY(:sizes)
+            ORDER BY c.id
+        """),
+        {"sizes": list(sizes)}
+    ).fetchall()
+
+    grouped = {}
+    for r in rows:
+        entry = grouped.setdefault(r.id, (r.canonical_name, r.size, set()))
+        if r.source:
+            entry[2].add(r.source)
+
+    index = defaultdict(_SizeIndex)
+    for cid, (name, size, sources) in grouped.items():
+        index[size].add(cid, name, sources)
+    return index
+
+
+# ------------------ PUBLIC API ------------------
+
+def _fetch_identities(db, product_names):
+    rows = db.execute(
+        text("""
+            SELECT source, product_name, size, canonical_id
+            FROM product_identity WHERE product_name = ANY(:names)
+        """),
+        {"names": sorted({clean_product_name(n) for n in product_names})}
+    ).fetchall()
+    return {(r.source, r.product_name, r.size): r.canonical_id for r in rows}
+
+
+def lookup_canonical_ids(db, product_names):
+    """Returns {(source, clean name, size): canonical_id} for the given names."""
+    if not product_names:
+        return {}
+    try:
+        return _fetch_identities(db, product_names)
+    except Exception as e:
+        # Table not created yet (no ingest since deploy): fall back to fuzzy alignment
+        log.warning("⚠️ Product identity lookup failed: %s", e)
+        db.rollback()
+        return {}
+
+
+def assign_canonical_ids(db, listings):
+    """
+    Maps freshly ingested listings ({"source", "product_name", "size"}) to
+    canonical products, creating new ones where nothing matches.
+    Returns {(source, product_name, size): canonical_id}.
+    Does not commit; call ensure_identity_schema() once beforehand.
+    """
+    keys = sorted({(l["source"], clean_product_name(l["product_name"]), l["size"]) for l in listings})
+    if not keys:
+        return {}
+
+    known = _fetch_identities(db, [name for _, name, _ in keys])
+    pending = [k for k in keys if k not in known]
+    if not pending:
+        return {k: known[k] for k in keys}
+
+    index = _load_index(db, {size for _, _, size in pending})
+    assigned = {}
+
+    for source, name, size in pending:
+        size_index = index[size]
+        match = size_index.best_match(name, source)
+
+        if match:
+            _, cid, pos = match
+            size_index.products[pos][3].add(source)
+        else:
+            cid = db.execute(
+                text("INSERT INTO canonical_products (canonical_name, size) VALUES (:n, :s) RETURNING id"),
+                {"n": name, "s": size}
+            ).scalar()
+            size_index.add(cid, name, [source])
+
+        db.execute(
+            text("""
+                INSERT INTO product_identity (source, product_name, size, canonical_id, updated_at)
+                VALUES (:source, :name, :size, :cid, NOW())
+                ON CONFLICT (source, product_name, size)
+                DO UPDATE SET canonical_id = EXCLUDED.canonical_id, updated_at = NOW()
+            """),
+            {"source": source, "name": name, "size": size, "cid": cid}
+        )
+        assigned[(source, name, size)] = cid
+
+    log.debug("🆔 Product identity: %d known, %d new mappings", len(known), len(assigned))
+    return {k: known.get(k, assigned.get(k)) for k in keys}
@@ -0,0 +1,239 @@
+import asyncio
+import contextvars
+import cProfile
+import functools
+import os
+import random
+import re
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+
+from .log import get_logger
+from .metrics import current_correlation_id
+
+# Opt-in profiling of single pipeline runs, stdlib only.
+#   @profiled("process_item_logic") on a coroutine function; a call is profiled when
+#     - PROFILE_TARGETS names it (or is "all"), for a PROFILE_RATE share of calls, or
+#     - it runs inside profile_request(...): the bot's /profile command and the
+#       webhook's X-SmartSaver-Profile header use this
+# A profiled run writes to PROFILE_DIR:
+#   <time>-<name>.folded      sampled stacks (flamegraph.pl / speedscope input)
+#   <time>-<name>.pstats      cProfile of the loop thread (PROFILE_MODE=cprofile)
+#   <time>-<name>.stalls.txt  event loop stalls over PROFILE_STALL_MS, with the blocking stack
+# Disabled, a wrapped call costs a contextvar read and a set lookup.
+# One run is profiled at a time (nested and concurrent calls run unprofiled),
+# but the profilers see the whole process: requests running alongside it
+# show up in its output too.
+
+PROFILE_TARGETS = {t.strip() for t in os.getenv("PROFILE_TARGETS", "").split(",") if t.strip()}
+PROFILE_RATE = float(os.getenv("PROFILE_RATE", "1"))
+# "sample" (stack sampling, low overhead) or "cprofile" (deterministic, slower)
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sample").lower()
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "profiles")
+)
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_STALL_MS = float(os.getenv("PROFILE_STALL_MS", "100"))
+
+log = get_logger(__name__)
+
+
+# ------------------ REQUESTS ------------------
+
+class ProfileRequest:
+    """Asks for the profiled runs under it to be profiled; collects the files written."""
+
+    def __init__(self, label, mode=None):
+        self.label = label
+        self.mode = mode or PROFILE_MODE
+        self.outputs = []
+
+    def summary(self):
+        if not self.outputs:
+            return "🔬 No profile written (another run was being profiled)."
+        return "🔬 Profile written:\n" + "\n".join(self.outputs)
+
+
+_requested = contextvars.ContextVar("smartsaver_profile", default=None)
+
+
+@contextmanager
+def profile_request(label, mode=None, enabled=True):
+    """Profiles the profiled functions awaited inside (tasks started here included). Yields the request or None."""
+    if not enabled:
+        yield None
+        return
+    request = ProfileRequest(label, mode)
+    token = _requested.set(request)
+    try:
+        yield request
+    finally:
+        _requested.reset(token)
+
+
+def profile_requested():
+    return _requested.get() is not None
+
+
+# ------------------ SESSIONS ------------------
+
+def _frame_name(code):
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(thread_name, frame):
+    parts = []
+    while frame is not None:
+        parts.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    parts.append(thread_name)
+    return ";".join(reversed(parts))
+
+
+_active = None
+
+
+class ProfileSession:
+    """
+    Samples the event loop thread and the default executor threads
+    (asyncio.to_thread work) from a watcher thread, which also reports
+    loop stalls: a loop callback stamps a heartbeat every interval, and
+    when it is late by more than stall_ms the loop thread's stack (the
+    code blocking it) is recorded.
+    """
+
+    def __init__(self, name, mode=PROFILE_MODE, interval_ms=PROFILE_INTERVAL_MS,
+                 stall_ms=PROFILE_STALL_MS, out_dir=PROFILE_DIR):
+        self.name = name
+        self.mode = mode
+        self.interval = max(interval_ms, 1) / 1000
+        self.stall = stall_ms / 1000
+        self.out_dir = out_dir
+        self.stacks = Counter()   # folded stack -> samples
+        self.samples = 0
+        self.stalls = []          # (offset s, duration s, stack lines)
+        self.duration = 0.0
+        self._profile = None
+        self._done = threading.Event()
+
+    def start(self):
+        global _active
+        _active = self
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self.started = self._beat = time.perf_counter()
+        self._handle = self._loop.call_later(self.interval, self._heartbeat)
+        self._thread = threading.Thread(target=self._watch, name="smartsaver-profiler", daemon=True)
+        self._thread.start()
+        if self.mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self):
+        """Stops profiling and writes the output files. Returns their paths."""
+        global _active
+        if self._profile is not None:
+            self._profile.disable()
+        self.duration = time.perf_counter() - self.started
+        self._handle.cancel()
+        self._done.set()
+        self._thread.join()
+        _active = None
+        try:
+            return self._write()
+        except OSError as e:
+            log.warning("⚠️ Writing the %s profile failed: %s", self.name, e)
+            return []
+
+    def _heartbeat(self):
+        self._beat = time.perf_counter()
+        self._handle = self._loop.call_later(self.interval, self._heartbeat)
+
+    def _watch(self):
+        stall = None   # [start, stack lines] of the stall in progress
+        while not self._done.wait(self.interval):
+            frames = sys._current_frames()
+            names = {
+                t.ident: t.name for t in threading.enumerate()
+                if t.ident == self._loop_thread or t.name.startswith("asyncio_")
+            }
+
+            if self.mode == "sample":
+                for ident, name in names.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        self.stacks[_collapse(name, frame)] += 1
+                self.samples += 1
+
+            expected = self._beat + self.interval
+            if time.perf_counter() - expected >= self.stall:
+                if stall is None:
+                    frame = frames.get(self._loop_thread)
+                    stall = [expected, traceback.format_stack(frame) if frame else []]
+            elif stall is not None:
+                self.stalls.append((stall[0] - self.started, self._beat - stall[0], stall[1]))
+                stall = None
+
+        if stall is not None:
+            self.stalls.append((stall[0] - self.started, time.perf_counter() - stall[0], stall[1]))
+
+    def _write(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        label = re.sub(r"[^\w.-]+", "_", self.name)
+        base = os.path.join(self.out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{label}")
+        paths = []
+
+        if self.stacks:
+            with open(base + ".folded", "w", encoding="utf-8") as f:
+                for stack, count in self.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            paths.append(base + ".folded")
+
+        if self._profile is not None:
+            self._profile.dump_stats(base + ".pstats")
+            paths.append(base + ".pstats")
+
+        if self.stalls:
+            with open(base + ".stalls.txt", "w", encoding="utf-8") as f:
+                f.write(f"# {len(self.stalls)} event loop stall(s) over {self.stall * 1000:.0f} ms "
+                        f"during {self.name} ({self.duration:.2f}s)\n")
+                for offset, seconds, stack in self.stalls:
+                    f.write(f"\nstall at +{offset:.3f}s, {seconds * 1000:.0f} ms, loop thread was in:\n")
+                    f.writelines(stack)
+            paths.append(base + ".stalls.txt")
+
+        log.info("🔬 Profiled %s in %.2fs: %d samples, %d loop stalls -> %s",
+                 self.name, self.duration, self.samples, len(self.stalls), ", ".join(paths) or "nothing")
+        return paths
+
+
+# ------------------ DECORATOR ------------------
+
+def profiled(name):
+    """Decorator for coroutine functions: profiles a call when it is enabled or requested (see above)."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            request = _requested.get()
+            if request is None and name not in PROFILE_TARGETS and "all" not in PROFILE_TARGETS:
+                return await fn(*args, **kwargs)
+            if _active is not None or (request is None and PROFILE_RATE < 1 and random.random() >= PROFILE_RATE):
+                return await fn(*args, **kwargs)
+
+            label = request.label if request else current_correlation_id()
+            session = ProfileSession(f"{name}-{label}" if label else name,
+                                     mode=request.mode if request else PROFILE_MODE)
+            session.start()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                paths = session.stop()
+                if request is not None:
+                    request.outputs.extend(paths)
+        return wrapper
+    return decorate
@@ -0,0 +1,123 @@
+import json
+import os
+from collections import Counter
+
+from .report_renderer import STORE_NAMES
+
+# Compact encodings for the LLM prompts in ai_reco + a cheap token estimator.
+# Instead of indented JSON with repeated keys, offers are sent as "|"-separated
+# rows with short store codes, a brand flag and "=" for a repeated product name.
+
+LLM_PROMPT_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "3000"))
+PROMPT_MAX_NAME_LEN = int(os.getenv("PROMPT_MAX_NAME_LEN", "60"))
+
+STORE_CODES = {"blinkit": "bl", "zepto": "ze", "bigbasket": "bb"}
+
+REPORT_ROWS_LEGEND = (
+    "Stores: " + ", ".join(f"{code}={STORE_NAMES[store]}" for store, code in STORE_CODES.items()) + ". "
+    "'#size' starts a size group. "
+    "W|store|price|item|savings = best deal. "
+    "O|store|price|item|B = other option (B = premium brand, '=' = same item as the best deal)."
+)
+
+# tokens estimated / saved by the compact encodings (process lifetime)
+PROMPT_TOKEN_STATS = Counter()
+
+
+def estimate_tokens(text):
+    """
+    Cheap token estimate: ~4 ASCII characters per token,
+    non-ASCII (₹, emojis, Devanagari) roughly one token each.
+    """
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return (len(text) - non_ascii) // 4 + non_ascii + 1
+
+
+def truncate_name(name, max_len=PROMPT_MAX_NAME_LEN):
+    name = " ".join(str(name).split())
+    return name if len(name) <= max_len else name[:max_len - 1].rstrip() + "…"
+
+
+def _clean(value):
+    return str(value).replace("|", "/").replace("\n", " ")
+
+
+def _price(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else f"{value:.2f}"
+
+
+# ------------------ SEMANTIC FILTER ------------------
+
+def encode_filter_names(names, max_name_len=PROMPT_MAX_NAME_LEN, indent=""):
+    return "\n".join(f"{indent}{i}: {truncate_name(n, max_name_len)}" for i, n in enumerate(names))
+
+
+def filter_names_tokens(names, max_name_len=PROMPT_MAX_NAME_LEN):
+    return sum(estimate_tokens(f"0: {truncate_name(n, max_name_len)}\n") for n in names)
+
+
+# ------------------ RECOMMENDATION ------------------
+
+def encode_report_rows(ai_payload, max_options=None, brands_only=False, max_name_len=PROMPT_MAX_NAME_LEN):
+    lines = []
+    for group in ai_payload:
+        deal = group["best_deal"]
+        winner_item = deal["item"]
+        lines.append(f"#{_clean(group['size'])}")
+        lines.append(
+            f"W|{STORE_CODES.get(deal['winner_store'].lower(), deal['winner_store'].lower())}"
+            f"|{_price(deal['price'])}|{_clean(truncate_name(winner_item, max_name_len))}"
+            f"|{_clean(deal['savings_analysis'])}"
+        )
+
+        options = group.get("other_options", [])
+        if brands_only:
+            options = [o for o in options if o.get("is_brand")]
+        if max_options is not None:
+            options = options[:max_options]
+
+        for opt in options:
+            name = "=" if opt["product_name"] == winner_item else _clean(truncate_name(opt["product_name"], max_name_len))
+            lines.append(
+                f"O|{STORE_CODES.get(opt['store'], opt['store'])}|{_price(opt['price'])}"
+                f"|{name}|{'B' if opt.get('is_brand') else ''}"
+            )
+    return "\n".join(lines)
+
+
+def encode_report_payload(ai_payload, budget=None):
+    """
+    Encodes the payload as compact rows, trimming other_options (then names,
+    then trailing size groups) until the estimate fits the token budget.
+    Returns (text, info) where info has tokens / baseline_tokens / saved.
+    """
+    budget = budget or LLM_PROMPT_TOKEN_BUDGET
+    baseline = estimate_tokens(json.dumps(ai_payload, indent=2, ensure_ascii=False))
+
+    attempts = [
+        {},
+        {"max_options": 5},
+        {"max_options": 3, "brands_only": True},
+        {"max_options": 1, "brands_only": True, "max_name_len": 32},
+    ]
+    payload = list(ai_payload)
+    while True:
+        for opts in attempts:
+            text = encode_report_rows(payload, **opts)
+            tokens = estimate_tokens(text)
+            if tokens <= budget:
+                break
+        if tokens <= budget or len(payload) <= 1:
+            break
+        payload = payload[:-1]  # still too big: drop the last size group
+
+    info = {
+        "tokens": tokens,
+        "baseline_tokens": baseline,
+        "saved": max(0, baseline - tokens),
+        "groups_dropped": len(ai_payload) - len(payload),
+    }
+    PROMPT_TOKEN_STATS["report_tokens"] += tokens
+    PROMPT_TOKEN_STATS["report_saved"] += info["saved"]
+    return text, info
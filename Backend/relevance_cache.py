@@ -0,0 +1,138 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Persistent keep/drop verdicts from semantic_filter, keyed by
+# (canonical query, normalized product name). Verdicts like
+# "Onion Pakoda is irrelevant to onion" never change, so we only
+# ask the LLM about names we have not seen before.
+RELEVANCE_CACHE_PATH = os.getenv(
+    "RELEVANCE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "relevance_cache.sqlite3")
+)
+RELEVANCE_CACHE_TTL_DAYS = float(os.getenv("RELEVANCE_CACHE_TTL_DAYS", "30"))
+RELEVANCE_CACHE_MAX_ROWS = int(os.getenv("RELEVANCE_CACHE_MAX_ROWS", "200000"))
+
+
+def canonical_query(query):
+    return " ".join(query.lower().split())
+
+
+def normalize_name(name):
+    return " ".join(name.lower().split())
+
+
+class RelevanceCache:
+    """
+    SQLite-backed verdict cache with TTL and LRU eviction.
+    All methods are blocking; call them via asyncio.to_thread.
+    """
+
+    def __init__(self, path=RELEVANCE_CACHE_PATH,
+                 ttl_days=RELEVANCE_CACHE_TTL_DAYS, max_rows=RELEVANCE_CACHE_MAX_ROWS):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.ttl_seconds = ttl_days * 86400
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS relevance_verdicts (
+                query TEXT NOT NULL,
+                name TEXT NOT NULL,
+                keep INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (query, name)
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_relevance_last_used ON relevance_verdicts (last_used)"
+        )
+        self._conn.commit()
+
+    def get_many(self, query, names):
+        """Returns {normalized_name: keep} for every fresh cached verdict."""
+        query = canonical_query(query)
+        keys = sorted({normalize_name(n) for n in names})
+        if not keys:
+            return {}
+
+        now = time.time()
+        min_created = now - self.ttl_seconds
+        found = {}
+
+        with self._lock:
+            # Chunked to stay below SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT name, keep FROM relevance_verdicts "
+                    f"WHERE query = ? AND created_at >= ? AND name IN ({marks})",
+                    [query, min_created, *chunk]
+                ).fetchall()
+                found.update((name, bool(keep)) for name, keep in rows)
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE relevance_verdicts SET last_used = ? WHERE query = ? AND name = ?",
+                    [(now, query, name) for name in found]
+                )
+                self._conn.commit()
+
+        return found
+
+    def put_many(self, query, verdicts):
+        """Stores {product_name: keep} verdicts and evicts stale / least-recently-used rows."""
+        query = canonical_query(query)
+        if not verdicts:
+            return
+
+        now = time.time()
+        rows = [(query, normalize_name(n), int(bool(k)), now, now) for n, k in verdicts.items()]
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO relevance_verdicts (query, name, keep, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.execute(
+                "DELETE FROM relevance_verdicts WHERE created_at < ?",
+                (now - self.ttl_seconds,)
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM relevance_verdicts").fetchone()[0]
+            if count > self.max_rows:
+                # Trim to 90% so we don't evict on every single insert
+                self._conn.execute(
+                    "DELETE FROM relevance_verdicts WHERE rowid IN ("
+                    "SELECT rowid FROM relevance_verdicts ORDER BY last_used LIMIT ?)",
+                    (count - int(self.max_rows * 0.9),)
+                )
+            self._conn.commit()
+
+    def invalidate(self, query=None):
+        """Drops verdicts for one query (or everything)."""
+        with self._lock:
+            if query is None:
+                self._conn.execute("DELETE FROM relevance_verdicts")
+            else:
+                self._conn.execute(
+                    "DELETE FROM relevance_verdicts WHERE query = ?", (canonical_query(query),)
+                )
+            self._conn.commit()
+
+
+_cache = None
+_cache_lock = threading.Lock()   # also reached from worker threads (asyncio.to_thread)
+
+
+def get_relevance_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RelevanceCache()
+        return _cache
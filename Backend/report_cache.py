@@ -0,0 +1,153 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .vocabulary import get_vocabulary
+
+# Cache of finished process_item_logic results.
+# Key = (canonical query, data version of that query, vocabulary version, report mode).
+# The data version is read from the stored rows themselves (ai_reco.get_data_versions:
+# row count + newest scraped_at), so new rows written by any process, the bot
+# or a CLI / cron ingest, change the key and stale reports are never served.
+# Callers keep the key returned by get() and put() under it: a report built
+# from rows read before an ingest can't land under the newer version.
+# Memory tier is an LRU; the optional disk tier (REPORT_CACHE_DISK_PATH)
+# survives restarts.
+
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "1000"))
+REPORT_CACHE_TTL_SECONDS = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "21600"))
+REPORT_CACHE_DISK_PATH = os.getenv("REPORT_CACHE_DISK_PATH", "")
+
+
+def canonical_query(query):
+    return " ".join(query.lower().split())
+
+
+class ReportCache:
+    def __init__(self, max_entries=REPORT_CACHE_MAX_ENTRIES, ttl_seconds=REPORT_CACHE_TTL_SECONDS,
+                 disk_path=REPORT_CACHE_DISK_PATH):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()   # key -> (stored_at, result)
+        self._lock = threading.Lock()
+        self._disk = None
+        self.hits = 0
+        self.misses = 0
+
+        if disk_path:
+            if disk_path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute("""
+                CREATE TABLE IF NOT EXISTS reports (
+                    key TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    result TEXT NOT NULL
+                )
+            """)
+            self._disk.execute("CREATE INDEX IF NOT EXISTS idx_reports_query ON reports (query)")
+            self._disk.commit()
+
+    def key(self, query, mode, data_version):
+        return f"{canonical_query(query)}|d{data_version}|v{get_vocabulary().version}|{mode}"
+
+    # ------------------ MEMORY TIER ------------------
+
+    def get_memory(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            stored_at, result = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return result
+
+    def _remember(self, key, stored_at, result):
+        with self._lock:
+            self._memory[key] = (stored_at, result)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    # ------------------ DISK TIER (blocking) ------------------
+
+    def get_disk(self, key):
+        if self._disk is None:
+            return None
+        with self._lock:
+            row = self._disk.execute(
+                "SELECT stored_at, result FROM reports WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[0] > self.ttl_seconds:
+            return None
+        result = json.loads(row[1])
+        self._remember(key, row[0], result)
+        return result
+
+    def put_disk(self, key, query, stored_at, result):
+        if self._disk is None:
+            return
+        with self._lock:
+            self._disk.execute(
+                "INSERT OR REPLACE INTO reports (key, query, stored_at, result) VALUES (?, ?, ?, ?)",
+                (key, canonical_query(query), stored_at, json.dumps(result, ensure_ascii=False))
+            )
+            self._disk.execute(
+                "DELETE FROM reports WHERE stored_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self._disk.commit()
+
+    # ------------------ PUBLIC ------------------
+
+    async def get(self, query, mode, data_version):
+        """Returns (key, cached result or None); put() the fresh result under that key."""
+        key = self.key(query, mode, data_version)
+        result = self.get_memory(key)
+        if result is None and self._disk is not None:
+            result = await asyncio.to_thread(self.get_disk, key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return key, result
+
+    async def put(self, key, query, result):
+        stored_at = time.time()
+        self._remember(key, stored_at, result)
+        if self._disk is not None:
+            await asyncio.to_thread(self.put_disk, key, query, stored_at, result)
+
+    def invalidate(self, query):
+        """
+        New data for `query`: drops its stored reports. Only frees space
+        early; the changed data version already keeps them from being served.
+        """
+        query = canonical_query(query)
+        with self._lock:
+            prefix = f"{query}|"
+            for key in [k for k in self._memory if k.startswith(prefix)]:
+                del self._memory[key]
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM reports WHERE query = ?", (query,))
+                self._disk.commit()
+
+
+_cache = None
+_cache_lock = threading.Lock()   # also reached from worker threads (asyncio.to_thread)
+
+
+def get_report_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ReportCache()
+        return _cache
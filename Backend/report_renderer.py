@@ -0,0 +1,96 @@
+# Deterministic renderer for the Telegram buying guide.
+# Produces the same 🏆 / 📉 / 💡 layout the LLM is asked to write
+# (see the few-shot examples in ai_reco.get_ai_recommendation),
+# directly from the payload built by ai_reco.build_ai_payload.
+
+_MD_SPECIAL = ("\\", "_", "*", "`", "[")
+
+# How stores are written to users, by the template and (via prompt_codec) the LLM
+STORE_NAMES = {"blinkit": "Blinkit", "zepto": "Zepto", "bigbasket": "BigBasket"}
+
+
+def store_name(store):
+    return STORE_NAMES.get(store, str(store).title())
+
+
+def md_escape(text):
+    """Escapes Telegram (legacy) Markdown characters in scraped names."""
+    text = str(text)
+    for ch in _MD_SPECIAL:
+        text = text.replace(ch, "\\" + ch)
+    return text
+
+
+def format_price(price):
+    price = float(price)
+    return f"₹{int(price)}" if price.is_integer() else f"₹{price:.2f}"
+
+
+def pick_tip(group):
+    """Cheapest premium-brand option that is not the winning product itself."""
+    winner_item = group["best_deal"]["item"]
+    for opt in group.get("other_options", []):
+        if opt.get("is_brand") and opt["product_name"] != winner_item:
+            return opt
+    return None
+
+
+def render_group(group):
+    deal = group["best_deal"]
+    lines = [
+        f"🔹 {md_escape(group['size'])}",
+        f"   🏆 {deal['winner_store']} • {md_escape(deal['item'])} • {format_price(deal['price'])}",
+        f"   📉 {deal['savings_analysis']}",
+    ]
+
+    tip = pick_tip(group)
+    if tip:
+        lines.append(
+            f"   💡 Tip: Upgrade to {md_escape(tip['product_name'])} "
+            f"for {format_price(tip['price'])} ({store_name(tip['store'])})"
+        )
+
+    return "\n".join(lines)
+
+
+def render_report(query, ai_payload):
+    header = f"📊 Best Prices for {md_escape(query.upper())}"
+    if not ai_payload:
+        return header + "\n\nNo comparable offers found."
+
+    return header + "\n\n" + "\n\n".join(render_group(g) for g in ai_payload)
+
+
+def render_basket_plan(plan, rows, baseline=None):
+    """
+    Message for a basket_optimizer plan. `rows` is {query: item_offers(...)}
+    (for sizes and product names); `baseline` the cheapest-per-item plan.
+    """
+    lines = ["🧺 *Cheapest way to buy your basket*", ""]
+
+    for store, order in plan["stores"].items():
+        fee = order["delivery_fee"]
+        fee_text = "free delivery" if not fee else f"{format_price(fee)} delivery"
+        lines.append(f"🛒 {store_name(store)} • {format_price(order['subtotal'])} + {fee_text}")
+        for query, price in order["items"]:
+            row = rows[query]
+            lines.append(
+                f"   • {md_escape(row['names'][store])} ({md_escape(row['size'])}) • {format_price(price)}"
+            )
+        lines.append("")
+
+    lines.append(
+        f"💰 Total {format_price(plan['total'])} "
+        f"(items {format_price(plan['items_total'])} + delivery {format_price(plan['fees'])})"
+    )
+
+    if baseline and baseline["total"] > plan["total"] and baseline["total"] != float("inf"):
+        lines.append(
+            f"📉 Saves {format_price(baseline['total'] - plan['total'])} vs buying every item "
+            f"at its cheapest store"
+        )
+
+    if plan["unavailable"]:
+        lines.append(f"⚠️ Not in this split: {md_escape(', '.join(plan['unavailable']))}")
+
+    return "\n".join(lines)
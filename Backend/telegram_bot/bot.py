@@ -1,5 +1,6 @@
 # telegram_bot/bot.py
 
+import asyncio
 import os
 from dotenv import load_dotenv
 from telegram.ext import (
@@ -7,28 +8,86 @@ from telegram.ext import (
     CommandHandler,
     MessageHandler,
     CallbackQueryHandler,
+    TypeHandler,
     ContextTypes,
     filters
 )
 from telegram import Update
 
-from .handlers import start, text_handler, callback_handler
+from Backend.log import get_logger
+from Backend.metrics import start_metrics_server
+from Backend.vocabulary import get_vocabulary, watch_vocabulary
+from .handlers import start, reload_vocab, profile_compare, text_handler, callback_handler
+from .jobs import get_compare_queue
+from .middleware import rate_limit_gate
+from .session_store import get_session_store
 
 # --------------------
 # Load environment
 # --------------------
 load_dotenv()
+log = get_logger("telegram_bot.bot")
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 
 if not BOT_TOKEN or ":" not in BOT_TOKEN:
     raise RuntimeError("❌ TELEGRAM_BOT_TOKEN is missing or invalid")
 
+# 0 disables the vocabulary file watcher (use /reload_vocab instead)
+VOCABULARY_WATCH_SECONDS = float(os.getenv("VOCABULARY_WATCH_SECONDS", "30"))
+
+# Updates handled at the same time. Comparisons run on the job queue
+# (jobs.py), so handlers are short; this keeps slow Telegram sends of one
+# chat from holding up the others.
+BOT_CONCURRENT_UPDATES = int(os.getenv("BOT_CONCURRENT_UPDATES", "64"))
+
+# "polling" (default) or "webhook" (see webhook.py for its settings)
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+# Bot API endpoint; point it at loadtest/fake_telegram.py for local runs
+TELEGRAM_API_BASE_URL = os.getenv("TELEGRAM_API_BASE_URL", "")
+
+# The pipeline (SQLAlchemy, Groq, Playwright...) isn't imported at
+# startup. "background" (default) loads it right after startup without
+# delaying the first updates, "blocking" before them, "off" on first use.
+BOT_WARMUP = os.getenv("BOT_WARMUP", "background").lower()
+
+
+# --------------------
+# Startup hooks
+# --------------------
+def warm_up_pipeline():
+    try:
+        from Backend.ai_reco import warm_up
+        warm_up()
+    except Exception as e:
+        log.warning("⚠️ Pipeline warm-up failed: %s", e)
+
+
+async def post_init(app):
+    get_vocabulary()
+
+    if VOCABULARY_WATCH_SECONDS > 0:
+        app.create_task(watch_vocabulary(interval=VOCABULARY_WATCH_SECONDS))
+
+    get_compare_queue().start()
+    get_session_store().start()
+    start_metrics_server()
+
+    if BOT_WARMUP == "blocking":
+        await asyncio.to_thread(warm_up_pipeline)
+    elif BOT_WARMUP != "off":
+        app.create_task(asyncio.to_thread(warm_up_pipeline))
+
+
+async def post_shutdown(app):
+    await get_compare_queue().stop()
+    await get_session_store().stop()
+
 
 # --------------------
 # Global error handler
 # --------------------
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE):
-    print("⚠️ Telegram bot error:", context.error)
+    log.error("⚠️ Telegram bot error: %s", context.error, exc_info=context.error)
 
     if isinstance(update, Update) and update.effective_chat:
         try:
@@ -41,20 +100,52 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE):
 
 
 # --------------------
-# Main entry point
+# Application
 # --------------------
-def main():
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
+def build_application(mode=BOT_MODE):
+    builder = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .concurrent_updates(BOT_CONCURRENT_UPDATES)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+    )
+    if TELEGRAM_API_BASE_URL:
+        builder = builder.base_url(TELEGRAM_API_BASE_URL.rstrip("/") + "/bot")
+    if mode == "webhook":
+        # Updates arrive over HTTP (webhook.py), not from an Updater
+        builder = builder.updater(None)
+    app = builder.build()
+
+    # Rate limits run before any handler (group -1)
+    app.add_handler(TypeHandler(Update, rate_limit_gate), group=-1)
 
     # Handlers
     app.add_handler(CommandHandler("start", start))
+    app.add_handler(CommandHandler("reload_vocab", reload_vocab))
+    app.add_handler(CommandHandler("profile", profile_compare))
     app.add_handler(CallbackQueryHandler(callback_handler))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, text_handler))
 
     # Error handling
     app.add_error_handler(error_handler)
+    return app
+
+
+# --------------------
+# Main entry point
+# --------------------
+def main():
+    app = build_application()
+
+    if BOT_MODE == "webhook":
+        from .webhook import run_webhook
+
+        log.info("🤖 SmartSaver AI Bot running (webhook)...")
+        run_webhook(app)
+        return
 
-    print("🤖 SmartSaver AI Bot running...")
+    log.info("🤖 SmartSaver AI Bot running...")
     app.run_polling(drop_pending_updates=True)
 
 
@@ -1,12 +1,19 @@
 # telegram_bot/handlers.py
 
+import os
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from Backend.ai_reco import get_telegram_message
-from Backend.categories import CATEGORIES
+from Backend.vocabulary import reload_vocabulary
 
+from .jobs import get_compare_queue
+from .middleware import dedupe_items
+from .session_store import get_session_store
 from .keyboards import (
+    CATALOG_ACTIONS,
+    get_catalog,
+    resolve_callback,
     start_keyboard,
     category_inline_keyboard,
     subcategory_inline_keyboard,
@@ -18,8 +25,11 @@ from .keyboards import (
 # /start command
 # --------------------
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    context.user_data.clear()
-    context.user_data["basket"] = []
+    # The basket survives /start (and restarts): only the search mode resets
+    store = get_session_store()
+    session = await store.get(update.effective_chat.id)
+    if session.pop("mode", None) is not None:
+        store.save(update.effective_chat.id, session)
 
     await update.message.reply_text(
         "👋 Welcome to *SmartSaverAI Groceries*\n\n"
@@ -30,15 +40,58 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+# --------------------
+# /reload_vocab (admin only)
+# --------------------
+ADMIN_CHAT_IDS = {
+    int(x) for x in os.getenv("ADMIN_CHAT_IDS", "").split(",") if x.strip()
+}
+
+
+async def reload_vocab(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_chat.id not in ADMIN_CHAT_IDS:
+        return
+
+    try:
+        vocab = await reload_vocabulary()
+    except Exception as e:
+        await update.message.reply_text(f"⚠️ Reload failed: {e}")
+        return
+
+    await update.message.reply_text(
+        f"📚 Vocabulary v{vocab.version} loaded "
+        f"({len(vocab.all_valid_words)} words, {len(vocab.categories)} categories)"
+    )
+
+
+# --------------------
+# /profile item1, item2 (admin only)
+# --------------------
+async def profile_compare(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Runs a normal comparison with profiling on (see Backend/profiling.py)
+    if update.effective_chat.id not in ADMIN_CHAT_IDS:
+        return
+
+    items = dedupe_items(" ".join(context.args).split(","))
+    if not items:
+        await update.message.reply_text("Usage: /profile item1, item2")
+        return
+
+    await get_compare_queue().submit(update.effective_chat.id, items, update.message, profile=True)
+
+
 # --------------------
 # Text message handler
 # --------------------
 async def text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     text = update.message.text.strip()
+    chat_id = update.effective_chat.id
+    store = get_session_store()
+    session = await store.get(chat_id)
 
     if text == "📂 Browse Categories":
-        context.user_data.pop("mode", None)
-        context.user_data.setdefault("basket", [])
+        if session.pop("mode", None) is not None:
+            store.save(chat_id, session)
 
         await update.message.reply_text(
             "📦 Select a category:",
@@ -46,7 +99,8 @@ async def text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
     elif text == "🔍 Search Item Manually":
-        context.user_data["mode"] = "manual"
+        session["mode"] = "manual"
+        store.save(chat_id, session)
 
         await update.message.reply_text(
             "✍️ Enter item names (comma-separated)\n"
@@ -54,8 +108,8 @@ async def text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
     elif text == "⬅️ Back":
-        context.user_data.clear()
-        context.user_data["basket"] = []
+        if session.pop("mode", None) is not None:
+            store.save(chat_id, session)
 
         await update.message.reply_text(
             "Main menu:",
@@ -63,81 +117,110 @@ async def text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
     else:
-        if context.user_data.get("mode") == "manual":
-            items = [i.strip() for i in text.split(",") if i.strip()]
-
-            for item in items:
-                await update.message.reply_text(
-                    f"🔎 Analyzing *{item}*...",
-                    parse_mode="Markdown"
-                )
+        if session.get("mode") == "manual":
+            items = dedupe_items(text.split(","))
+            if not items:
+                return
 
-                msg = await get_telegram_message(item)
-                await update.message.reply_text(msg, parse_mode="Markdown")
+            # Acknowledged with a status message; results arrive from the job queue
+            await get_compare_queue().submit(chat_id, items, update.message)
 
 
 # --------------------
 # Inline button handler
 # --------------------
+async def send_fresh_menu(query):
+    await query.message.reply_text(
+        "♻️ The catalog was updated. Here is the latest menu:",
+        reply_markup=category_inline_keyboard()
+    )
+
+
 async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
     data = query.data.split("|")
-    context.user_data.setdefault("basket", [])
+    chat_id = update.effective_chat.id
+    store = get_session_store()
+    session = await store.get(chat_id)
+    session.setdefault("basket", [])
 
     # --------------------
-    # CATEGORY CLICK
+    # CATALOG BUTTONS (see keyboards.py for the encoding)
     # --------------------
-    if data[0] == "cat":
-        category = data[1]
-        category_data = CATEGORIES.get(category)
+    if data[0] in CATALOG_ACTIONS:
+        target = resolve_callback(data)
+
+        if target is None:
+            # Button from before a catalog reload
+            await send_fresh_menu(query)
+            return
 
-        if isinstance(category_data, dict):
+        ci, si = target["ci"], target["si"]
+
+        # --------------------
+        # CATEGORY CLICK
+        # --------------------
+        if target["action"] == "c":
+            if get_catalog().subcategories[ci] is not None:
+                await query.message.reply_text(
+                    f"📂 *{target['category']}*\nChoose a sub-category:",
+                    reply_markup=subcategory_inline_keyboard(ci),
+                    parse_mode="Markdown"
+                )
+            else:
+                await query.message.reply_text(
+                    f"🛒 *{target['category']}* items:",
+                    reply_markup=items_inline_keyboard(ci),
+                    parse_mode="Markdown"
+                )
+
+        # --------------------
+        # SUBCATEGORY CLICK
+        # --------------------
+        elif target["action"] == "s":
             await query.message.reply_text(
-                f"📂 *{category}*\nChoose a sub-category:",
-                reply_markup=subcategory_inline_keyboard(category),
+                f"🛒 *{target['subcategory']}* items:",
+                reply_markup=items_inline_keyboard(ci, si),
                 parse_mode="Markdown"
             )
-        else:
-            await query.message.reply_text(
-                f"🛒 *{category}* items:",
-                reply_markup=items_inline_keyboard(category),
-                parse_mode="Markdown"
+
+        # --------------------
+        # ITEMS PAGE (edits the keyboard in place)
+        # --------------------
+        elif target["action"] == "p":
+            await query.edit_message_reply_markup(
+                reply_markup=items_inline_keyboard(ci, si, target["page"])
             )
 
-    # --------------------
-    # SUBCATEGORY CLICK
-    # --------------------
-    elif data[0] == "subcat":
-        _, category, subcategory = data
+        # --------------------
+        # ITEM CLICK → ADD TO BASKET
+        # --------------------
+        elif target["action"] == "i":
+            item = target["item"]
 
-        await query.message.reply_text(
-            f"🛒 *{subcategory}* items:",
-            reply_markup=items_inline_keyboard(category, subcategory),
-            parse_mode="Markdown"
-        )
+            if item not in session["basket"]:
+                session["basket"].append(item)
+                store.save(chat_id, session)
+
+            await query.message.reply_text(
+                f"✅ *{item}* added to basket\n"
+                f"🧺 Basket: {', '.join(session['basket'])}",
+                parse_mode="Markdown"
+            )
 
     # --------------------
-    # ITEM CLICK → ADD TO BASKET
+    # BUTTONS FROM THE OLD NAME-BASED ENCODING
     # --------------------
-    elif data[0] == "item":
-        item = data[1]
-
-        if item not in context.user_data["basket"]:
-            context.user_data["basket"].append(item)
-
-        await query.message.reply_text(
-            f"✅ *{item}* added to basket\n"
-            f"🧺 Basket: {', '.join(context.user_data['basket'])}",
-            parse_mode="Markdown"
-        )
+    elif data[0] in ("cat", "subcat", "item"):
+        await send_fresh_menu(query)
 
     # --------------------
     # VIEW BASKET
     # --------------------
     elif data[0] == "basket" and data[1] == "view":
-        basket = context.user_data.get("basket", [])
+        basket = session["basket"]
 
         if not basket:
             await query.message.reply_text("🧺 Your basket is empty.")
@@ -151,22 +234,21 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # COMPARE BASKET
     # --------------------
     elif data[0] == "basket" and data[1] == "compare":
-        basket = context.user_data.get("basket", [])
+        basket = session["basket"]
 
         if not basket:
             await query.message.reply_text("🧺 Basket is empty.")
             return
 
-        await query.message.reply_text(
-            "🔍 Comparing basket items...",
-            parse_mode="Markdown"
-        )
-
-        for item in basket:
-            msg = await get_telegram_message(item)
-            await query.message.reply_text(msg, parse_mode="Markdown")
+        # Taken before awaiting, so a second tap meanwhile finds the basket empty;
+        # items added while this runs go into the next basket
+        session["basket"] = []
+        job = await get_compare_queue().submit(chat_id, basket, query.message)
 
-        context.user_data["basket"] = []
+        if job is None:
+            # Refused: put the items back ahead of any added meanwhile
+            session["basket"] = basket + [i for i in session["basket"] if i not in basket]
+        store.save(chat_id, session)
         
     elif data[0] == "basket" and data[1] == "add_more":
         await query.message.reply_text(
@@ -175,6 +257,13 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
 
+    # --------------------
+    # CANCEL A COMPARISON
+    # --------------------
+    elif data[0] == "job" and data[1] == "cancel":
+        if not await get_compare_queue().cancel(int(data[2]), chat_id):
+            await query.message.reply_text("ℹ️ That comparison has already finished.")
+
     # --------------------
     # NAV (future)
     # --------------------
@@ -0,0 +1,242 @@
+# telegram_bot/jobs.py
+
+import asyncio
+import itertools
+import os
+from collections import deque
+
+from Backend.log import get_logger
+from Backend.metrics import request_context, span
+from Backend.profiling import profile_request, profile_requested
+from Backend.report_renderer import md_escape
+
+from .keyboards import job_cancel_keyboard
+from .limits import MAX_COMPARES_PER_CHAT, get_limiter
+
+# Background comparison queue: handlers submit a job and return at once,
+# worker tasks run the pipeline and deliver results as they finish.
+# The worker count is the global cap on comparisons in flight. A chat's
+# jobs beyond BOT_MAX_COMPARES_PER_CHAT wait in that chat's own line and
+# are only handed to the workers as its earlier jobs finish, so a busy
+# chat never holds workers that other chats' jobs could use.
+COMPARE_WORKERS = int(os.getenv("BOT_COMPARE_WORKERS", "8"))
+# Queued + running jobs one chat may have before new ones are refused
+MAX_JOBS_PER_CHAT = int(os.getenv("BOT_MAX_JOBS_PER_CHAT", "3"))
+
+log = get_logger("telegram_bot.jobs")
+
+QUEUED, RUNNING, DONE, CANCELLED, FAILED = "queued", "running", "done", "cancelled", "failed"
+
+
+def item_set_key(items):
+    """Same items in any order / case = same comparison."""
+    return frozenset(" ".join(i.lower().split()) for i in items)
+
+
+class CompareJob:
+    def __init__(self, job_id, chat_id, items, reply_to, status_message, profile=False):
+        self.id = job_id
+        self.chat_id = chat_id
+        self.items = items
+        self.reply_to = reply_to              # message results are replied to
+        self.status_message = status_message  # message edited with progress
+        self.key = item_set_key(items)
+        self.state = QUEUED
+        self.done = 0
+        self.task = None
+        self.profile = profile                # profile the run (profiling.py)
+
+    def status_text(self):
+        label = md_escape(", ".join(self.items))
+        if self.state == QUEUED:
+            return f"🕒 Queued: *{label}*"
+        if self.state == RUNNING:
+            return f"🔍 Comparing *{label}*... ({self.done}/{len(self.items)} done)"
+        if self.state == DONE:
+            return f"✅ Compared *{label}*"
+        if self.state == CANCELLED:
+            return f"🚫 Cancelled: *{label}* ({self.done}/{len(self.items)} done)"
+        return f"⚠️ Comparison failed: *{label}*"
+
+
+class CompareQueue:
+    def __init__(self, workers=COMPARE_WORKERS, max_jobs_per_chat=MAX_JOBS_PER_CHAT,
+                 compares_per_chat=MAX_COMPARES_PER_CHAT):
+        self.workers = max(1, workers)
+        self.max_jobs_per_chat = max_jobs_per_chat
+        self.compares_per_chat = max(1, compares_per_chat)
+        self.jobs = {}   # job id -> job (queued or running)
+        self._queue = asyncio.Queue()   # jobs the workers may start right away
+        self._admitted = {}             # chat id -> its jobs in _queue or running
+        self._waiting = {}              # chat id -> deque of its jobs held back
+        self._ids = itertools.count(1)
+        self._tasks = []
+        self._stopping = False
+
+    # ------------------ LIFECYCLE ------------------
+
+    def start(self):
+        if not self._tasks:
+            self._stopping = False
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+            log.info("🧵 Compare queue started with %d workers", self.workers)
+
+    async def stop(self):
+        self._stopping = True
+        for job in list(self.jobs.values()):
+            if job.task is not None:
+                job.task.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # ------------------ PUBLIC ------------------
+
+    def pending_for(self, chat_id):
+        return sum(1 for job in self.jobs.values() if job.chat_id == chat_id)
+
+    async def submit(self, chat_id, items, reply_to, profile=False):
+        """
+        Queues a comparison and acknowledges it right away with a status
+        message (with a cancel button). Returns the job, or None when the
+        chat already has too many jobs or is already comparing the same items.
+        With `profile` (or when submitted under a profile_request) the run is
+        profiled and the profile's file paths are replied after the results.
+        """
+        key = item_set_key(items)
+        if any(job.chat_id == chat_id and job.key == key for job in self.jobs.values()):
+            await reply_to.reply_text("⏳ Already comparing these items, results are on the way.")
+            return None
+
+        if self.pending_for(chat_id) >= self.max_jobs_per_chat:
+            await reply_to.reply_text(
+                f"⏳ You already have {self.max_jobs_per_chat} comparisons running. "
+                "Please wait for one to finish."
+            )
+            return None
+
+        job_id = next(self._ids)
+        job = CompareJob(job_id, chat_id, items, reply_to, None, profile or profile_requested())
+        # Reserved before the first await so a concurrent update of this chat
+        # (a double tap) sees it in the dedupe and per-chat checks above
+        self.jobs[job_id] = job
+        try:
+            job.status_message = await reply_to.reply_text(
+                job.status_text(),
+                reply_markup=job_cancel_keyboard(job_id),
+                parse_mode="Markdown"
+            )
+        except BaseException:
+            self.jobs.pop(job_id, None)
+            raise
+        if job.state != QUEUED:
+            return job   # cancelled (or the queue stopped) while acknowledging
+        if self._admitted.get(chat_id, 0) < self.compares_per_chat:
+            self._admitted[chat_id] = self._admitted.get(chat_id, 0) + 1
+            self._queue.put_nowait(job)
+        else:
+            self._waiting.setdefault(chat_id, deque()).append(job)
+        return job
+
+    async def cancel(self, job_id, chat_id):
+        """Cancels a queued or running job of this chat. Returns True if it was."""
+        job = self.jobs.get(job_id)
+        if job is None or job.chat_id != chat_id:
+            return False
+
+        if job.task is not None:
+            job.task.cancel()   # the worker reports the cancellation
+        else:
+            # Still queued: a held-back job just leaves its line, an admitted
+            # one is skipped (and its place released) by the worker
+            job.state = CANCELLED
+            self.jobs.pop(job_id, None)
+            waiting = self._waiting.get(chat_id)
+            if waiting and job in waiting:
+                waiting.remove(job)
+                if not waiting:
+                    del self._waiting[chat_id]
+            await self._update_status(job, final=True)
+        return True
+
+    # ------------------ WORKERS ------------------
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.state != QUEUED:
+                    continue   # cancelled while waiting
+                job.task = asyncio.create_task(self._run(job))
+                try:
+                    await job.task
+                except asyncio.CancelledError:
+                    if self._stopping:
+                        raise
+                    job.state = CANCELLED
+                except Exception as e:
+                    log.exception("⚠️ Compare job %s failed: %s", job.id, e)
+                    job.state = FAILED
+                self.jobs.pop(job.id, None)
+                await self._update_status(job, final=True)
+            finally:
+                self._release(job.chat_id)
+                self._queue.task_done()
+
+    def _release(self, chat_id):
+        """One of the chat's admitted jobs is done: admit its next held-back job."""
+        waiting = self._waiting.get(chat_id)
+        if waiting:
+            self._queue.put_nowait(waiting.popleft())   # takes over the freed place
+            if not waiting:
+                del self._waiting[chat_id]
+            return
+        self._admitted[chat_id] -= 1
+        if not self._admitted[chat_id]:
+            del self._admitted[chat_id]
+
+    async def _run(self, job):
+        # Imported here so bot startup doesn't load the pipeline (see bot.py BOT_WARMUP)
+        from Backend.ai_reco import get_telegram_messages
+
+        # Every stage of this comparison is traced under job-<id> (see metrics.py)
+        with request_context(f"job-{job.id}", kind="compare"), \
+                profile_request(f"job-{job.id}", enabled=job.profile) as profile:
+            async with get_limiter().slot(job.chat_id):
+                job.state = RUNNING
+                await self._update_status(job)
+
+                async def send(msg):
+                    with span("telegram_send"):
+                        await job.reply_to.reply_text(msg, parse_mode="Markdown")
+                    # The basket plan comes after the items: progress stays at n/n
+                    job.done = min(job.done + 1, len(job.items))
+                    await self._update_status(job)
+
+                await get_telegram_messages(job.items, on_message=send)
+                job.state = DONE
+                if profile is not None:
+                    await job.reply_to.reply_text(profile.summary())
+
+    async def _update_status(self, job, final=False):
+        try:
+            with span("telegram_edit"):
+                await job.status_message.edit_text(
+                    job.status_text(),
+                    reply_markup=None if final else job_cancel_keyboard(job.id),
+                    parse_mode="Markdown"
+                )
+        except Exception as e:
+            # "message is not modified" and friends: progress is best effort
+            log.debug("⚠️ Status update for job %s failed: %s", job.id, e)
+
+
+_queue = None
+
+
+def get_compare_queue():
+    global _queue
+    if _queue is None:
+        _queue = CompareQueue()
+    return _queue
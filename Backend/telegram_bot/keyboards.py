@@ -1,11 +1,111 @@
 # telegram_bot/keyboards.py
 
+import json
+import os
+import zlib
+from collections.abc import Mapping
+
 from telegram import (
     ReplyKeyboardMarkup,
     InlineKeyboardButton,
     InlineKeyboardMarkup
 )
-from Backend.categories import CATEGORIES
+from Backend.vocabulary import get_vocabulary
+
+# Category-tree keyboards are built once per catalog (vocabulary) and reused;
+# a vocabulary reload swaps in a new Catalog on the next tap.
+# Buttons carry numeric ids plus a short catalog tag instead of names,
+# so callback_data stays far below Telegram's 64-byte limit:
+#   c|<tag>|<cat>                 category
+#   s|<tag>|<cat>|<sub>           sub-category
+#   p|<tag>|<cat>|<sub>|<page>    page of items (<sub> is "-" without sub-categories)
+#   i|<tag>|<cat>|<sub>|<item>    add item to basket
+# A tag from an older catalog means the menu is stale (see resolve_callback).
+ITEMS_PAGE_SIZE = int(os.getenv("BOT_ITEMS_PAGE_SIZE", "8"))
+
+CATALOG_ACTIONS = ("c", "s", "p", "i")
+
+
+def _catalog_tag(categories):
+    raw = json.dumps(
+        {c: (dict(v) if isinstance(v, Mapping) else v) for c, v in categories.items()},
+        sort_keys=True, ensure_ascii=False
+    )
+    return format(zlib.crc32(raw.encode("utf-8")), "x")
+
+
+class Catalog:
+    def __init__(self, vocab):
+        self.vocab = vocab
+        self.tag = _catalog_tag(vocab.categories)
+        self.categories = list(vocab.categories)
+        # Per category: list of sub-category names, or None when it holds items directly
+        self.subcategories = [
+            list(v) if isinstance(v, Mapping) else None for v in vocab.categories.values()
+        ]
+        self._keyboards = {}
+
+    def items(self, ci, si=None):
+        node = self.vocab.categories[self.categories[ci]]
+        return node[self.subcategories[ci][si]] if si is not None else node
+
+    def keyboard(self, key, build):
+        markup = self._keyboards.get(key)
+        if markup is None:
+            markup = self._keyboards[key] = build()
+        return markup
+
+
+_catalog = None
+
+
+def get_catalog():
+    global _catalog
+    vocab = get_vocabulary()
+    if _catalog is None or _catalog.vocab is not vocab:
+        _catalog = Catalog(vocab)
+    return _catalog
+
+
+def resolve_callback(data):
+    """
+    Decodes split catalog callback_data into
+    {"action", "ci", "si", "category", "subcategory", "item", "page"},
+    or None when it belongs to an older catalog (or is malformed).
+    """
+    catalog = get_catalog()
+    if len(data) < 3 or data[1] != catalog.tag:
+        return None
+    try:
+        ci = _index(data[2])
+        category = catalog.categories[ci]
+        si = _index(data[3]) if len(data) > 3 and data[3] != "-" else None
+        subcategory = catalog.subcategories[ci][si] if si is not None else None
+        target = {
+            "action": data[0], "ci": ci, "si": si,
+            "category": category, "subcategory": subcategory,
+            "item": None, "page": 0
+        }
+        if data[0] == "i":
+            target["item"] = catalog.items(ci, si)[_index(data[4])]
+        elif data[0] == "p":
+            target["page"] = _index(data[4])
+    # KeyError: a forged si on a category without subcategories indexes a mapping
+    except (ValueError, IndexError, KeyError, TypeError):
+        return None
+    return target
+
+
+def _index(part):
+    """Non-negative int from callback_data; negatives would index from the end."""
+    value = int(part)
+    if value < 0:
+        raise ValueError(f"negative index {value}")
+    return value
+
+
+def _basket_row():
+    return [InlineKeyboardButton("🧺 View Basket", callback_data="basket|view")]
 
 
 # --------------------
@@ -25,57 +125,76 @@ def start_keyboard():
 # CATEGORY (INLINE)
 # --------------------
 def category_inline_keyboard():
-    buttons = [
-        [InlineKeyboardButton(cat, callback_data=f"cat|{cat}")]
-        for cat in CATEGORIES.keys()
-    ]
+    catalog = get_catalog()
 
-    buttons.append(
-        [InlineKeyboardButton("🧺 View Basket", callback_data="basket|view")]
-    )
+    def build():
+        buttons = [
+            [InlineKeyboardButton(cat, callback_data=f"c|{catalog.tag}|{ci}")]
+            for ci, cat in enumerate(catalog.categories)
+        ]
+        buttons.append(_basket_row())
+        return InlineKeyboardMarkup(buttons)
 
-    return InlineKeyboardMarkup(buttons)
+    return catalog.keyboard(("c",), build)
 
 
 # --------------------
 # SUBCATEGORY (INLINE)
 # --------------------
-def subcategory_inline_keyboard(category):
-    subcats = CATEGORIES.get(category)
-    buttons = []
-
-    if isinstance(subcats, dict):
-        for sub in subcats.keys():
-            buttons.append(
-                [InlineKeyboardButton(sub, callback_data=f"subcat|{category}|{sub}")]
-            )
-
-    buttons.append(
-        [InlineKeyboardButton("🧺 View Basket", callback_data="basket|view")]
-    )
+def subcategory_inline_keyboard(ci):
+    catalog = get_catalog()
+
+    def build():
+        buttons = [
+            [InlineKeyboardButton(sub, callback_data=f"s|{catalog.tag}|{ci}|{si}")]
+            for si, sub in enumerate(catalog.subcategories[ci] or [])
+        ]
+        buttons.append(_basket_row())
+        return InlineKeyboardMarkup(buttons)
 
-    return InlineKeyboardMarkup(buttons)
+    return catalog.keyboard(("s", ci), build)
 
 
 # --------------------
-# ITEMS (INLINE)
+# ITEMS (INLINE, PAGED)
 # --------------------
-def items_inline_keyboard(category, subcategory=None):
-    if subcategory:
-        items = CATEGORIES[category][subcategory]
-    else:
-        items = CATEGORIES[category]
+def items_inline_keyboard(ci, si=None, page=0):
+    catalog = get_catalog()
+    items = catalog.items(ci, si)
+    pages = max(1, -(-len(items) // ITEMS_PAGE_SIZE))
+    page = min(max(page, 0), pages - 1)
+    sub = "-" if si is None else si
+
+    def build():
+        start = page * ITEMS_PAGE_SIZE
+        buttons = [
+            [InlineKeyboardButton(f"➕ {item}", callback_data=f"i|{catalog.tag}|{ci}|{sub}|{ii}")]
+            for ii, item in enumerate(items[start:start + ITEMS_PAGE_SIZE], start)
+        ]
+
+        if pages > 1:
+            nav = []
+            if page > 0:
+                nav.append(InlineKeyboardButton("◀️ Prev", callback_data=f"p|{catalog.tag}|{ci}|{sub}|{page - 1}"))
+            nav.append(InlineKeyboardButton(f"{page + 1}/{pages}", callback_data="nav|noop"))
+            if page < pages - 1:
+                nav.append(InlineKeyboardButton("Next ▶️", callback_data=f"p|{catalog.tag}|{ci}|{sub}|{page + 1}"))
+            buttons.append(nav)
+
+        buttons.extend([
+            [InlineKeyboardButton("➕ Add More Items", callback_data="basket|add_more")],
+            _basket_row(),
+            [InlineKeyboardButton("🔍 Compare Basket", callback_data="basket|compare")]
+        ])
+        return InlineKeyboardMarkup(buttons)
+
+    return catalog.keyboard(("i", ci, si, page), build)
 
-    buttons = [
-        [InlineKeyboardButton(f"➕ {item}", callback_data=f"item|{item}")]
-        for item in items
-    ]
-
-    buttons.extend([
-        [InlineKeyboardButton("➕ Add More Items", callback_data="basket|add_more")],
-        [InlineKeyboardButton("🧺 View Basket", callback_data="basket|view")],
-        [InlineKeyboardButton("🔍 Compare Basket", callback_data="basket|compare")]
-    ])
-
-    return InlineKeyboardMarkup(buttons)
 
+# --------------------
+# COMPARE JOB (INLINE)
+# --------------------
+def job_cancel_keyboard(job_id):
+    return InlineKeyboardMarkup(
+        [[InlineKeyboardButton("✖️ Cancel", callback_data=f"job|cancel|{job_id}")]]
+    )
@@ -0,0 +1,50 @@
+# telegram_bot/limits.py
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+# How many comparisons (basket compare / manual search) may run at once:
+# per chat, and across the whole bot. Items inside one comparison run
+# concurrently already; these caps keep one busy chat, or a burst of users,
+# from opening unbounded browsers and LLM calls.
+MAX_COMPARES_PER_CHAT = int(os.getenv("BOT_MAX_COMPARES_PER_CHAT", "1"))
+MAX_COMPARES_GLOBAL = int(os.getenv("BOT_MAX_COMPARES_GLOBAL", "8"))
+
+
+class ChatLimiter:
+    def __init__(self, per_chat=MAX_COMPARES_PER_CHAT, global_limit=MAX_COMPARES_GLOBAL):
+        self.per_chat = max(1, per_chat)
+        self._global = asyncio.Semaphore(max(1, global_limit))
+        self._chats = {}   # chat_id -> [semaphore, users]
+
+    def busy(self, chat_id):
+        """True when a new comparison for this chat would have to wait."""
+        entry = self._chats.get(chat_id)
+        return (entry is not None and entry[1] >= self.per_chat) or self._global.locked()
+
+    @asynccontextmanager
+    async def slot(self, chat_id):
+        entry = self._chats.get(chat_id)
+        if entry is None:
+            entry = self._chats[chat_id] = [asyncio.Semaphore(self.per_chat), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                async with self._global:
+                    yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                # No one waiting or running: forget the chat
+                del self._chats[chat_id]
+
+
+_limiter = None
+
+
+def get_limiter():
+    global _limiter
+    if _limiter is None:
+        _limiter = ChatLimiter()
+    return _limiter
@@ -0,0 +1,135 @@
+# telegram_bot/middleware.py
+
+import os
+import time
+
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop, ContextTypes
+
+from .session_store import get_session_store
+
+# Runs ahead of every handler (TypeHandler in group -1, see bot.py).
+# Two token buckets per chat:
+#   - updates: any message / button tap (keeps one chat from flooding the bot)
+#   - compares: manual searches and "Compare Basket", the requests that cost
+#     scrapes and LLM calls
+# Over the limit, the update is dropped with one notice per throttled stretch.
+RATE_UPDATES_BURST = float(os.getenv("BOT_RATE_UPDATES_BURST", "20"))
+RATE_UPDATES_PER_SECOND = float(os.getenv("BOT_RATE_UPDATES_PER_SECOND", "2"))
+RATE_COMPARES_BURST = float(os.getenv("BOT_RATE_COMPARES_BURST", "3"))
+RATE_COMPARES_PER_MINUTE = float(os.getenv("BOT_RATE_COMPARES_PER_MINUTE", "4"))
+# Buckets of idle chats are dropped once there are more than this
+RATE_MAX_TRACKED_CHATS = int(os.getenv("BOT_RATE_MAX_TRACKED_CHATS", "10000"))
+
+# Reply-keyboard buttons: never a search, even in manual mode
+MENU_TEXTS = ("📂 Browse Categories", "🔍 Search Item Manually", "⬅️ Back")
+
+
+class TokenBucket:
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.notified = False
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    def take(self, cost=1.0):
+        self._refill(time.monotonic())
+        if self.tokens >= cost:
+            self.tokens -= cost
+            self.notified = False
+            return True
+        return False
+
+    def retry_after(self, cost=1.0):
+        return max(0.0, (cost - self.tokens) / self.refill_per_second) if self.refill_per_second else float("inf")
+
+    def is_full(self, now):
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class ChatRateLimiter:
+    def __init__(self, capacity, refill_per_second, max_tracked=RATE_MAX_TRACKED_CHATS):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_tracked = max_tracked
+        self._buckets = {}
+
+    def bucket(self, chat_id):
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            if len(self._buckets) >= self.max_tracked:
+                self._prune()
+            bucket = self._buckets[chat_id] = TokenBucket(self.capacity, self.refill_per_second)
+        return bucket
+
+    def _prune(self):
+        # A full bucket is the same as no bucket
+        now = time.monotonic()
+        for chat_id in [c for c, b in self._buckets.items() if b.is_full(now)]:
+            del self._buckets[chat_id]
+
+
+update_limiter = ChatRateLimiter(RATE_UPDATES_BURST, RATE_UPDATES_PER_SECOND)
+compare_limiter = ChatRateLimiter(RATE_COMPARES_BURST, RATE_COMPARES_PER_MINUTE / 60.0)
+
+
+# ------------------ HELPERS ------------------
+
+def dedupe_items(items):
+    """Drops repeated items ("milk, Milk , onion, milk" -> milk, onion), keeping first spelling and order."""
+    seen = set()
+    unique = []
+    for item in items:
+        key = " ".join(item.lower().split())
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(item.strip())
+    return unique
+
+
+async def _is_compare(update):
+    if update.callback_query:
+        return update.callback_query.data == "basket|compare"
+    text = update.message.text.strip() if update.message and update.message.text else ""
+    if text and not text.startswith("/") and text not in MENU_TEXTS:
+        # Free text only starts a comparison in manual-search mode
+        session = await get_session_store().get(update.effective_chat.id)
+        return session.get("mode") == "manual"
+    return False
+
+
+async def _reject(update, bucket, what):
+    wait = int(bucket.retry_after()) + 1
+    text = f"🐢 Too many {what}. Please try again in {wait}s."
+
+    if update.callback_query:
+        # Always answer the tap so the button stops spinning
+        await update.callback_query.answer(text, show_alert=not bucket.notified)
+    elif update.effective_message and not bucket.notified:
+        await update.effective_message.reply_text(text)
+    bucket.notified = True
+
+
+# ------------------ GATE ------------------
+
+async def rate_limit_gate(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat = update.effective_chat
+    if chat is None:
+        return
+
+    bucket = update_limiter.bucket(chat.id)
+    if not bucket.take():
+        await _reject(update, bucket, "requests")
+        raise ApplicationHandlerStop
+
+    if await _is_compare(update):
+        bucket = compare_limiter.bucket(chat.id)
+        if not bucket.take():
+            await _reject(update, bucket, "comparisons")
+            raise ApplicationHandlerStop
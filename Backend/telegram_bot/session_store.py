@@ -0,0 +1,161 @@
+# telegram_bot/session_store.py
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from Backend.log import get_logger
+
+log = get_logger("telegram_bot.session_store")
+
+# Per-chat bot state (basket, search mode) persisted in SQLite.
+# A chat's row is read the first time the chat talks to the bot after a
+# restart, never all at once; changes only mark the chat dirty and a
+# background task writes the dirty chats in one transaction every
+# SESSION_FLUSH_SECONDS (and once more on shutdown).
+SESSION_DB_PATH = os.getenv(
+    "SESSION_DB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "sessions.sqlite3")
+)
+SESSION_FLUSH_SECONDS = float(os.getenv("SESSION_FLUSH_SECONDS", "2"))
+# Clean sessions kept in memory; dirty ones are never evicted before a flush
+SESSION_CACHE_MAX = int(os.getenv("SESSION_CACHE_MAX", "50000"))
+
+
+def new_session():
+    return {"basket": []}
+
+
+class SessionStore:
+    def __init__(self, path=SESSION_DB_PATH, flush_seconds=SESSION_FLUSH_SECONDS, max_cached=SESSION_CACHE_MAX):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.flush_seconds = flush_seconds
+        self.max_cached = max_cached
+        self._sessions = OrderedDict()   # chat_id -> session dict
+        self._dirty = set()
+        self._flushing = set()   # chats being written: not evictable until it commits
+        self._lock = threading.Lock()
+        self._flusher = None
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chat_sessions (
+                chat_id INTEGER PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    # ------------------ BLOCKING I/O ------------------
+
+    def _read(self, chat_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM chat_sessions WHERE chat_id = ?", (chat_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else new_session()
+
+    def _write(self, rows):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chat_sessions (chat_id, data, updated_at) VALUES (?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    # ------------------ PUBLIC ------------------
+
+    async def get(self, chat_id):
+        """The chat's session dict, loaded on first use. Call save() after changing it."""
+        session = self._sessions.get(chat_id)
+        if session is None:
+            loaded = await asyncio.to_thread(self._read, chat_id)
+            # Another update of this chat may have loaded it meanwhile: keep one dict
+            session = self._sessions.setdefault(chat_id, loaded)
+        self._sessions.move_to_end(chat_id)
+        self._evict()
+        return session
+
+    def save(self, chat_id, session):
+        """
+        Marks the chat's session (the dict get() returned) as changed; written
+        on the next flush. Other chats' get() calls may have evicted it while
+        the handler awaited, so it is put back rather than dropped.
+        """
+        self._sessions[chat_id] = session
+        self._sessions.move_to_end(chat_id)
+        self._dirty.add(chat_id)
+
+    async def flush(self):
+        if not self._dirty:
+            return 0
+        dirty, self._dirty = self._dirty, set()
+        self._flushing = dirty
+        now = time.time()
+        rows = [
+            (chat_id, json.dumps(self._sessions[chat_id], ensure_ascii=False), now)
+            for chat_id in dirty if chat_id in self._sessions
+        ]
+        written = False
+        try:
+            await asyncio.to_thread(self._write, rows)
+            written = True
+        except Exception as e:
+            log.warning("⚠️ Session flush failed (%d chats): %s", len(rows), e)
+            return 0
+        finally:
+            if not written:
+                # Keep them dirty (a cancelled flush too) and retry on the next flush
+                self._dirty |= dirty
+            self._flushing = set()
+        self._evict()
+        return len(rows)
+
+    def _evict(self):
+        while len(self._sessions) > self.max_cached:
+            for chat_id in self._sessions:
+                if chat_id not in self._dirty and chat_id not in self._flushing:
+                    del self._sessions[chat_id]
+                    break
+            else:
+                return   # everything is dirty or being written: wait for the flush
+
+    # ------------------ LIFECYCLE ------------------
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    def start(self):
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        flushed = await self.flush()
+        log.info("💾 Sessions flushed on shutdown (%d chats)", flushed)
+
+
+_store = None
+
+
+def get_session_store():
+    global _store
+    if _store is None:
+        _store = SessionStore()
+    return _store
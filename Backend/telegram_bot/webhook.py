@@ -0,0 +1,162 @@
+# telegram_bot/webhook.py
+
+import asyncio
+import os
+import signal
+from collections import deque
+
+from aiohttp import web
+from telegram import Update
+
+from Backend.log import get_logger
+from Backend.metrics import request_context
+from Backend.profiling import profile_request
+
+log = get_logger("telegram_bot.webhook")
+
+# Webhook deployment (BOT_MODE=webhook): Telegram POSTs updates to an
+# embedded aiohttp server. Each update is acknowledged immediately and
+# handed to ChatDispatcher, which processes different chats concurrently
+# but one chat's updates strictly in arrival order.
+
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+# Public https URL Telegram should call (without the path); empty = don't register
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+# Checked against the X-Telegram-Bot-Api-Secret-Token header
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+# "X-SmartSaver-Profile: 1" on a POST profiles the comparison that update
+# starts (profiling.py). Telegram never sends it: it is for replaying an
+# update by hand, and only honored when WEBHOOK_SECRET is set.
+PROFILE_HEADER = "X-SmartSaver-Profile"
+# Updates processed at the same time across all chats
+WEBHOOK_MAX_IN_FLIGHT = int(os.getenv("WEBHOOK_MAX_IN_FLIGHT", "64"))
+
+
+class ChatDispatcher:
+    """Feeds updates to application.process_update, ordered per chat."""
+
+    def __init__(self, application, max_in_flight=WEBHOOK_MAX_IN_FLIGHT):
+        self.application = application
+        self._slots = asyncio.Semaphore(max(1, max_in_flight))
+        self._chats = {}    # chat key -> deque of pending updates
+        self._tasks = set()
+        self.processed = 0
+
+    def submit(self, update, profile=False):
+        chat = update.effective_chat
+        # Updates without a chat (inline queries, polls...) have no ordering to keep
+        key = chat.id if chat else f"update:{update.update_id}"
+
+        pending = self._chats.get(key)
+        if pending is not None:
+            pending.append((update, profile))   # that chat's drain task picks it up
+            return
+
+        self._chats[key] = deque([(update, profile)])
+        task = asyncio.create_task(self._drain(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _drain(self, key):
+        pending = self._chats[key]
+        try:
+            while pending:
+                update, profile = pending.popleft()
+                async with self._slots:
+                    try:
+                        with request_context(f"update-{update.update_id}", kind="update"), \
+                                profile_request(f"update-{update.update_id}", enabled=profile):
+                            await self.application.process_update(update)
+                    except Exception as e:
+                        log.exception("⚠️ Update %s failed: %s", update.update_id, e)
+                self.processed += 1
+        finally:
+            del self._chats[key]
+
+    async def join(self):
+        """Waits until every accepted update has been processed."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+# ------------------ HTTP ------------------
+
+def make_web_app(application, dispatcher, path=WEBHOOK_PATH, secret=WEBHOOK_SECRET):
+    async def receive_update(request):
+        if secret and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != secret:
+            return web.Response(status=403)
+        try:
+            update = Update.de_json(await request.json(), application.bot)
+        except Exception as e:
+            log.warning("⚠️ Bad webhook payload: %s", e)
+            return web.Response(status=400)
+
+        dispatcher.submit(update, profile=bool(secret) and request.headers.get(PROFILE_HEADER) == "1")
+        return web.Response(text="ok")
+
+    async def healthz(request):
+        return web.json_response({"ok": True, "processed": dispatcher.processed})
+
+    web_app = web.Application()
+    web_app.router.add_post(path, receive_update)
+    web_app.router.add_get("/healthz", healthz)
+    return web_app
+
+
+async def start_webhook(application, host=WEBHOOK_HOST, port=WEBHOOK_PORT, path=WEBHOOK_PATH,
+                        public_url=WEBHOOK_URL, secret=WEBHOOK_SECRET):
+    """
+    Initializes the application (running its post_init hook) and starts the
+    HTTP server. Returns (runner, dispatcher); pass them to stop_webhook.
+    Requires an application built with .updater(None).
+    """
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+
+    if public_url:
+        await application.bot.set_webhook(
+            url=public_url.rstrip("/") + path,
+            secret_token=secret or None,
+            allowed_updates=Update.ALL_TYPES
+        )
+        log.info("🔗 Webhook registered at %s", public_url.rstrip("/") + path)
+
+    dispatcher = ChatDispatcher(application)
+    runner = web.AppRunner(make_web_app(application, dispatcher, path, secret))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    log.info("🌐 Webhook server listening on %s:%s%s", host, runner.addresses[0][1], path)
+    return runner, dispatcher
+
+
+async def stop_webhook(application, runner, dispatcher):
+    # Stop accepting, finish what was accepted, then shut the bot down
+    await runner.cleanup()
+    await dispatcher.join()
+    await application.stop()
+    if application.post_shutdown:
+        await application.post_shutdown(application)
+    await application.shutdown()
+
+
+def run_webhook(application):
+    """Blocking entry point, the webhook counterpart of run_polling."""
+    async def serve():
+        runner, dispatcher = await start_webhook(application)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:
+                pass
+        try:
+            await stop.wait()
+        finally:
+            await stop_webhook(application, runner, dispatcher)
+
+    asyncio.run(serve())
@@ -0,0 +1,85 @@
+import itertools
+import random
+
+from Backend.alignment import cluster_to_row
+from Backend.basket_optimizer import (
+    INF,
+    evaluate,
+    item_offers,
+    load_store_policies,
+    optimize_basket,
+    optimize_exact,
+)
+
+# Checks optimize_exact against brute force (every item -> store assignment
+# within max_stores) on small random baskets.
+#   python -m pytest Backend/tests
+
+STORES = ("blinkit", "zepto", "bigbasket")
+
+
+def random_basket(rng):
+    offers = {}
+    for i in range(rng.randint(1, 6)):
+        base = rng.choice((20, 35, 50, 60, 80, 120, 180, 250))
+        offers[f"item{i}"] = {
+            store: round(base * rng.uniform(0.8, 1.2))
+            for store in STORES if rng.random() < 0.75
+        }
+    return offers
+
+
+def brute_force(offers, policies, max_stores):
+    """Cheapest total over every assignment of the best-covered items, or INF."""
+    available = {item: prices for item, prices in offers.items() if prices}
+    best_cover, best_cost = 0, INF
+    for k in range(1, max_stores + 1):
+        for subset in itertools.combinations(STORES, k):
+            items = [item for item, prices in available.items() if any(s in prices for s in subset)]
+            if len(items) < best_cover:
+                continue
+            if len(items) > best_cover:
+                best_cover, best_cost = len(items), INF
+            choices = [[s for s in subset if s in available[item]] for item in items]
+            for picked in itertools.product(*choices):
+                cost = evaluate(dict(zip(items, picked)), available, policies)[0]
+                best_cost = min(best_cost, cost)
+    return best_cost
+
+
+def test_exact_matches_brute_force():
+    policies = load_store_policies("")
+    rng = random.Random(2024)
+    mismatches = []
+    for case in range(2000):
+        offers = random_basket(rng)
+        max_stores = rng.choice((1, 2, 3))
+        expected = brute_force(offers, policies, max_stores)
+        plan = optimize_exact(offers, policies, max_stores)
+        got = plan["total"] if plan is not None else INF
+        if abs(got - expected) > 1e-9 and not (got == expected == INF):
+            mismatches.append((case, offers, max_stores, got, expected))
+    assert not mismatches, f"{len(mismatches)}/2000 mismatches, first: {mismatches[0]}"
+
+
+def test_optimize_basket_never_beats_exact():
+    policies = load_store_policies("")
+    rng = random.Random(7)
+    for _ in range(200):
+        offers = random_basket(rng)
+        exact = optimize_exact(offers, policies, 2)
+        plan = optimize_basket(offers, policies, 2)
+        if exact is None:
+            continue
+        assert plan["total"] == exact["total"]
+
+
+def test_item_offers_names_each_stores_own_listing():
+    row = cluster_to_row([
+        {"name": "Amul Taaza Toned Milk", "source": "blinkit", "price": 28},
+        {"name": "Amul Taaza Toned Fresh Milk Pouch", "source": "zepto", "price": 27},
+        {"name": "Amul Toned Milk", "source": "zepto", "price": 26},
+    ])
+    offer = item_offers({"500 ml": [row]})
+    assert offer["prices"] == {"blinkit": 28, "zepto": 26}
+    assert offer["names"] == {"blinkit": "Amul Taaza Toned Milk", "zepto": "Amul Toned Milk"}
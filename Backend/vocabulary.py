@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from .log import get_logger
+
+log = get_logger(__name__)
+
+# Versioned data file holding SYNONYMS, CATEGORIES and the prefilter term lists.
+# Edit the file and call reload_vocabulary() (or let watch_vocabulary() pick it up)
+# to apply new terms without restarting the bot.
+VOCABULARY_PATH = os.getenv(
+    "VOCABULARY_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "vocabulary.json")
+)
+
+
+# ------------------ FROZEN STRUCTURE ------------------
+
+@dataclass(frozen=True)
+class Vocabulary:
+    version: int
+    synonyms: MappingProxyType      # canonical term -> tuple of keywords
+    categories: MappingProxyType    # category -> {subcategory: items} or items
+    all_valid_words: frozenset      # every canonical term and keyword
+    word_list: tuple                # sorted words (stable input for difflib)
+    filter_rules: MappingProxyType  # term lists for prefilter.py
+    mtime: float = 0.0
+
+
+def _freeze_items(items):
+    return tuple(sys.intern(str(i).strip()) for i in items)
+
+
+def build_vocabulary(data, mtime=0.0):
+    """
+    Turns the raw JSON dict into an immutable Vocabulary.
+    Strings are interned so repeated keywords share memory.
+    """
+    synonyms = {}
+    for key, values in data.get("synonyms", {}).items():
+        key = sys.intern(key.lower().strip())
+        synonyms[key] = tuple(sys.intern(v.lower().strip()) for v in values)
+
+    categories = {}
+    for cat, sub in data.get("categories", {}).items():
+        cat = sys.intern(cat)
+        if isinstance(sub, dict):
+            categories[cat] = MappingProxyType(
+                {sys.intern(s): _freeze_items(items) for s, items in sub.items()}
+            )
+        else:
+            categories[cat] = _freeze_items(sub)
+
+    raw_rules = data.get("filter_rules", {})
+    filter_rules = {
+        group: tuple(sys.intern(t.lower().strip()) for t in raw_rules.get(group, []))
+        for group in ("cooked", "derivatives", "accessories")
+    }
+    filter_rules["varieties"] = MappingProxyType({
+        sys.intern(q.lower().strip()): tuple(sys.intern(t.lower().strip()) for t in terms)
+        for q, terms in raw_rules.get("varieties", {}).items()
+    })
+    filter_rules["neutral"] = frozenset(
+        sys.intern(t.lower().strip()) for t in raw_rules.get("neutral", [])
+    )
+
+    words = set(synonyms)
+    for values in synonyms.values():
+        words.update(values)
+
+    return Vocabulary(
+        version=int(data.get("version", 0)),
+        synonyms=MappingProxyType(synonyms),
+        categories=MappingProxyType(categories),
+        all_valid_words=frozenset(words),
+        word_list=tuple(sorted(words)),
+        filter_rules=MappingProxyType(filter_rules),
+        mtime=mtime
+    )
+
+
+def load_vocabulary(path=None):
+    """Reads + builds the vocabulary (blocking, run it off the event loop)."""
+    path = path or VOCABULARY_PATH
+    mtime = os.stat(path).st_mtime
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return build_vocabulary(data, mtime)
+
+
+# ------------------ ACTIVE INSTANCE ------------------
+
+_current = None
+_lock = threading.Lock()   # first load may race between the loop and worker threads
+
+
+def get_vocabulary():
+    """Returns the active vocabulary (loaded on first use)."""
+    global _current
+    vocab = _current
+    if vocab is not None:
+        return vocab
+    with _lock:
+        if _current is None:
+            _current = load_vocabulary()
+        return _current
+
+
+def set_vocabulary(vocab):
+    """Atomically swaps the active vocabulary (single reference assignment)."""
+    global _current
+    with _lock:
+        _current = vocab
+    return vocab
+
+
+async def reload_vocabulary(path=None):
+    """
+    Rebuilds the vocabulary in a worker thread and swaps it in.
+    On a bad file the old vocabulary stays active and the error is raised.
+    """
+    vocab = await asyncio.to_thread(load_vocabulary, path)
+    set_vocabulary(vocab)
+    log.info("📚 Vocabulary v%s loaded (%d words)", vocab.version, len(vocab.all_valid_words))
+    return vocab
+
+
+async def watch_vocabulary(path=None, interval=5.0):
+    """
+    Polls the data file's mtime and reloads when it changes.
+    Meant to run as a background task for the lifetime of the bot.
+    """
+    path = path or VOCABULARY_PATH
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            mtime = (await asyncio.to_thread(os.stat, path)).st_mtime
+            if mtime != get_vocabulary().mtime:
+                await reload_vocabulary(path)
+        except Exception as e:
+            log.warning("⚠️ Vocabulary reload failed: %s", e)